@@ -10,16 +10,48 @@ Two flavours of generation are supported:
 * :func:`generate_structured` for typed structured outputs
   (:class:`~highlight.utils.ApproachPoints` / :class:`~highlight.utils.ImpactPoints`).
 
-Both accept an optional per-request ``api_key`` / ``base_url`` / ``model`` so
+Each has a native async counterpart (:func:`agenerate_text`,
+:func:`agenerate_structured`) built on ``Agent.run`` for the API routes, so an
+in-flight LLM call holds no worker thread. :func:`astream_text` yields text
+deltas as the model produces them. Concurrent upstream calls on an
+event loop are capped by ``LLM_MAX_CONCURRENCY``. When ``LLM_CACHE_ENABLED`` is
+set, responses are served from and stored in the persistent
+:mod:`~app.llm_cache` unless the caller passes ``use_cache=False``.
+
+All four accept an optional per-request ``api_key`` / ``base_url`` / ``model`` so
 users may supply their own OpenAI credentials in place of the ``.env`` defaults.
+
+Each configuration's provider (owning a keep-alive HTTP connection pool) is
+pooled per event loop together with its model and agents, and reused across
+calls, so consecutive generations skip client construction and the TLS
+handshake. Entries for the ``.env`` credentials are pinned; entries for
+user-supplied credentials are evicted least-recently-used once
+``LLM_POOL_MAX_SIZE`` is exceeded, and entries of loops that have finished are
+evicted either way. An evicted client is closed once no call is using it. Token usage,
+including input tokens served from the provider's prompt cache, is totalled
+for ``/api/metrics``.
 """
 
 from __future__ import annotations
 
+import asyncio
+import threading
+import weakref
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
 from dataclasses import dataclass
-from typing import Optional, Type, TypeVar
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Hashable,
+    Iterator,
+    Optional,
+    Type,
+    TypeVar,
+)
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 from pydantic_ai import Agent
 
 # Pydantic AI renamed ``OpenAIModel`` to ``OpenAIChatModel`` in newer releases.
@@ -31,8 +63,16 @@ except ImportError:  # older pydantic-ai
 
 from pydantic_ai.providers.openai import OpenAIProvider
 
+# Newer pydantic-ai releases build OpenAI clients on ``httpx2``; older ones only
+# accept a legacy ``httpx.AsyncClient``. Both expose the same client API.
+try:  # newer pydantic-ai
+    import httpx2 as _httpx
+except ImportError:  # older pydantic-ai
+    import httpx as _httpx
+
 import highlight.prompts as prompts
 from .config import get_settings
+from .llm_cache import ResponseCache, cache_key, get_response_cache
 
 T = TypeVar("T", bound=BaseModel)
 
@@ -66,6 +106,439 @@ def _build_model(config: LLMConfig):
     return _OpenAIModel(config.model, provider=provider)
 
 
+class _LRUPool:
+    """Thread-safe bounded LRU of pooled objects.
+
+    Pinned entries never count towards ``max_size`` and are only removed by
+    :meth:`evict_where`. ``on_evict`` is called (outside the lock) with each
+    evicted value.
+    """
+
+    def __init__(self, max_size: int, on_evict: Optional[Callable[[Any], None]] = None):
+        self.max_size = max(1, max_size)
+        self._on_evict = on_evict
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._pinned: dict[Hashable, Any] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any], *, pinned: bool = False):
+        evicted: list = []
+        with self._lock:
+            if key in self._pinned:
+                self._hits += 1
+                return self._pinned[key]
+            if key in self._entries:
+                self._hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self._misses += 1
+            value = factory()
+            if pinned:
+                self._pinned[key] = value
+            else:
+                self._entries[key] = value
+                while len(self._entries) > self.max_size:
+                    evicted.append(self._entries.popitem(last=False)[1])
+                    self._evictions += 1
+        self._notify(evicted)
+        return value
+
+    def evict_where(self, predicate: Callable[[Any], bool]) -> None:
+        """Evict every entry, pinned or not, whose value matches ``predicate``."""
+        evicted: list = []
+        with self._lock:
+            for entries in (self._pinned, self._entries):
+                for key in [key for key, value in entries.items() if predicate(value)]:
+                    evicted.append(entries.pop(key))
+            self._evictions += len(evicted)
+        self._notify(evicted)
+
+    def _notify(self, evicted: list) -> None:
+        if self._on_evict is not None:
+            for item in evicted:
+                self._on_evict(item)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "pinned": len(self._pinned),
+                "entries": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+            }
+
+
+class _PooledClient:
+    """One HTTP client and provider on one event loop, with its agents.
+
+    Agents (and their models) are built on the client's provider and are
+    pooled with it, so they are dropped together when the client leaves the
+    pool. Calls lease the client for their duration; a client evicted while
+    leased is closed only when its last call finishes.
+    """
+
+    def __init__(self, config: LLMConfig) -> None:
+        self.loop = asyncio.get_running_loop()
+        self.thread = threading.current_thread()
+        self.http_client = _new_http_client()
+        self.provider = OpenAIProvider(
+            base_url=config.base_url, api_key=config.api_key, http_client=self.http_client
+        )
+        self.model = _OpenAIModel(config.model, provider=self.provider)
+        self._agents: dict[tuple, Agent] = {}
+        self._lock = threading.Lock()
+        self._leases = 0
+        self._retired = False
+
+    def agent(self, output_type: Optional[type], system_prompt: str) -> Agent:
+        key = (output_type, system_prompt)
+        with self._lock:
+            agent = self._agents.get(key)
+            if agent is None:
+                if output_type is None:
+                    agent = Agent(self.model, system_prompt=system_prompt)
+                else:
+                    agent = Agent(
+                        self.model, output_type=output_type, system_prompt=system_prompt
+                    )
+                self._agents[key] = agent
+            return agent
+
+    def finished(self) -> bool:
+        """Whether the owning loop can no longer run (closed, or its thread exited)."""
+        return self.loop.is_closed() or not self.thread.is_alive()
+
+    def acquire(self) -> bool:
+        """Lease the client for one call; ``False`` once it has been retired."""
+        with self._lock:
+            if self._retired:
+                return False
+            self._leases += 1
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            self._leases -= 1
+            idle = self._retired and self._leases == 0
+        if idle:
+            self._close()
+
+    def retire(self) -> None:
+        """Called on eviction: close now if idle, else after the last lease."""
+        with self._lock:
+            self._retired = True
+            idle = self._leases == 0
+        if idle:
+            self._close()
+
+    def _close(self) -> None:
+        """Close the HTTP client on the loop that owns it."""
+        loop, http_client = self.loop, self.http_client
+        if loop.is_closed():
+            return
+        if loop.is_running():
+            loop.call_soon_threadsafe(lambda: loop.create_task(http_client.aclose()))
+        # An idle per-thread loop cannot be driven from here; the client's
+        # connections are released when it is garbage collected.
+
+
+_settings = get_settings()
+_clients = _LRUPool(_settings.llm_pool_max_size, on_evict=_PooledClient.retire)
+
+
+def _new_http_client():
+    settings = get_settings()
+    return _httpx.AsyncClient(
+        limits=_httpx.Limits(
+            max_connections=settings.llm_max_connections,
+            max_keepalive_connections=settings.llm_max_keepalive_connections,
+            keepalive_expiry=settings.llm_keepalive_expiry_seconds,
+        ),
+        # Mirror the OpenAI SDK defaults: long reads, short connects.
+        timeout=_httpx.Timeout(600, connect=5),
+    )
+
+
+def _is_default(config: LLMConfig) -> bool:
+    """Whether ``config`` is the ``.env`` configuration (pinned in the pool)."""
+    return config == resolve_config()
+
+
+@contextmanager
+def _leased_agent(
+    config: LLMConfig, output_type: Optional[type], system_prompt: str
+) -> Iterator[Agent]:
+    """Lease the pooled agent for ``config`` on the running event loop.
+
+    HTTP connections belong to the loop that opened them, so clients are
+    pooled per loop; those of loops that have finished are evicted, pinned
+    or not, so short-lived loops and threads do not accumulate clients.
+    """
+    loop = asyncio.get_running_loop()
+    _clients.evict_where(_PooledClient.finished)
+    while True:
+        client = _clients.get_or_create(
+            (loop, config), lambda: _PooledClient(config), pinned=_is_default(config)
+        )
+        # A client evicted between the lookup and the lease is skipped.
+        if client.acquire():
+            break
+    try:
+        yield client.agent(output_type, system_prompt)
+    finally:
+        client.release()
+
+
+_thread_state = threading.local()
+
+
+def _thread_loop() -> asyncio.AbstractEventLoop:
+    """Return this thread's long-lived event loop for the synchronous API.
+
+    Reusing one loop per thread (rather than a fresh loop per call) keeps the
+    pooled connections opened on it alive between calls.
+    """
+    loop = getattr(_thread_state, "loop", None)
+    if loop is None or loop.is_closed():
+        loop = asyncio.new_event_loop()
+        _thread_state.loop = loop
+    return loop
+
+
+class _CallLimiter:
+    """Cap concurrent upstream calls per event loop and count them."""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = max(1, limit)
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._in_flight = 0
+        self._peak_in_flight = 0
+        self._completed = 0
+        self._failed = 0
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphore = self._semaphores.get(loop)
+            if semaphore is None:
+                semaphore = asyncio.Semaphore(self.limit)
+                self._semaphores[loop] = semaphore
+            return semaphore
+
+    def _count(self, **deltas: int) -> None:
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self, f"_{name}", getattr(self, f"_{name}") + delta)
+            self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one upstream-call slot for the duration of the block."""
+        semaphore = self._semaphore()
+        self._count(waiting=1)
+        try:
+            await semaphore.acquire()
+        finally:
+            self._count(waiting=-1)
+        self._count(in_flight=1)
+        failed = 1
+        try:
+            yield
+            failed = 0
+        finally:
+            semaphore.release()
+            self._count(in_flight=-1, completed=1 - failed, failed=failed)
+
+    async def run(self, coro_factory: Callable[[], Any]):
+        async with self.slot():
+            return await coro_factory()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_concurrency": self.limit,
+                "in_flight": self._in_flight,
+                "waiting": self._waiting,
+                "peak_in_flight": self._peak_in_flight,
+                "completed": self._completed,
+                "failed": self._failed,
+            }
+
+
+_limiter = _CallLimiter(_settings.llm_max_concurrency)
+
+
+class _UsageTotals:
+    """Accumulate token usage reported by the upstream endpoint.
+
+    ``cache_read_tokens`` are input tokens the provider served from its prompt
+    cache; their share of ``input_tokens`` measures how well the prompt
+    layout (``PROMPT_LAYOUT``) reuses the shared document prefix.
+    """
+
+    _FIELDS = ("requests", "input_tokens", "cache_read_tokens", "output_tokens")
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._totals = dict.fromkeys(self._FIELDS, 0)
+
+    def record(self, result: Any) -> None:
+        # ``usage`` is a method on older pydantic-ai results, a property on newer ones.
+        usage = result.usage
+        if callable(usage):
+            usage = usage()
+        with self._lock:
+            for name in self._FIELDS:
+                self._totals[name] += getattr(usage, name, 0) or 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            totals = dict(self._totals)
+        input_tokens = totals["input_tokens"]
+        totals["cache_read_ratio"] = (
+            round(totals["cache_read_tokens"] / input_tokens, 4) if input_tokens else 0.0
+        )
+        return totals
+
+
+_usage = _UsageTotals()
+
+
+def _type_name(output_type: Optional[type]) -> str:
+    if output_type is None:
+        return "text"
+    return f"{output_type.__module__}.{output_type.__qualname__}"
+
+
+async def _cache_lookup(
+    config: LLMConfig,
+    output_type: Optional[type],
+    system_prompt: str,
+    user_prompt: str,
+    use_cache: bool,
+) -> tuple[Optional[ResponseCache], Optional[str], Any]:
+    """Return ``(cache, key, output)``; ``output`` is ``None`` on a miss.
+
+    ``cache`` is ``None`` when caching is disabled or bypassed. Cached
+    structured outputs are re-validated, and dropped if the schema has moved on.
+    """
+    cache = get_response_cache() if use_cache else None
+    if cache is None:
+        return None, None, None
+    key = cache_key(
+        config.model, config.base_url, system_prompt, user_prompt, _type_name(output_type)
+    )
+    cached = await asyncio.to_thread(cache.get, key)
+    if cached is None or output_type is None:
+        return cache, key, cached
+    try:
+        return cache, key, output_type.model_validate_json(cached)
+    except ValidationError:
+        await asyncio.to_thread(cache.invalidate, key)
+        return cache, key, None
+
+
+async def _cache_store(
+    cache: Optional[ResponseCache], key: Optional[str], output_type: Optional[type], output
+) -> None:
+    if cache is None:
+        return
+    value = str(output) if output_type is None else output.model_dump_json()
+    await asyncio.to_thread(cache.put, key, _type_name(output_type), value)
+
+
+async def _run_agent(
+    config: LLMConfig,
+    output_type: Optional[type],
+    system_prompt: str,
+    user_prompt: str,
+    *,
+    use_cache: bool = True,
+):
+    cache, key, output = await _cache_lookup(
+        config, output_type, system_prompt, user_prompt, use_cache
+    )
+    if output is not None:
+        return output
+    with _leased_agent(config, output_type, system_prompt) as agent:
+        result = await _limiter.run(lambda: agent.run(user_prompt))
+    _usage.record(result)
+    await _cache_store(cache, key, output_type, result.output)
+    return result.output
+
+
+async def agenerate_text(
+    user_prompt: str,
+    *,
+    api_key: Optional[str] = None,
+    base_url: Optional[str] = None,
+    model: Optional[str] = None,
+    system_prompt: str = prompts.SYSTEM_SCOPE,
+    use_cache: bool = True,
+) -> str:
+    """Async counterpart of :func:`generate_text`."""
+    config = resolve_config(api_key, base_url, model)
+    output = await _run_agent(config, None, system_prompt, user_prompt, use_cache=use_cache)
+    return str(output).strip()
+
+
+async def agenerate_structured(
+    user_prompt: str,
+    output_type: Type[T],
+    *,
+    api_key: Optional[str] = None,
+    base_url: Optional[str] = None,
+    model: Optional[str] = None,
+    system_prompt: str = prompts.SYSTEM_SCOPE,
+    use_cache: bool = True,
+) -> T:
+    """Async counterpart of :func:`generate_structured`."""
+    config = resolve_config(api_key, base_url, model)
+    return await _run_agent(
+        config, output_type, system_prompt, user_prompt, use_cache=use_cache
+    )
+
+
+async def astream_text(
+    user_prompt: str,
+    *,
+    api_key: Optional[str] = None,
+    base_url: Optional[str] = None,
+    model: Optional[str] = None,
+    system_prompt: str = prompts.SYSTEM_SCOPE,
+    use_cache: bool = True,
+) -> AsyncIterator[str]:
+    """Stream a free-form text response for ``user_prompt`` as text deltas.
+
+    A cached response is yielded as a single delta.
+    """
+    config = resolve_config(api_key, base_url, model)
+    cache, key, cached = await _cache_lookup(config, None, system_prompt, user_prompt, use_cache)
+    if cached is not None:
+        yield cached
+        return
+    parts: list[str] = []
+    with _leased_agent(config, None, system_prompt) as agent:
+        async with _limiter.slot():
+            async with agent.run_stream(user_prompt) as result:
+                # No debouncing: forward each chunk so the first token arrives ASAP.
+                async for delta in result.stream_text(delta=True, debounce_by=None):
+                    parts.append(delta)
+                    yield delta
+            _usage.record(result)
+    # Only a stream that ran to completion is cached.
+    await _cache_store(cache, key, None, "".join(parts))
+
+
 def generate_text(
     user_prompt: str,
     *,
@@ -73,15 +546,19 @@ def generate_text(
     base_url: Optional[str] = None,
     model: Optional[str] = None,
     system_prompt: str = prompts.SYSTEM_SCOPE,
+    use_cache: bool = True,
 ) -> str:
     """Generate a free-form text response for ``user_prompt``."""
-    config = resolve_config(api_key, base_url, model)
-    agent: Agent[None, str] = Agent(
-        _build_model(config),
-        system_prompt=system_prompt,
+    return _thread_loop().run_until_complete(
+        agenerate_text(
+            user_prompt,
+            api_key=api_key,
+            base_url=base_url,
+            model=model,
+            system_prompt=system_prompt,
+            use_cache=use_cache,
+        )
     )
-    result = agent.run_sync(user_prompt)
-    return str(result.output).strip()
 
 
 def generate_structured(
@@ -92,16 +569,29 @@ def generate_structured(
     base_url: Optional[str] = None,
     model: Optional[str] = None,
     system_prompt: str = prompts.SYSTEM_SCOPE,
+    use_cache: bool = True,
 ) -> T:
     """Generate a typed structured response validated against ``output_type``."""
-    config = resolve_config(api_key, base_url, model)
-    agent: Agent[None, T] = Agent(
-        _build_model(config),
-        output_type=output_type,
-        system_prompt=system_prompt,
+    return _thread_loop().run_until_complete(
+        agenerate_structured(
+            user_prompt,
+            output_type,
+            api_key=api_key,
+            base_url=base_url,
+            model=model,
+            system_prompt=system_prompt,
+            use_cache=use_cache,
+        )
     )
-    result = agent.run_sync(user_prompt)
-    return result.output
+
+
+def pool_stats() -> dict:
+    """Return counters for the LLM client pools, upstream calls and token usage."""
+    return {
+        "clients": _clients.stats(),
+        "calls": _limiter.stats(),
+        "usage": _usage.stats(),
+    }
 
 
 def verify_credentials(
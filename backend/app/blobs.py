@@ -0,0 +1,115 @@
+"""File-backed, content-addressed blob store.
+
+Large payloads (raw PDF bytes, extracted document text) are written once per
+digest under a shared directory instead of into database rows, so every
+uvicorn worker process can read them without copying them through SQLite.
+"""
+
+from __future__ import annotations
+
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Iterable, Optional
+
+
+class StagedBlob:
+    """A blob written incrementally, invisible to readers until committed."""
+
+    def __init__(self, target: Path) -> None:
+        self.target = target
+        self.size = 0
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, self._tmp_name = tempfile.mkstemp(dir=target.parent, suffix=".tmp")
+        self._handle = os.fdopen(fd, "wb")
+
+    def write(self, data: bytes) -> None:
+        self._handle.write(data)
+        self.size += len(data)
+
+    def commit(self) -> None:
+        """Atomically publish the blob, replacing any previous version."""
+        self._handle.close()
+        os.replace(self._tmp_name, self.target)
+
+    def discard(self) -> None:
+        self._handle.close()
+        Path(self._tmp_name).unlink(missing_ok=True)
+
+
+class BlobStore:
+    """Store immutable blobs at ``<root>/<digest[:2]>/<digest>.<suffix>``.
+
+    Directories are created on first write, so an unused store leaves no
+    trace on disk.
+    """
+
+    def __init__(self, root: str | os.PathLike) -> None:
+        self.root = Path(root)
+
+    def path(self, digest: str, suffix: str) -> Path:
+        return self.root / digest[:2] / f"{digest}.{suffix}"
+
+    def exists(self, digest: str, suffix: str) -> bool:
+        return self.path(digest, suffix).exists()
+
+    def put(self, digest: str, suffix: str, data: bytes) -> None:
+        """Write ``data`` atomically; a blob that already exists is left alone.
+
+        An existing blob's modification time is refreshed instead, so a
+        concurrent :meth:`prune` treats it as just written rather than
+        deleting it before the new reference is recorded.
+        """
+        try:
+            os.utime(self.path(digest, suffix))
+            return
+        except FileNotFoundError:
+            pass
+        staged = self.stage(digest, suffix)
+        try:
+            staged.write(data)
+            staged.commit()
+        except BaseException:
+            staged.discard()
+            raise
+
+    def stage(self, digest: str, suffix: str) -> StagedBlob:
+        """Start writing a blob; call ``commit()`` or ``discard()`` when done."""
+        return StagedBlob(self.path(digest, suffix))
+
+    def get(self, digest: str, suffix: str) -> Optional[bytes]:
+        try:
+            return self.path(digest, suffix).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def prune(self, keep: Iterable[str], older_than_seconds: float) -> int:
+        """Delete blobs whose digest is not in ``keep`` and which are stale.
+
+        The age guard protects blobs another worker has just written but not
+        yet referenced. Returns the number of files removed.
+        """
+        keep = set(keep)
+        cutoff = time.time() - older_than_seconds
+        removed = 0
+        for blob in self.root.glob("*/*.*"):
+            digest = blob.name.split(".", 1)[0]
+            if digest in keep or blob.suffix == ".tmp":
+                continue
+            try:
+                if blob.stat().st_mtime < cutoff:
+                    blob.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                continue
+        return removed
+
+    def total_bytes(self) -> int:
+        total = 0
+        for blob in self.root.glob("*/*.*"):
+            try:
+                total += blob.stat().st_size
+            except FileNotFoundError:
+                continue
+        return total
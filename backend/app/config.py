@@ -20,12 +20,138 @@ class Settings(BaseSettings):
     openai_embedding_model: str = "text-embedding-3-large-project"
     openai_base_url: str = "https://ai-incubator-api.pnnl.gov"
 
+    # Pooled LLM clients: maximum pooled providers/models/agents for
+    # user-supplied credentials (the .env credentials are always kept), and
+    # the keep-alive connection limits of each provider's HTTP client.
+    llm_pool_max_size: int = 32
+    llm_max_connections: int = 100
+    llm_max_keepalive_connections: int = 20
+    llm_keepalive_expiry_seconds: float = 60.0
+    # Maximum concurrent upstream LLM calls per event loop; extra calls wait.
+    llm_max_concurrency: int = 64
+
+    # Shared outbound HTTP client (Wikimedia search, image proxy, export
+    # image fetches): pooled connection limits, the cap on concurrent
+    # requests to any one host, and the per-request timeout.
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry_seconds: float = 30.0
+    http_max_connections_per_host: int = 16
+    http_timeout_seconds: float = 30.0
+
+    # Image proxy disk cache: directory shared by all workers, total byte
+    # budget (least recently served entries are deleted beyond it), and the
+    # largest single response that is written through to disk. Uncached
+    # bodies are read up to the read-ahead ahead of the browser, so the
+    # upstream host's request slot is released once they have been read.
+    proxy_cache_dir: str = "paige-proxy-cache"
+    proxy_cache_max_bytes: int = 1024 * 1024 * 1024
+    proxy_cache_max_object_bytes: int = 50 * 1024 * 1024
+    proxy_read_ahead_bytes: int = 8 * 1024 * 1024
+
+    # Wikimedia Commons search cache: parsed results per (query, limit),
+    # fresh for the TTL and then served stale for up to the stale window
+    # while a background refresh runs.
+    wikimedia_cache_max_entries: int = 1024
+    wikimedia_cache_ttl_seconds: int = 60 * 60
+    wikimedia_cache_stale_seconds: int = 24 * 60 * 60
+    # Batch search: most queries accepted per request and how many of them
+    # are sent to Commons at once.
+    wikimedia_batch_max_queries: int = 10
+    wikimedia_batch_concurrency: int = 4
+
+    # Prompt layout: "inline" (document inside each task template) or
+    # "prefix" (document first, then the task) so the ~12 prompts for a paper
+    # share a leading block the upstream provider can serve from its cache.
+    prompt_layout: str = "inline"
+
+    # Persistent LLM response cache (opt-in): SQLite file shared by all
+    # workers, entry lifetime, and the row cap beyond which the least
+    # recently used responses are dropped.
+    llm_cache_enabled: bool = False
+    llm_cache_path: str = "paige-llm-cache.sqlite3"
+    llm_cache_ttl_seconds: int = 7 * 24 * 60 * 60
+    llm_cache_max_entries: int = 10000
+
     # Shared unlock password (previously the per-project access keys).
     im3_access: str = "phase3"
 
     # Token ceiling used to warn users about oversized documents.
     max_allowable_tokens: int = 150000
 
+    # Upload ingestion pool: "thread" or "process" executor, the number of
+    # documents parsed concurrently, and the admitted backlog beyond which
+    # uploads are refused with 503.
+    ingest_pool_kind: str = "thread"
+    ingest_max_workers: int = 4
+    ingest_max_pending: int = 32
+
+    # Content-addressed cache of parsed uploads shared across sessions.
+    document_cache_max_entries: int = 64
+    document_cache_max_bytes: int = 512 * 1024 * 1024
+
+    # Longest side (pixels) of the PDF image previews in the image listing.
+    pdf_thumbnail_max_px: int = 192
+    # PDF image listing filters: images narrower/shorter than the minimum
+    # dimension or with a smaller encoded stream are skipped (logos, icons,
+    # glyphs), as are near-duplicates within the given perceptual-hash
+    # distance (negative disables the perceptual dedupe).
+    pdf_image_min_dimension: int = 100
+    pdf_image_min_bytes: int = 2048
+    pdf_image_dedupe_distance: int = 4
+    # Streamed PDF image listing: page shards of this many pages are scanned
+    # in parallel on a dedicated pool ("process" sidesteps the GIL while
+    # decoding thumbnails) of the given size and admitted backlog.
+    pdf_image_pages_per_shard: int = 8
+    image_pool_kind: str = "process"
+    image_max_workers: int = 4
+    image_max_pending: int = 64
+    # Vector figures captured as rendered page regions: on-disk PNG cache
+    # directory and its byte budget (least recently served renders are
+    # deleted beyond it), default render resolution, and the highest dpi a
+    # client may request (requests are snapped to a few fixed resolutions).
+    figure_render_dir: str = "paige-renders"
+    figure_render_max_bytes: int = 256 * 1024 * 1024
+    figure_render_dpi: int = 200
+    figure_render_max_dpi: int = 600
+
+    # Images embedded in DOCX/PPTX exports are downscaled to the
+    # placeholder's physical size at this resolution and re-encoded (JPEG
+    # quality for photographs); prepared variants are cached in memory up to
+    # the byte budget.
+    export_image_dpi: int = 150
+    export_image_jpeg_quality: int = 85
+    export_image_cache_max_bytes: int = 128 * 1024 * 1024
+    # Export rendering pool: "process" keeps docxtpl/python-pptx work from
+    # contending for the API's GIL; renders run concurrently, the admitted
+    # backlog beyond which exports are refused with 503, and the time limit
+    # after which a waiting export fails with 504.
+    export_pool_kind: str = "process"
+    export_max_workers: int = 2
+    export_max_pending: int = 16
+    export_timeout_seconds: float = 60.0
+    # Batch export: most documents per ZIP archive and how many are rendered
+    # (and held in memory) at once.
+    export_batch_max_items: int = 200
+    export_batch_concurrency: int = 4
+    # Rendered exports kept in memory by content hash (and served as 304 to
+    # a matching If-None-Match); 0 entries disables the cache.
+    export_cache_max_entries: int = 128
+    export_cache_max_bytes: int = 256 * 1024 * 1024
+
+    # Session backend: "memory" (single worker) or "sqlite" (shared by all
+    # uvicorn workers; document blobs are stored as files under the blob dir).
+    session_backend: str = "memory"
+    session_db_path: str = "paige-sessions.sqlite3"
+    session_blob_dir: str = "paige-blobs"
+
+    # Session lifetime: idle expiry, the byte budget across all sessions'
+    # documents (in-memory backend; LRU eviction beyond it), and the
+    # background sweep period.
+    session_idle_ttl_seconds: int = 4 * 60 * 60
+    session_max_bytes: int = 1024 * 1024 * 1024
+    session_sweep_interval_seconds: int = 60
+
     # CORS: comma-separated list of allowed origins for the SPA.
     # Empty string means "allow all" (useful behind a same-origin Nginx proxy).
     cors_allow_origins: str = ""
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import asyncio
+
 from fastapi import HTTPException, status
 
 from .session import Session, store
@@ -35,6 +37,15 @@ def require_session(session_id: str) -> Session:
     return session
 
 
+async def arequire_session(session_id: str) -> Session:
+    """:func:`require_session` off the event loop.
+
+    The SQLite backend queries its database and may read document blobs
+    from disk.
+    """
+    return await asyncio.to_thread(require_session, session_id)
+
+
 def require_content(session: Session) -> str:
     """Ensure a document has been uploaded for the session."""
     if not session.content:
@@ -43,3 +54,13 @@ def require_content(session: Session) -> str:
             detail="No document uploaded for this session.",
         )
     return session.content
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Whether an ``If-None-Match`` header matches ``etag`` (weakly)."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(
+        tag.removeprefix("W/") == etag for tag in candidates
+    )
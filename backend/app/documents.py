@@ -0,0 +1,207 @@
+"""Content-addressed cache of parsed documents.
+
+Uploads are keyed by the SHA-256 of their raw bytes, so the same PDF uploaded
+again (by the same user or anyone else) skips text extraction, token counting
+and image extraction entirely. Sessions hold a reference to the shared,
+immutable :class:`Document` rather than their own copy of the content.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Mapping, Optional, Tuple
+
+import highlight as hlt
+from .config import get_settings
+from .ingest import PDF, ingest_pool, parse_document
+
+
+def digest_bytes(raw: bytes) -> str:
+    """Return the hex SHA-256 digest identifying ``raw``."""
+    return hashlib.sha256(raw).hexdigest()
+
+
+@dataclass(frozen=True)
+class Document:
+    """A parsed upload shared by every session that uploaded the same bytes."""
+
+    digest: str
+    kind: str
+    content: str
+    # n_pages / n_characters / n_words / n_tokens as returned by the parser.
+    stats: Mapping[str, int]
+    # Raw PDF bytes retained for image extraction (``None`` for text uploads).
+    pdf_bytes: Optional[bytes] = None
+    _memo: dict = field(default_factory=dict, init=False, repr=False, compare=False)
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False, compare=False
+    )
+
+    @classmethod
+    def from_parsed(
+        cls, digest: str, kind: str, parsed: dict, pdf_bytes: Optional[bytes]
+    ) -> "Document":
+        stats = {key: value for key, value in parsed.items() if key != "content"}
+        return cls(
+            digest=digest,
+            kind=kind,
+            content=parsed["content"],
+            stats=MappingProxyType(stats),
+            pdf_bytes=pdf_bytes,
+        )
+
+    def image_index(self) -> Optional[hlt.PdfImageIndex]:
+        """Index of the embedded PDF images, built once on first use.
+
+        Shared by the image listing and the exports; image bytes are extracted
+        lazily per xref. ``None`` for text uploads.
+        """
+        if not self.pdf_bytes:
+            return None
+        with self._lock:
+            if "image_index" not in self._memo:
+                self._memo["image_index"] = hlt.PdfImageIndex(self.pdf_bytes)
+            return self._memo["image_index"]
+
+    def figure_regions(self) -> Tuple[hlt.FigureRegion, ...]:
+        """Captioned figure regions of the PDF, located once on first use.
+
+        Detection is run outside the lock so a slow layout scan does not block
+        image lookups; a concurrent duplicate scan just loses the race.
+        Empty for text uploads.
+        """
+        if not self.pdf_bytes:
+            return ()
+        regions = self._memo.get("figure_regions")
+        if regions is None:
+            regions = tuple(hlt.find_figure_regions(self.pdf_bytes))
+            with self._lock:
+                regions = self._memo.setdefault("figure_regions", regions)
+        return regions
+
+    def pdf_path(self) -> Optional[str]:
+        """Path of a private temporary copy of the PDF, written on first use.
+
+        Lets worker processes open the document themselves instead of being
+        sent its bytes. The file is removed when the document is collected.
+        """
+        if not self.pdf_bytes:
+            return None
+        with self._lock:
+            path = self._memo.get("pdf_path")
+            if path is None or not os.path.exists(path):
+                fd, path = tempfile.mkstemp(prefix=f"paige-{self.digest[:16]}-", suffix=".pdf")
+                with os.fdopen(fd, "wb") as handle:
+                    handle.write(self.pdf_bytes)
+                weakref.finalize(self, _remove_file, path)
+                self._memo["pdf_path"] = path
+            return path
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the document, including extracted images."""
+        size = sys.getsizeof(self.content) + len(self.pdf_bytes or b"")
+        image_index = self._memo.get("image_index")
+        if image_index is not None:
+            size += image_index.nbytes
+        return size
+
+
+def _remove_file(path: str) -> None:
+    with contextlib.suppress(OSError):
+        os.remove(path)
+
+
+class DocumentCache:
+    """Thread-safe LRU of parsed documents bounded by entry count and bytes."""
+
+    def __init__(self, *, max_entries: int, max_bytes: int) -> None:
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max_bytes
+        self._documents: "OrderedDict[Tuple[str, str], Document]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, digest: str, kind: str) -> Optional[Document]:
+        with self._lock:
+            document = self._documents.get((digest, kind))
+            if document is not None:
+                self._documents.move_to_end((digest, kind))
+                # Documents grow as their images are extracted, so the byte
+                # budget is re-checked on use as well as on insert.
+                self._evict_locked()
+            return document
+
+    def put(self, document: Document) -> Document:
+        """Insert ``document``; return the already-cached copy if one exists."""
+        key = (document.digest, document.kind)
+        with self._lock:
+            existing = self._documents.get(key)
+            if existing is not None:
+                self._documents.move_to_end(key)
+                return existing
+            self._documents[key] = document
+            self._evict_locked()
+        return document
+
+    def _evict_locked(self) -> None:
+        total = sum(doc.nbytes for doc in self._documents.values())
+        while len(self._documents) > 1 and (
+            len(self._documents) > self.max_entries or total > self.max_bytes
+        ):
+            _, evicted = self._documents.popitem(last=False)
+            total -= evicted.nbytes
+            self._evictions += 1
+
+    async def load(self, raw: bytes, kind: str) -> Document:
+        """Return the parsed document for ``raw``, parsing it only on a miss.
+
+        Parsing runs on the ingest pool; :class:`~app.workers.PoolBusyError`
+        propagates to the caller when the pool's backlog is full.
+        """
+        digest = await asyncio.to_thread(digest_bytes, raw)
+        document = self.get(digest, kind)
+        if document is not None:
+            with self._lock:
+                self._hits += 1
+            return document
+
+        with self._lock:
+            self._misses += 1
+        parsed = await ingest_pool.run(parse_document, raw, kind)
+        return self.put(
+            Document.from_parsed(digest, kind, parsed, raw if kind == PDF else None)
+        )
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._documents),
+                "bytes": sum(doc.nbytes for doc in self._documents.values()),
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+            }
+
+
+_settings = get_settings()
+
+# Module-level singleton
+document_cache = DocumentCache(
+    max_entries=_settings.document_cache_max_entries,
+    max_bytes=_settings.document_cache_max_bytes,
+)
@@ -0,0 +1,126 @@
+"""Rendered exports cached by a hash of everything that determines them.
+
+A DOCX/PPTX export is fully determined by its request payload (apart from
+the session id), the template it fills and the image it embeds. The key
+hashes the normalised payload, the template's content hash and the image
+source -- the Commons URL, or the PDF's digest plus the figure selector --
+so a repeat export is answered without fetching or preparing the image and
+without rendering. The key also serves as the response's ETag.
+
+Entries are kept in a byte-bounded LRU in each worker process. Keys of
+complete renders are remembered for longer than their bytes, so a client's
+copy can still be revalidated after the document itself was evicted (or was
+too large to keep); an incomplete render's key is never remembered.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from .config import get_settings
+
+
+def export_key(template: str, payload: dict, template_version: str, image_source: str) -> str:
+    """Content hash identifying one rendered export."""
+    canonical = json.dumps(
+        {
+            "template": template,
+            "template_version": template_version,
+            "image_source": hashlib.sha256(image_source.encode("utf-8")).hexdigest(),
+            "payload": payload,
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def export_etag(key: str) -> str:
+    return f'"{key[:32]}"'
+
+
+# Complete-render keys remembered per cached export.
+_KNOWN_KEYS_PER_ENTRY = 16
+
+
+class ExportCache:
+    """Thread-safe LRU of rendered exports bounded by entries and total bytes."""
+
+    def __init__(self, *, max_entries: int, max_bytes: int) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._exports: "OrderedDict[str, bytes]" = OrderedDict()
+        self._known: "OrderedDict[str, None]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._not_modified = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._exports.get(key)
+            if data is None:
+                self._misses += 1
+                return None
+            self._exports.move_to_end(key)
+            self._hits += 1
+            return data
+
+    def known(self, key: str) -> bool:
+        """Whether ``key`` was rendered completely, so its ETag may be revalidated."""
+        with self._lock:
+            return key in self._exports or key in self._known
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store a complete render and remember its key."""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._known[key] = None
+            self._known.move_to_end(key)
+            while len(self._known) > self.max_entries * _KNOWN_KEYS_PER_ENTRY:
+                self._known.popitem(last=False)
+            if key in self._exports or len(data) > self.max_bytes:
+                return
+            self._exports[key] = data
+            self._bytes += len(data)
+            while len(self._exports) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._exports.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def record_not_modified(self) -> None:
+        with self._lock:
+            self._not_modified += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._exports.clear()
+            self._known.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._exports),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "not_modified": self._not_modified,
+            }
+
+
+_settings = get_settings()
+
+# Module-level singleton
+export_cache = ExportCache(
+    max_entries=_settings.export_cache_max_entries,
+    max_bytes=_settings.export_cache_max_bytes,
+)
@@ -0,0 +1,261 @@
+"""Office export rendering on a bounded worker pool.
+
+Filling the Word template (docxtpl: Jinja plus lxml) and assembling the
+PowerPoint slide (python-pptx) are CPU-bound, so exports rendered on the
+API's threads contend for the GIL with each other and with every other
+request. Routes gather the inputs -- a plain context dict and the prepared
+image bytes -- and :func:`arender` runs the job on :data:`export_pool` (a
+process pool by default), returning the finished file's bytes. Each worker
+process keeps its own parsed :data:`~app.export_templates.export_templates`.
+
+Module-level functions with picklable arguments, so they can run in a
+process pool.
+"""
+
+from __future__ import annotations
+
+import copy
+import io
+from typing import List, Optional
+
+from docx.shared import Mm
+from docxtpl import InlineImage
+from pptx.enum.text import PP_ALIGN
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.oxml.ns import qn
+from pptx.util import Pt
+
+from .config import get_settings
+from .export_templates import export_templates
+from .workers import WorkerPool
+
+DOCX = "docx"
+PPTX = "pptx"
+
+# Width of the editorial photo in the Word template.
+DOCX_PHOTO_WIDTH_MM = 120
+# Shape that receives the figure on the PowerPoint slide.
+PICTURE_PLACEHOLDER = "Picture Placeholder 2"
+
+_R_NAMESPACE = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+
+
+def render_docx(context: dict, photo: Optional[bytes] = None) -> bytes:
+    """Fill the Word template with ``context`` and the editorial ``photo``."""
+    template = export_templates.docx()
+    context = {**context, "photo": None}
+    if photo:
+        context["photo"] = InlineImage(
+            template, io.BytesIO(photo), width=Mm(DOCX_PHOTO_WIDTH_MM)
+        )
+    template.render(context)
+    bio = io.BytesIO()
+    template.save(bio)
+    return bio.getvalue()
+
+
+def render_pptx(content: dict, picture: Optional[bytes] = None) -> bytes:
+    """Fill the PowerPoint template's slide with ``content`` and ``picture``.
+
+    ``content`` holds ``title``, ``objective``, ``figure_caption``,
+    ``citation``, ``approach_points`` and ``impact_points``.
+    """
+    prs = export_templates.pptx()
+    for slide in prs.slides:
+        _fill_slide(slide, content, picture)
+
+    ppt_io = io.BytesIO()
+    prs.save(ppt_io)
+    return ppt_io.getvalue()
+
+
+def render_deck(contents: List[dict], pictures: List[Optional[bytes]]) -> bytes:
+    """Build one presentation with a filled copy of the template slide per paper.
+
+    ``contents[i]`` and ``pictures[i]`` fill slide ``i`` as in
+    :func:`render_pptx`. The template's slide is cloned before any is filled,
+    and a picture shared by several slides is stored in the package once.
+    """
+    if not contents or len(contents) != len(pictures):
+        raise ValueError("A deck needs one picture entry per slide content.")
+    prs = export_templates.pptx()
+    template_slide = prs.slides[0]
+    slides = [template_slide]
+    slides += [_clone_slide(prs, template_slide) for _ in contents[1:]]
+    for slide, content, picture in zip(slides, contents, pictures):
+        _fill_slide(slide, content, picture)
+
+    ppt_io = io.BytesIO()
+    prs.save(ppt_io)
+    return ppt_io.getvalue()
+
+
+_RENDERERS = {DOCX: render_docx, PPTX: render_pptx}
+
+
+def render(template: str, context: dict, image: Optional[bytes] = None) -> bytes:
+    """Render the ``"docx"`` or ``"pptx"`` template; returns the file's bytes."""
+    try:
+        renderer = _RENDERERS[template]
+    except KeyError:
+        raise ValueError(f"Unknown export template '{template}'.") from None
+    return renderer(context, image)
+
+
+async def arender(template: str, context: dict, image: Optional[bytes] = None) -> bytes:
+    """Run :func:`render` on the export pool.
+
+    Raises :class:`~app.workers.PoolBusyError` when the pool's backlog is
+    full and :class:`~app.workers.PoolTimeoutError` when the render takes
+    longer than ``export_timeout_seconds``.
+    """
+    return await export_pool.run(render, template, context, image)
+
+
+async def arender_deck(contents: List[dict], pictures: List[Optional[bytes]]) -> bytes:
+    """Run :func:`render_deck` on the export pool, raising as :func:`arender`."""
+    return await export_pool.run(render_deck, contents, pictures)
+
+
+def _fill_slide(slide, content: dict, picture: Optional[bytes]) -> None:
+    approach_points = content.get("approach_points") or ["Approach not generated."]
+    impact_points = content.get("impact_points") or ["Impact points not generated."]
+
+    impact_ph = _get_placeholder(slide, "Text Placeholder 10")
+    approach_ph = _get_placeholder(slide, "Text Placeholder 9")
+    picture_ph = _get_placeholder(slide, PICTURE_PLACEHOLDER)
+    caption_ph = _get_placeholder(slide, "Text Placeholder 3")
+    citation_ph = _get_placeholder(slide, "Text Placeholder 11")
+    objective_ph = _get_placeholder(slide, "Text Placeholder 8")
+    title_ph = _get_placeholder(slide, "Title 1")
+
+    for ph in (
+        title_ph,
+        objective_ph,
+        caption_ph,
+        citation_ph,
+        approach_ph,
+        impact_ph,
+        picture_ph,
+    ):
+        _remove_placeholder_outline(ph)
+
+    for ph, key in (
+        (title_ph, "title"),
+        (objective_ph, "objective"),
+        (caption_ph, "figure_caption"),
+        (citation_ph, "citation"),
+    ):
+        if ph is not None:
+            ph.text_frame.clear()
+            ph.text_frame.text = content.get(key) or ""
+
+    _populate_bullets(approach_ph, approach_points)
+    _populate_bullets(impact_ph, impact_points)
+
+    if picture_ph is not None and picture:
+        try:
+            picture_ph.insert_picture(io.BytesIO(picture))
+        except Exception:  # noqa: BLE001 - leave placeholder if insert fails
+            pass
+
+
+def _clone_slide(prs, source):
+    """Append a copy of ``source``: same layout, background, shapes and links.
+
+    python-pptx has no slide copy, so the shape tree is deep-copied into a
+    new slide on the same layout and the relationship ids the shapes refer
+    to (pictures, media, hyperlinks) are re-created on the new slide.
+    """
+    slide = prs.slides.add_slide(source.slide_layout)
+    rids = {}
+    for rid, rel in source.part.rels.items():
+        if rel.reltype in (RT.SLIDE_LAYOUT, RT.NOTES_SLIDE):
+            continue
+        if rel.is_external:
+            rids[rid] = slide.part.relate_to(rel.target_ref, rel.reltype, is_external=True)
+        else:
+            rids[rid] = slide.part.relate_to(rel.target_part, rel.reltype)
+
+    # The new slide's shapes proxy holds its spTree, so the element is kept
+    # and only its shapes are replaced.
+    tree = slide.shapes._spTree
+    for shape in list(tree.iterchildren()):
+        if shape.tag not in (qn("p:nvGrpSpPr"), qn("p:grpSpPr")):
+            tree.remove(shape)
+    for shape in source.shapes._spTree.iterchildren():
+        if shape.tag not in (qn("p:nvGrpSpPr"), qn("p:grpSpPr")):
+            tree.append(copy.deepcopy(shape))
+    background = source._element.cSld.find(qn("p:bg"))
+    if background is not None:
+        slide._element.cSld.insert(0, copy.deepcopy(background))
+
+    for element in tree.iter():
+        for name, value in element.attrib.items():
+            if name.startswith(_R_NAMESPACE) and value in rids:
+                element.set(name, rids[value])
+    return slide
+
+
+def _get_placeholder(slide, name):
+    for shape in slide.placeholders:
+        if shape.name == name:
+            return shape
+    for shape in slide.shapes:
+        if shape.name == name:
+            return shape
+    return None
+
+
+def _remove_placeholder_outline(placeholder) -> None:
+    """Force a placeholder's outline to 'no line'.
+
+    PowerPoint renders a default dashed/dotted border around placeholders that
+    do not explicitly declare a line style. Inserting an ``<a:ln><a:noFill/>``
+    element on the shape properties suppresses that border.
+    """
+    if placeholder is None:
+        return
+    try:
+        sp_pr = placeholder._element.spPr
+    except AttributeError:
+        return
+    if sp_pr is None:
+        return
+
+    # Remove any existing line definition so we can set a clean 'no fill'.
+    for existing in sp_pr.findall(qn("a:ln")):
+        sp_pr.remove(existing)
+
+    ln = sp_pr.makeelement(qn("a:ln"), {})
+    ln.append(sp_pr.makeelement(qn("a:noFill"), {}))
+    sp_pr.append(ln)
+
+
+def _populate_bullets(placeholder, points) -> None:
+    if placeholder is None or not hasattr(placeholder, "text_frame") or not points:
+        return
+    tf = placeholder.text_frame
+    tf.clear()
+    if len(tf.paragraphs):
+        first = tf.paragraphs[0]
+        if not first.text.strip() and len(first.runs) == 0:
+            first._element.getparent().remove(first._element)
+    for point_text in points[:3]:
+        para = tf.add_paragraph()
+        para.text = point_text.strip().lstrip("- ")
+        para.level = 0
+        para.font.size = Pt(13)
+        para.alignment = PP_ALIGN.LEFT
+
+
+_settings = get_settings()
+
+# Module-level singleton
+export_pool = WorkerPool(
+    "export",
+    kind=_settings.export_pool_kind,
+    max_workers=_settings.export_max_workers,
+    max_pending=_settings.export_max_pending,
+    timeout=_settings.export_timeout_seconds,
+)
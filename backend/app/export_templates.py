@@ -0,0 +1,227 @@
+"""Parsed export templates, loaded once and cloned per export.
+
+Opening ``highlight_template.docx``/``.pptx`` means unzipping and parsing
+every part of the OOXML package, and docxtpl additionally regex-patches and
+Jinja-compiles the same XML on every render. The cache keeps the parsed
+package of each template and hands every export a deep copy of it; for Word
+documents the patched XML and the compiled Jinja templates are reused as
+well, since they depend only on the template.
+
+A template is reloaded when its file's modification time or size changes,
+so an edited template takes effect without restarting the server.
+"""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import importlib.resources
+import io
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional, Tuple
+
+import jinja2
+from docx import Document
+from docxtpl import DocxTemplate
+from pptx import Presentation
+
+DOCX_TEMPLATE = "highlight_template.docx"
+PPTX_TEMPLATE = "highlight_template.pptx"
+
+# Sources compiled per environment; a template has one per XML part.
+_MAX_COMPILED = 256
+
+
+class _CompilingEnvironment(jinja2.Environment):
+    """Jinja environment that compiles each distinct source string once."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._compiled: Dict[str, jinja2.Template] = {}
+        self._compiled_lock = threading.Lock()
+
+    def from_string(self, source, globals=None, template_class=None):
+        if globals is not None or template_class is not None or not isinstance(source, str):
+            return super().from_string(source, globals, template_class)
+        template = self._compiled.get(source)
+        if template is None:
+            template = super().from_string(source)
+            with self._compiled_lock:
+                if len(self._compiled) < _MAX_COMPILED:
+                    template = self._compiled.setdefault(source, template)
+        return template
+
+
+@dataclass
+class _ParsedDocx:
+    """A parsed Word template plus the render work that only depends on it."""
+
+    document: object
+    jinja_env: _CompilingEnvironment = field(default_factory=_CompilingEnvironment)
+    patched: Dict[str, str] = field(default_factory=dict)
+
+
+class _DocxTemplate(DocxTemplate):
+    """DocxTemplate rendering a cloned document with its template's caches."""
+
+    def __init__(self, data: bytes, parsed: _ParsedDocx, document) -> None:
+        # ``template_file`` is only re-read if the instance is saved unrendered.
+        super().__init__(io.BytesIO(data))
+        self.docx = document
+        self._parsed = parsed
+
+    def patch_xml(self, src_xml):
+        patched = self._parsed.patched.get(src_xml)
+        if patched is None:
+            patched = super().patch_xml(src_xml)
+            if len(self._parsed.patched) < _MAX_COMPILED:
+                self._parsed.patched[src_xml] = patched
+        return patched
+
+    def render(self, context, jinja_env=None, autoescape=False):
+        # docxtpl sets ``autoescape`` on the environment it is given, so the
+        # shared one is only used for the default, non-escaping render.
+        if jinja_env is None and not autoescape:
+            jinja_env = self._parsed.jinja_env
+        return super().render(context, jinja_env, autoescape)
+
+
+@dataclass
+class _Entry:
+    stamp: Optional[Tuple[int, int]]
+    data: bytes
+    parsed: object
+    digest: str
+    # Held while copying: lxml trees should not be read from several
+    # threads at once.
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+def _stamp(path) -> Optional[Tuple[int, int]]:
+    """(mtime_ns, size) of ``path``; ``None`` if it is not a file on disk."""
+    try:
+        st = os.stat(path)
+    except (OSError, TypeError):
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _read(path) -> bytes:
+    if isinstance(path, str):
+        with open(path, "rb") as handle:
+            return handle.read()
+    return path.read_bytes()
+
+
+def _parse_docx(data: bytes) -> _ParsedDocx:
+    return _ParsedDocx(Document(io.BytesIO(data)))
+
+
+@dataclass
+class _ParsedPptx:
+    """A parsed PowerPoint template and the sizes of its slide shapes."""
+
+    presentation: object
+    shape_sizes: Dict[str, Tuple[int, int]]
+
+
+def _parse_pptx(data: bytes) -> _ParsedPptx:
+    # python-pptx caches proxies on first access (``prs.slides``, a slide's
+    # shapes) that hold inner XML elements; lxml deep-copies those apart from
+    # the copied tree, so a clone of an inspected presentation would add
+    # slides to a detached list. Shapes are measured on a separate parse and
+    # the presentation that is cloned is never inspected.
+    sizes: Dict[str, Tuple[int, int]] = {}
+    for slide in Presentation(io.BytesIO(data)).slides:
+        for shape in slide.shapes:
+            sizes.setdefault(shape.name, (shape.width, shape.height))
+    return _ParsedPptx(Presentation(io.BytesIO(data)), sizes)
+
+
+_PARSERS = {DOCX_TEMPLATE: _parse_docx, PPTX_TEMPLATE: _parse_pptx}
+
+
+class TemplateCache:
+    """Thread-safe cache of parsed DOCX/PPTX templates.
+
+    Templates are read from ``root`` when given, otherwise from the packaged
+    ``highlight.data`` resources.
+    """
+
+    def __init__(self, root: Optional[str] = None) -> None:
+        self.root = root
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._loads = 0
+        self._reloads = 0
+
+    def _path(self, name: str):
+        if self.root is not None:
+            return os.path.join(self.root, name)
+        return importlib.resources.files("highlight.data").joinpath(name)
+
+    def _entry(self, name: str, parse: Callable[[bytes], object]) -> _Entry:
+        path = self._path(name)
+        stamp = _stamp(path)
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and (stamp is None or stamp == entry.stamp):
+                self._hits += 1
+                return entry
+
+        # Parsed outside the lock; a concurrent reload of the same file
+        # produces an equivalent entry.
+        data = _read(path)
+        fresh = _Entry(stamp, data, parse(data), hashlib.sha256(data).hexdigest())
+        with self._lock:
+            self._loads += 1
+            if entry is not None:
+                self._reloads += 1
+            self._entries[name] = fresh
+        return fresh
+
+    def docx(self) -> DocxTemplate:
+        """Return a fresh, renderable copy of the Word template."""
+        entry = self._entry(DOCX_TEMPLATE, _parse_docx)
+        with entry.lock:
+            document = copy.deepcopy(entry.parsed.document)
+        return _DocxTemplate(entry.data, entry.parsed, document)
+
+    def pptx(self):
+        """Return a fresh copy of the PowerPoint template ``Presentation``."""
+        entry = self._entry(PPTX_TEMPLATE, _parse_pptx)
+        with entry.lock:
+            return copy.deepcopy(entry.parsed.presentation)
+
+    def shape_size(self, name: str) -> Optional[Tuple[int, int]]:
+        """(width, height) in EMU of the PowerPoint template's shape ``name``."""
+        return self._entry(PPTX_TEMPLATE, _parse_pptx).parsed.shape_sizes.get(name)
+
+    def version(self, name: str) -> str:
+        """SHA-256 of the template file ``name`` as currently loaded."""
+        return self._entry(name, _PARSERS[name]).digest
+
+    def preload(self) -> None:
+        """Parse both templates now rather than on the first export."""
+        self._entry(DOCX_TEMPLATE, _parse_docx)
+        self._entry(PPTX_TEMPLATE, _parse_pptx)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "templates": sorted(self._entries),
+                "hits": self._hits,
+                "loads": self._loads,
+                "reloads": self._reloads,
+            }
+
+
+# Module-level singleton
+export_templates = TemplateCache()
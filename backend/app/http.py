@@ -0,0 +1,143 @@
+"""Shared pooled HTTP client for outbound requests.
+
+Wikimedia searches, the image proxy and export image fetches all go through
+one ``httpx.AsyncClient`` per event loop, so the thumbnails of an image grid
+reuse kept-alive TLS connections to ``upload.wikimedia.org`` instead of each
+paying for DNS, TCP and TLS setup. Concurrent requests to any single host are
+capped so one slow upstream cannot take every pooled connection.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import weakref
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict
+from urllib.parse import urlsplit
+
+import httpx
+
+from highlight.utils import USER_AGENT
+from .config import get_settings
+
+
+class _LoopClient:
+    """The client and per-host semaphores owned by one event loop."""
+
+    def __init__(self, client: httpx.AsyncClient) -> None:
+        self.client = client
+        self.hosts: Dict[str, asyncio.Semaphore] = {}
+
+
+class HttpClientPool:
+    """One pooled ``httpx.AsyncClient`` per event loop, with per-host limits.
+
+    The application lifespan closes the client on shutdown; outside it (e.g.
+    in tests) a client is created on first use.
+    """
+
+    def __init__(self) -> None:
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopClient]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._failed = 0
+        self._in_flight = 0
+        self._peak_in_flight = 0
+
+    def _loop_client(self) -> _LoopClient:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            state = self._clients.get(loop)
+            if state is None or state.client.is_closed:
+                state = _LoopClient(_new_client())
+                self._clients[loop] = state
+            return state
+
+    def client(self) -> httpx.AsyncClient:
+        """Return the pooled client of the running event loop."""
+        return self._loop_client().client
+
+    def _count(self, **deltas: int) -> None:
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self, f"_{name}", getattr(self, f"_{name}") + delta)
+            self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+
+    @asynccontextmanager
+    async def host_slot(self, url: str) -> AsyncIterator[httpx.AsyncClient]:
+        """Hold one of the host's request slots; yields the pooled client."""
+        state = self._loop_client()
+        host = urlsplit(url).netloc
+        semaphore = state.hosts.get(host)
+        if semaphore is None:
+            limit = max(1, get_settings().http_max_connections_per_host)
+            semaphore = state.hosts.setdefault(host, asyncio.Semaphore(limit))
+        async with semaphore:
+            self._count(requests=1, in_flight=1)
+            failed = 1
+            try:
+                yield state.client
+                failed = 0
+            finally:
+                self._count(in_flight=-1, failed=failed)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        """GET ``url`` on the pooled client and read the whole body.
+
+        Raises ``httpx.HTTPError`` (including ``HTTPStatusError`` for 4xx/5xx).
+        """
+        async with self.host_slot(url) as client:
+            response = await client.get(url, **kwargs)
+            response.raise_for_status()
+            return response
+
+    @asynccontextmanager
+    async def stream(self, url: str, **kwargs) -> AsyncIterator[httpx.Response]:
+        """GET ``url`` without reading the body; the host slot is held until exit.
+
+        Raises ``httpx.HTTPError`` (including ``HTTPStatusError`` for 4xx/5xx)
+        before yielding.
+        """
+        async with self.host_slot(url) as client:
+            async with client.stream("GET", url, **kwargs) as response:
+                response.raise_for_status()
+                yield response
+
+    async def aclose(self) -> None:
+        """Close the running loop's client (called on application shutdown)."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            state = self._clients.pop(loop, None)
+        if state is not None:
+            await state.client.aclose()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "clients": len(self._clients),
+                "requests": self._requests,
+                "failed": self._failed,
+                "in_flight": self._in_flight,
+                "peak_in_flight": self._peak_in_flight,
+            }
+
+
+def _new_client() -> httpx.AsyncClient:
+    settings = get_settings()
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry_seconds,
+        ),
+        timeout=httpx.Timeout(settings.http_timeout_seconds, connect=5),
+        headers={"User-Agent": USER_AGENT},
+        follow_redirects=True,
+    )
+
+
+# Module-level singleton
+http_pool = HttpClientPool()
@@ -0,0 +1,115 @@
+"""Export image preparation: downscale to the placeholder, cached per size.
+
+Full-resolution Commons originals and PDF images are resized to the physical
+size they occupy in the DOCX/PPTX at ``export_image_dpi`` and re-encoded
+with :func:`highlight.prepare_image` before being embedded. Prepared variants
+are kept in a byte-bounded LRU keyed by (source hash, target box), so
+re-exporting the same highlight does not decode and resample again.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import highlight as hlt
+from .config import get_settings
+
+EMU_PER_INCH = 914400
+MM_PER_INCH = 25.4
+
+_Key = Tuple[str, int, Optional[int], str]
+
+
+def emu_to_pixels(emu: int, dpi: int) -> int:
+    return max(1, round(emu / EMU_PER_INCH * dpi))
+
+
+def mm_to_pixels(mm: float, dpi: int) -> int:
+    return max(1, round(mm / MM_PER_INCH * dpi))
+
+
+class PreparedImageCache:
+    """Thread-safe LRU of prepared images bounded by total bytes."""
+
+    def __init__(self, *, max_bytes: int, dpi: int, jpeg_quality: int) -> None:
+        self.max_bytes = max_bytes
+        self.dpi = dpi
+        self.jpeg_quality = jpeg_quality
+        self._images: "OrderedDict[_Key, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._failures = 0
+        self._source_bytes = 0
+        self._prepared_bytes = 0
+
+    def prepare(
+        self,
+        data: bytes,
+        width: int,
+        height: Optional[int] = None,
+        fit: str = "contain",
+    ) -> io.BytesIO:
+        """Return ``data`` prepared for a ``width`` x ``height`` pixel box.
+
+        Images Pillow cannot decode are returned unchanged, leaving the
+        decision to python-docx / python-pptx as before.
+        """
+        key = (hashlib.sha256(data).hexdigest(), width, height, fit)
+        with self._lock:
+            prepared = self._images.get(key)
+            if prepared is not None:
+                self._images.move_to_end(key)
+                self._hits += 1
+                return io.BytesIO(prepared)
+            self._misses += 1
+
+        try:
+            prepared, _ = hlt.prepare_image(
+                data, width, height, fit=fit, jpeg_quality=self.jpeg_quality
+            )
+        except ValueError:
+            with self._lock:
+                self._failures += 1
+            return io.BytesIO(data)
+
+        with self._lock:
+            self._source_bytes += len(data)
+            self._prepared_bytes += len(prepared)
+            if key not in self._images and len(prepared) <= self.max_bytes:
+                self._images[key] = prepared
+                self._bytes += len(prepared)
+                while self._bytes > self.max_bytes:
+                    _, evicted = self._images.popitem(last=False)
+                    self._bytes -= len(evicted)
+        return io.BytesIO(prepared)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._images),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "dpi": self.dpi,
+                "hits": self._hits,
+                "misses": self._misses,
+                "failures": self._failures,
+                # Source vs prepared bytes over every miss: the size saving.
+                "source_bytes": self._source_bytes,
+                "prepared_bytes": self._prepared_bytes,
+            }
+
+
+_settings = get_settings()
+
+# Module-level singleton
+prepared_images = PreparedImageCache(
+    max_bytes=_settings.export_image_cache_max_bytes,
+    dpi=_settings.export_image_dpi,
+    jpeg_quality=_settings.export_image_jpeg_quality,
+)
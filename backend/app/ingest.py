@@ -0,0 +1,58 @@
+"""Document ingestion pipeline.
+
+Text extraction (pypdf) and token counting (tiktoken) are CPU-bound, so the
+upload endpoint hands them to a bounded :class:`~app.workers.WorkerPool`
+instead of running them on the event loop. Page-sharded PDF image scans
+(:func:`highlight.extract_page_range`) run on a separate pool so a large
+report's images cannot starve uploads.
+"""
+
+from __future__ import annotations
+
+import io
+
+import highlight as hlt
+from .config import get_settings
+from .workers import WorkerPool
+
+PDF = "pdf"
+TEXT = "text"
+
+
+def parse_document(raw: bytes, kind: str) -> dict:
+    """Extract content and statistics from an uploaded file.
+
+    Module-level (and therefore picklable) so it can run in a process pool.
+    """
+    if kind == PDF:
+        return hlt.read_pdf(io.BytesIO(raw))
+    if kind == TEXT:
+        return hlt.read_text(io.BytesIO(raw))
+    raise ValueError(f"Unsupported document kind '{kind}'.")
+
+
+def detect_kind(filename: str, content_type: str) -> str | None:
+    """Classify an upload as ``"pdf"`` / ``"text"`` or ``None`` if unsupported."""
+    name = filename.lower()
+    if content_type == "application/pdf" or name.endswith(".pdf"):
+        return PDF
+    if content_type == "text/plain" or name.endswith(".txt"):
+        return TEXT
+    return None
+
+
+_settings = get_settings()
+
+# Module-level singletons
+ingest_pool = WorkerPool(
+    "ingest",
+    kind=_settings.ingest_pool_kind,
+    max_workers=_settings.ingest_max_workers,
+    max_pending=_settings.ingest_max_pending,
+)
+image_pool = WorkerPool(
+    "images",
+    kind=_settings.image_pool_kind,
+    max_workers=_settings.image_max_workers,
+    max_pending=_settings.image_max_pending,
+)
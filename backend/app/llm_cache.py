@@ -0,0 +1,139 @@
+"""Persistent LLM response cache.
+
+Opt-in (``LLM_CACHE_ENABLED``). Responses are stored in SQLite keyed on the
+model, base URL, system prompt, a hash of the user prompt and the output type,
+so regenerating a section for the same document with the same prompt and
+model (by anyone) is served locally. The API key is deliberately not part of
+the key. Entries expire after ``LLM_CACHE_TTL_SECONDS`` and the table is
+capped at ``LLM_CACHE_MAX_ENTRIES`` (least recently used rows go first).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from .config import get_settings
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key         TEXT PRIMARY KEY,
+    output_type TEXT NOT NULL,
+    value       TEXT NOT NULL,
+    created     REAL NOT NULL,
+    last_hit    REAL NOT NULL
+)
+"""
+
+
+def cache_key(
+    model: str,
+    base_url: str,
+    system_prompt: str,
+    user_prompt: str,
+    output_type: str,
+) -> str:
+    """Hash the identifying parts of a generation call into a cache key."""
+    prompt_hash = hashlib.sha256(user_prompt.encode("utf-8")).hexdigest()
+    payload = json.dumps([model, base_url, system_prompt, prompt_hash, output_type])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed response cache shared by all worker processes."""
+
+    def __init__(self, path: str, *, ttl_seconds: float, max_entries: int) -> None:
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._invalid = 0
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn().execute(_SCHEMA)
+        self._conn().execute(
+            "CREATE INDEX IF NOT EXISTS responses_last_hit ON responses (last_hit)"
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value for ``key`` or ``None`` (counting hit/miss)."""
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT value, created FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or now - row[1] > self.ttl_seconds:
+            self._count("_misses")
+            return None
+        conn.execute("UPDATE responses SET last_hit = ? WHERE key = ?", (now, key))
+        self._count("_hits")
+        return row[0]
+
+    def put(self, key: str, output_type: str, value: str) -> None:
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO responses (key, output_type, value, created, last_hit) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (key, output_type, value, now, now),
+        )
+        conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,))
+        conn.execute(
+            "DELETE FROM responses WHERE key IN (SELECT key FROM responses "
+            "ORDER BY last_hit DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def invalidate(self, key: str) -> None:
+        """Drop an entry that no longer validates against its output type."""
+        self._count("_invalid")
+        self._conn().execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def stats(self) -> dict:
+        entries = self._conn().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "enabled": True,
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self._hits,
+                "misses": self._misses,
+                "invalid": self._invalid,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+@lru_cache
+def get_response_cache() -> Optional[ResponseCache]:
+    """Return the configured cache, or ``None`` when caching is disabled."""
+    settings = get_settings()
+    if not settings.llm_cache_enabled:
+        return None
+    return ResponseCache(
+        settings.llm_cache_path,
+        ttl_seconds=settings.llm_cache_ttl_seconds,
+        max_entries=settings.llm_cache_max_entries,
+    )
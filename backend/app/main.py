@@ -1,6 +1,8 @@
 """PAIGE FastAPI application entry point.
 
-Wires together the routers, CORS, logging, and a POC lookup endpoint.
+Wires together the routers, CORS, logging, background lifecycle (session
+sweeper, worker pools, shared HTTP client, export templates), and a POC
+lookup endpoint.
 Run in development with::
 
     uvicorn app.main:app --reload --port 8000
@@ -10,23 +12,50 @@ from within the ``backend`` directory.
 
 from __future__ import annotations
 
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from .config import get_settings
 from .deps import PROJECT_DICT
+from .export_jobs import export_pool
+from .export_templates import export_templates
+from .http import http_pool
+from .ingest import image_pool, ingest_pool
 from .routers import auth, export, generate, images, misc, upload
+from .session import run_sweeper, store
 
 logging.basicConfig(level=logging.INFO)
 
 settings = get_settings()
 
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    """Start the sweeper, HTTP client, templates and pools; release them on shutdown."""
+    sweeper = asyncio.create_task(
+        run_sweeper(store, settings.session_sweep_interval_seconds)
+    )
+    http_pool.client()
+    export_templates.preload()
+    for pool in (ingest_pool, image_pool, export_pool):
+        pool.start()
+    yield
+    sweeper.cancel()
+    ingest_pool.shutdown(wait=False)
+    image_pool.shutdown(wait=False)
+    export_pool.shutdown(wait=False)
+    await http_pool.aclose()
+
+
 app = FastAPI(
     title="PAIGE API",
     description="PNNL AI assistant for GEnerating publication highlights.",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
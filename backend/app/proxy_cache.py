@@ -0,0 +1,206 @@
+"""Size-capped disk cache for the image proxy.
+
+Proxied images are streamed to the browser and written through to a
+:class:`~app.blobs.BlobStore` keyed by the SHA-256 of the URL: the body under
+``<key>.body`` and its headers under ``<key>.json``. Repeat requests are
+served from disk (with ETag, Last-Modified and Range support) and never reach
+upstream again. Once the cache outgrows its byte budget the least recently
+served entries are deleted; every worker process shares the directory.
+
+Pruning scans the whole directory, so each process keeps a running estimate
+of its size instead -- the total found by its last scan plus what it has
+written since -- and only scans once that estimate is over budget or the
+last scan is old enough that other workers' writes may have been missed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import formatdate
+from pathlib import Path
+from typing import Mapping, Optional
+
+from .blobs import BlobStore, StagedBlob
+from .config import get_settings
+
+_BODY = "body"
+_META = "json"
+# Abandoned temporary files older than this are removed while pruning.
+_STALE_TMP_SECONDS = 60 * 60
+# Longest a process goes without rescanning the directory while it writes.
+_RESCAN_SECONDS = 5 * 60
+
+
+def url_key(url: str) -> str:
+    return hashlib.sha256(url.encode()).hexdigest()
+
+
+@dataclass(frozen=True)
+class CachedImage:
+    path: Path
+    content_type: str
+    etag: str
+    last_modified: str
+    size: int
+
+
+class ProxyCache:
+    """Disk cache of proxied responses, pruned to ``max_bytes`` by recency."""
+
+    def __init__(self, root: str, *, max_bytes: int, max_object_bytes: int) -> None:
+        self.blobs = BlobStore(root)
+        self.max_bytes = max_bytes
+        self.max_object_bytes = max_object_bytes
+        self._lock = threading.Lock()
+        # Estimated directory size; ``None`` until the first scan.
+        self._bytes: Optional[int] = None
+        self._scanned_at = 0.0
+        self._pruning = False
+        self._hits = 0
+        self._misses = 0
+        self._stored = 0
+        self._evictions = 0
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            setattr(self, f"_{name}", getattr(self, f"_{name}") + amount)
+
+    def _meta(self, key: str, url: str) -> Optional[dict]:
+        raw = self.blobs.get(key, _META)
+        try:
+            meta = json.loads(raw) if raw is not None else None
+        except ValueError:
+            return None
+        # Guard against a (vanishingly unlikely) digest collision.
+        return meta if meta is not None and meta.get("url") == url else None
+
+    def lookup(self, url: str) -> Optional[CachedImage]:
+        """Return the cached response for ``url``, marking it recently used."""
+        key = url_key(url)
+        meta = self._meta(key, url)
+        body = self.blobs.path(key, _BODY)
+        if meta is not None:
+            try:
+                # The body's mtime doubles as its last-access time for pruning.
+                os.utime(body)
+                size = body.stat().st_size
+            except FileNotFoundError:
+                meta = None
+        if meta is None:
+            self._count("misses")
+            return None
+        self._count("hits")
+        return CachedImage(
+            path=body,
+            content_type=meta["content_type"],
+            etag=meta["etag"],
+            last_modified=meta["last_modified"],
+            size=size,
+        )
+
+    def cacheable(self, status_code: int, headers: Mapping[str, str]) -> bool:
+        if status_code != 200 or "no-store" in headers.get("cache-control", "").lower():
+            return False
+        length = headers.get("content-length")
+        return not (length and length.isdigit() and int(length) > self.max_object_bytes)
+
+    def stage(self, url: str) -> StagedBlob:
+        return self.blobs.stage(url_key(url), _BODY)
+
+    def commit(self, url: str, staged: StagedBlob, headers: Mapping[str, str]) -> None:
+        """Publish a fully received body with its headers, then enforce the cap."""
+        key = url_key(url)
+        staged.commit()
+        meta = {
+            "url": url,
+            "content_type": headers.get("content-type", "application/octet-stream"),
+            "etag": headers.get("etag") or f'"{key[:16]}-{staged.size}"',
+            "last_modified": headers.get("last-modified") or formatdate(usegmt=True),
+            "stored": time.time(),
+        }
+        encoded = json.dumps(meta).encode()
+        meta_blob = self.blobs.stage(key, _META)
+        meta_blob.write(encoded)
+        meta_blob.commit()
+        self._count("stored")
+        with self._lock:
+            if self._bytes is not None:
+                self._bytes += staged.size + len(encoded)
+            due = not self._pruning and (
+                self._bytes is None
+                or self._bytes > self.max_bytes
+                or time.monotonic() - self._scanned_at >= _RESCAN_SECONDS
+            )
+            if due:
+                self._pruning = True
+        if due:
+            try:
+                self.prune()
+            finally:
+                with self._lock:
+                    self._pruning = False
+
+    def prune(self) -> int:
+        """Delete least recently served entries until within ``max_bytes``."""
+        bodies = []
+        total = 0
+        now = time.time()
+        for path in self.blobs.root.glob("*/*.*"):
+            try:
+                stat = path.stat()
+                if path.suffix == ".tmp":
+                    if stat.st_mtime < now - _STALE_TMP_SECONDS:
+                        path.unlink()
+                    continue
+            except FileNotFoundError:
+                continue
+            total += stat.st_size
+            if path.suffix == f".{_BODY}":
+                bodies.append((stat.st_mtime, path))
+
+        removed = 0
+        for _, body in sorted(bodies):
+            if total <= self.max_bytes:
+                break
+            meta = body.with_suffix(f".{_META}")
+            # Drop the headers first so a concurrent lookup sees a clean miss.
+            for path in (meta, body):
+                try:
+                    total -= path.stat().st_size
+                    path.unlink()
+                except FileNotFoundError:
+                    continue
+            removed += 1
+        with self._lock:
+            self._bytes = total
+            self._scanned_at = time.monotonic()
+            self._evictions += removed
+        return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "stored": self._stored,
+                "evictions": self._evictions,
+                "bytes": self._bytes,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "max_bytes": self.max_bytes,
+            }
+
+
+_settings = get_settings()
+
+# Module-level singleton
+proxy_cache = ProxyCache(
+    _settings.proxy_cache_dir,
+    max_bytes=_settings.proxy_cache_max_bytes,
+    max_object_bytes=_settings.proxy_cache_max_object_bytes,
+)
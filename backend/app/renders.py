@@ -0,0 +1,169 @@
+"""On-disk cache of rasterised PDF figure regions.
+
+Figures drawn as vector graphics have no embedded image to extract, so they
+are rendered from the page with :func:`highlight.render_region`. Renders are
+stored as PNG blobs keyed by (document digest, page, bbox, dpi), so repeated
+previews and PPTX exports never rasterise the same region twice, across
+sessions, uvicorn workers and restarts.
+
+Requested resolutions are snapped to a few fixed values so clients cannot
+fill the cache with one render per dpi, and once the cache outgrows its byte
+budget the least recently served renders are deleted. As in
+:mod:`app.proxy_cache`, each process keeps a running estimate of the
+directory size and only scans it when the estimate is over budget or stale.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from typing import Optional
+
+import highlight as hlt
+from .blobs import BlobStore
+from .config import get_settings
+from .documents import Document
+from .ingest import image_pool
+
+# Lowest resolution a client may ask for; also used for list previews.
+MIN_DPI = 36
+# Resolutions renders are produced at; requests are rounded up to one.
+RENDER_DPIS = (MIN_DPI, 72, 150, 200, 300, 600)
+# Longest a process goes without rescanning the directory while it writes.
+_RESCAN_SECONDS = 5 * 60
+
+
+def render_key(region: hlt.FigureRegion, dpi: int) -> str:
+    """Blob suffix identifying a region rendered at ``dpi``."""
+    # Hundredths of a point keep the key free of dots and signs.
+    bbox = "-".join(str(round(value * 100)) for value in region.bbox)
+    return f"p{region.page}-{bbox}-{dpi}dpi.png"
+
+
+def resolve_dpi(dpi: Optional[int]) -> int:
+    """Snap a requested render resolution to the next of :data:`RENDER_DPIS`.
+
+    Resolutions above ``figure_render_max_dpi`` are not offered.
+    """
+    settings = get_settings()
+    if dpi is None:
+        dpi = settings.figure_render_dpi
+    allowed = [value for value in RENDER_DPIS if value <= settings.figure_render_max_dpi]
+    allowed = allowed or [MIN_DPI]
+    return next((value for value in allowed if value >= dpi), allowed[-1])
+
+
+class RenderCache:
+    """PNG renders of figure regions, pruned to ``max_bytes`` by recency."""
+
+    def __init__(self, root: str, *, max_bytes: int) -> None:
+        self.blobs = BlobStore(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # Estimated directory size; ``None`` until the first scan.
+        self._bytes: Optional[int] = None
+        self._scanned_at = 0.0
+        self._pruning = False
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self._hits += 1
+            else:
+                self._misses += 1
+
+    def get(self, digest: str, region: hlt.FigureRegion, dpi: int) -> Optional[bytes]:
+        path = self.blobs.path(digest, render_key(region, dpi))
+        try:
+            png = path.read_bytes()
+            # The file's mtime doubles as its last-access time for pruning.
+            os.utime(path)
+        except FileNotFoundError:
+            png = None
+        self._count(png is not None)
+        return png
+
+    def put(self, digest: str, region: hlt.FigureRegion, dpi: int, png: bytes) -> None:
+        """Store a render, then prune if the cache may be over budget."""
+        self.blobs.put(digest, render_key(region, dpi), png)
+        with self._lock:
+            if self._bytes is not None:
+                self._bytes += len(png)
+            due = not self._pruning and (
+                self._bytes is None
+                or self._bytes > self.max_bytes
+                or time.monotonic() - self._scanned_at >= _RESCAN_SECONDS
+            )
+            if due:
+                self._pruning = True
+        if due:
+            try:
+                self.prune()
+            finally:
+                with self._lock:
+                    self._pruning = False
+
+    def prune(self) -> int:
+        """Delete least recently served renders until within ``max_bytes``."""
+        renders = []
+        total = 0
+        for path in self.blobs.root.glob("*/*.png"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            total += stat.st_size
+            renders.append((stat.st_mtime, stat.st_size, path))
+
+        removed = 0
+        for _, size, path in sorted(renders):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                continue
+            total -= size
+            removed += 1
+        with self._lock:
+            self._bytes = total
+            self._scanned_at = time.monotonic()
+            self._evictions += removed
+        return removed
+
+    async def arender(self, document: Document, region: hlt.FigureRegion, dpi: int) -> bytes:
+        """Return the cached render; misses are rasterised on the image pool.
+
+        May raise :class:`~app.workers.PoolBusyError`.
+        """
+        png = await asyncio.to_thread(self.get, document.digest, region, dpi)
+        if png is None:
+            pdf_path = await asyncio.to_thread(document.pdf_path)
+            png = await image_pool.run(
+                hlt.render_region, pdf_path, region.page, region.bbox, dpi
+            )
+            await asyncio.to_thread(self.put, document.digest, region, dpi, png)
+        return png
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+_settings = get_settings()
+
+# Module-level singleton
+render_cache = RenderCache(
+    _settings.figure_render_dir, max_bytes=_settings.figure_render_max_bytes
+)
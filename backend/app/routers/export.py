@@ -1,38 +1,53 @@
-"""Export router: generate Word (.docx) and PowerPoint (.pptx) files."""
+"""Export router: Word (.docx) and PowerPoint (.pptx) files, singly, as a deck or as a ZIP."""
 
 from __future__ import annotations
 
+import asyncio
 import datetime
-import importlib.resources
-import io
+import functools
+import itertools
+import logging
 import re
-
-import requests
-from docx.shared import Mm
-from docxtpl import DocxTemplate, InlineImage
-from fastapi import APIRouter, HTTPException, status
-from fastapi.responses import StreamingResponse
-from pptx import Presentation
-from pptx.enum.text import PP_ALIGN
-from pptx.oxml.ns import qn
-from pptx.util import Pt
+import zipfile
+from typing import AsyncIterator, Awaitable, Callable, Optional
 
 import highlight as hlt
-from ..deps import require_session
-from ..schemas import PptExportRequest, WordExportRequest
+import httpx
+from fastapi import APIRouter, Header, HTTPException, Request, status
+from fastapi.responses import Response, StreamingResponse
+
+from .. import export_jobs
+from ..config import get_settings
+from ..deps import arequire_session, etag_matches
+from ..export_cache import export_cache, export_etag, export_key
+from ..export_jobs import DOCX_PHOTO_WIDTH_MM
+from ..export_templates import DOCX_TEMPLATE, PPTX_TEMPLATE, export_templates
+from ..http import http_pool
+from ..image_prep import emu_to_pixels, mm_to_pixels, prepared_images
+from ..renders import render_cache, resolve_dpi
+from ..schemas import (
+    BatchExportRequest,
+    DeckExportRequest,
+    PptExportRequest,
+    WordExportRequest,
+)
 from ..session import Session
+from ..workers import PoolBusyError, PoolTimeoutError
 
 router = APIRouter(prefix="/export", tags=["export"])
 
-_USER_AGENT = (
-    "PAIGE/1.0 (https://github.com/crvernon/highlight; chris.vernon@pnnl.gov)"
-)
 _DOCX_MIME = (
     "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
 )
 _PPTX_MIME = (
     "application/vnd.openxmlformats-officedocument.presentationml.presentation"
 )
+_MISSING_SLIDE_CONTENT = (
+    "Please provide the title, objective, impact, and approach content before "
+    "exporting."
+)
+# Lists the documents of a batch export that failed to render.
+_BATCH_ERRORS_NAME = "export-errors.txt"
 
 
 def _build_base_filename(citation: str | None) -> str:
@@ -96,21 +111,18 @@ def _build_photo_site_name(req: WordExportRequest) -> str:
     return ", ".join(filter(None, parts)).replace("<", "(").replace(">", ")")
 
 
-def _fetch_image_bytes(url: str | None) -> io.BytesIO | None:
+async def _fetch_image_bytes(url: str | None) -> bytes | None:
     if not url:
         return None
     try:
-        resp = requests.get(
+        resp = await http_pool.get(
             url,
-            timeout=30,
             headers={
-                "User-Agent": _USER_AGENT,
                 "Referer": "https://commons.wikimedia.org/",
                 "Accept": "image/*,*/*;q=0.8",
             },
         )
-        resp.raise_for_status()
-    except requests.RequestException:
+    except httpx.HTTPError:
         return None
 
     # Guard against non-image payloads (e.g. an HTML rate-limit/error page).
@@ -119,203 +131,511 @@ def _fetch_image_bytes(url: str | None) -> io.BytesIO | None:
         return None
     if not resp.content:
         return None
-    return io.BytesIO(resp.content)
+    return resp.content
+
+
+async def _fetch_photo(url: str | None, width: int) -> bytes | None:
+    """Fetch a Commons rendition at least ``width`` px wide, else the original."""
+    if not url:
+        return None
+    thumbnail_url = hlt.commons_thumbnail_url(url, width)
+    if thumbnail_url is not None:
+        data = await _fetch_image_bytes(thumbnail_url)
+        if data is not None:
+            return data
+    return await _fetch_image_bytes(url)
+
+
+def _busy_or_timeout(exc: Exception) -> HTTPException:
+    code = (
+        status.HTTP_504_GATEWAY_TIMEOUT
+        if isinstance(exc, PoolTimeoutError)
+        else status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+    return HTTPException(status_code=code, detail=str(exc))
+
+
+async def _cached_export(
+    key: str, render: Callable[[], Awaitable[tuple[bytes, bool]]]
+) -> tuple[bytes, bool]:
+    """Return the export stored under ``key`` and whether it is complete.
+
+    Misses are rendered. Only complete renders are stored; one missing its
+    image because the fetch failed is rendered again next time.
+    """
+    data = export_cache.get(key)
+    if data is not None:
+        return data, True
+    data, complete = await render()
+    if complete:
+        export_cache.put(key, data)
+    return data, complete
 
 
-def _get_placeholder(slide, name):
-    for shape in slide.placeholders:
-        if shape.name == name:
-            return shape
-    for shape in slide.shapes:
-        if shape.name == name:
-            return shape
-    return None
+async def _export_bytes(key: str, render: Callable[[], Awaitable[tuple[bytes, bool]]]) -> bytes:
+    """:func:`_cached_export` without the flag, for batch archive entries."""
+    data, _ = await _cached_export(key, render)
+    return data
+
+
+def _export_headers(key: str, complete: bool, filename: str) -> dict:
+    """Download headers; incomplete renders get no ETag to revalidate."""
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if complete:
+        headers["ETag"] = export_etag(key)
+    return headers
+
+
+def _not_modified(key: str, if_none_match: str | None) -> Response | None:
+    """304 response when the client already holds the complete export ``key``.
+
+    Exports are POSTs, for which RFC 9110 answers a matching If-None-Match
+    with 412; they are safe to repeat, though, so the cached copy is
+    revalidated the way a GET would be. Only keys the cache knows to have
+    rendered completely are revalidated.
+    """
+    etag = export_etag(key)
+    if not etag_matches(if_none_match, etag) or not export_cache.known(key):
+        return None
+    export_cache.record_not_modified()
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
 
 
 @router.post("/docx")
-def export_docx(req: WordExportRequest) -> StreamingResponse:
-    require_session(req.session_id)
+async def export_docx(
+    req: WordExportRequest, if_none_match: Optional[str] = Header(default=None)
+) -> Response:
+    """Render the Word highlight, or serve it from the export cache.
+
+    The ETag identifies the rendered document; sending it back in
+    ``If-None-Match`` gets 304 Not Modified while the export is unchanged.
+    """
+    await arequire_session(req.session_id)
     base_name = _build_base_filename(req.citation)
+    key = _docx_export_key(req)
+    not_modified = _not_modified(key, if_none_match)
+    if not_modified is not None:
+        return not_modified
 
     try:
-        template_file = importlib.resources.files("highlight.data").joinpath(
-            "highlight_template.docx"
+        data, complete = await _cached_export(
+            key, functools.partial(_render_docx_export, req)
         )
-        template = DocxTemplate(template_file)
-
-        photo_stream = _fetch_image_bytes(
-            req.selected_image.full_url if req.selected_image else None
-        )
-        photo_link = req.selected_image.page_url if req.selected_image else ""
-
-        context = {
-            "title": req.title,
-            "subtitle": req.subtitle,
-            "photo": None,
-            "photo_link": photo_link,
-            "photo_site_name": _build_photo_site_name(req),
-            "image_caption": req.image_caption,
-            "science": req.science,
-            "impact": req.impact,
-            "summary": req.summary,
-            "funding": req.funding,
-            "citation": req.citation,
-            "related_links": req.related_links,
-            "point_of_contact": req.point_of_contact,
-        }
-
-        if photo_stream is not None and photo_stream.getbuffer().nbytes > 0:
-            photo_stream.seek(0)
-            context["photo"] = InlineImage(template, photo_stream, width=Mm(120))
-
-        template.render(context)
-        bio = io.BytesIO()
-        template.save(bio)
-        bio.seek(0)
+    except (PoolBusyError, PoolTimeoutError) as exc:
+        raise _busy_or_timeout(exc) from exc
     except Exception as exc:  # noqa: BLE001
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error generating Word document: {exc}",
         ) from exc
 
-    return StreamingResponse(
-        bio,
+    return Response(
+        content=data,
         media_type=_DOCX_MIME,
-        headers={"Content-Disposition": f'attachment; filename="{base_name}.docx"'},
+        headers=_export_headers(key, complete, f"{base_name}.docx"),
     )
 
 
+def _docx_export_key(req: WordExportRequest) -> str:
+    photo_url = req.selected_image.full_url if req.selected_image else None
+    return export_key(
+        export_jobs.DOCX,
+        req.model_dump(mode="json", exclude={"session_id"}),
+        export_templates.version(DOCX_TEMPLATE),
+        photo_url or "",
+    )
+
+
+async def _render_docx_export(req: WordExportRequest) -> tuple[bytes, bool]:
+    """Fetch and prepare the photo, then render the Word export on the pool.
+
+    Returns the document and whether the selected photo could be included.
+    """
+    photo_url = req.selected_image.full_url if req.selected_image else None
+    photo_width = mm_to_pixels(DOCX_PHOTO_WIDTH_MM, prepared_images.dpi)
+    photo = await _fetch_photo(photo_url, photo_width)
+    if photo:
+        prepared = await asyncio.to_thread(prepared_images.prepare, photo, photo_width)
+        photo = prepared.getvalue()
+    data = await export_jobs.arender(export_jobs.DOCX, _docx_context(req), photo)
+    return data, bool(photo) or not photo_url
+
+
+def _docx_context(req: WordExportRequest) -> dict:
+    """Template context for the Word export; the photo is added by the renderer."""
+    return {
+        "title": req.title,
+        "subtitle": req.subtitle,
+        "photo_link": req.selected_image.page_url if req.selected_image else "",
+        "photo_site_name": _build_photo_site_name(req),
+        "image_caption": req.image_caption,
+        "science": req.science,
+        "impact": req.impact,
+        "summary": req.summary,
+        "funding": req.funding,
+        "citation": req.citation,
+        "related_links": req.related_links,
+        "point_of_contact": req.point_of_contact,
+    }
+
+
 @router.post("/pptx")
-def export_pptx(req: PptExportRequest) -> StreamingResponse:
-    session = require_session(req.session_id)
+async def export_pptx(
+    req: PptExportRequest, if_none_match: Optional[str] = Header(default=None)
+) -> Response:
+    """Render the PowerPoint slide, or serve it from the export cache.
+
+    ETags work as for ``POST /export/docx``.
+    """
+    session = await arequire_session(req.session_id)
     base_name = _build_base_filename(req.citation)
 
-    if not (req.title and req.objective and req.impact_points and req.approach_points):
+    if not _has_slide_content(req):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=_MISSING_SLIDE_CONTENT
+        )
+    key = _pptx_export_key(req, session)
+    not_modified = _not_modified(key, if_none_match)
+    if not_modified is not None:
+        return not_modified
+
+    try:
+        data, complete = await _cached_export(
+            key, functools.partial(_render_pptx_export, req, session)
+        )
+    except (PoolBusyError, PoolTimeoutError) as exc:
+        raise _busy_or_timeout(exc) from exc
+    except Exception as exc:  # noqa: BLE001
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An error occurred while generating the PowerPoint: {exc}",
+        ) from exc
+
+    return Response(
+        content=data,
+        media_type=_PPTX_MIME,
+        headers=_export_headers(key, complete, f"{base_name}.pptx"),
+    )
+
+
+def _has_slide_content(req: PptExportRequest) -> bool:
+    return bool(req.title and req.objective and req.impact_points and req.approach_points)
+
+
+def _pptx_export_key(req: PptExportRequest, session: Session) -> str:
+    # The figure is identified by the session's document plus the selector
+    # fields, which are part of the payload.
+    return export_key(
+        export_jobs.PPTX,
+        req.model_dump(mode="json", exclude={"session_id"}),
+        export_templates.version(PPTX_TEMPLATE),
+        session.document.digest if session.document else "",
+    )
+
+
+async def _render_pptx_export(
+    req: PptExportRequest, session: Session
+) -> tuple[bytes, bool]:
+    """Resolve and prepare the figure, then render the slide on the pool.
+
+    The figure comes from the session's document, so the slide is always
+    complete; the flag matches :func:`_render_docx_export`.
+    """
+    figure_image = await _resolve_slide_figure(req, session)
+    [picture] = await asyncio.to_thread(_prepare_slide_pictures, [figure_image])
+    return await export_jobs.arender(export_jobs.PPTX, _slide_content(req), picture), True
+
+
+def _slide_content(req: PptExportRequest) -> dict:
+    return {
+        "title": req.title,
+        "objective": req.objective,
+        "figure_caption": req.figure_caption,
+        "citation": req.citation,
+        "approach_points": req.approach_points,
+        "impact_points": req.impact_points,
+    }
+
+
+async def _resolve_slide_figure(req: PptExportRequest, session: Session) -> bytes | None:
+    if req.figure_region_index is not None:
+        return await _resolve_figure_region(
+            session, req.figure_region_index, req.figure_region_dpi
+        )
+    return await asyncio.to_thread(
+        _resolve_pdf_image, session, req.figure_image_index, req.figure_image_xref
+    )
+
+
+def _prepare_slide_pictures(images: list[bytes | None]) -> list[bytes | None]:
+    """Size ``images`` to the slide's picture placeholder; blocking.
+
+    Each distinct image is prepared once however many slides show it.
+    """
+    size = export_templates.shape_size(export_jobs.PICTURE_PLACEHOLDER)
+    if size is None:
+        return [None] * len(images)
+    # The placeholder crops to its own aspect ratio, so the image only needs
+    # to cover it.
+    width, height = (emu_to_pixels(side, prepared_images.dpi) for side in size)
+    prepared: dict[bytes, bytes] = {}
+    for image in images:
+        if image is not None and image not in prepared:
+            prepared[image] = prepared_images.prepare(
+                image, width, height, fit="cover"
+            ).getvalue()
+    return [None if image is None else prepared[image] for image in images]
+
+
+def _resolve_pdf_image(
+    session: Session, index: int | None, xref: int | None = None
+) -> bytes | None:
+    """Fetch one PDF image by xref (preferred) or listing index."""
+    if (index is None and xref is None) or not session.pdf_bytes:
+        return None
+    image_index = session.document.image_index()
+    entry = image_index.by_xref(xref) if xref is not None else image_index.by_index(index)
+    if entry is None:
+        return None
+    image_bytes = image_index.image_bytes(entry.xref)
+    return image_bytes
+
+
+async def _resolve_figure_region(
+    session: Session, index: int, dpi: int | None = None
+) -> bytes | None:
+    """Render one figure region of the PDF (cached on disk) as PNG."""
+    if not session.pdf_bytes:
+        return None
+    regions = await asyncio.to_thread(session.document.figure_regions)
+    if not 0 <= index < len(regions):
+        return None
+    return await render_cache.arender(session.document, regions[index], resolve_dpi(dpi))
+
+
+@router.post("/deck")
+async def export_deck(
+    req: DeckExportRequest, if_none_match: Optional[str] = Header(default=None)
+) -> Response:
+    """Export one PowerPoint deck with a slide per paper, in request order.
+
+    The template slide is cloned for every paper in a single presentation.
+    All figures are resolved and prepared in one pass first, so a figure
+    used on several slides is prepared, and stored in the deck, only once.
+    ETags work as for ``POST /export/docx``.
+    """
+    settings = get_settings()
+    if not req.slides or len(req.slides) > settings.export_batch_max_items:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=(
-                "Please provide the title, objective, impact, and approach "
-                "content before exporting."
+                f"Provide between 1 and {settings.export_batch_max_items} "
+                "slides to export."
             ),
         )
-
-    figure_image = _resolve_pdf_image(session, req.figure_image_index)
+    sessions = await _require_sessions(req.slides)
+    _require_slide_content(req.slides, "slides")
+
+    key = export_key(
+        "deck",
+        {"slides": [_pptx_export_key(item, sessions[item.session_id]) for item in req.slides]},
+        export_templates.version(PPTX_TEMPLATE),
+        "",
+    )
+    not_modified = _not_modified(key, if_none_match)
+    if not_modified is not None:
+        return not_modified
 
     try:
-        template_file = importlib.resources.files("highlight.data").joinpath(
-            "highlight_template.pptx"
+        data, complete = await _cached_export(
+            key, functools.partial(_render_deck_export, req.slides, sessions)
         )
-        prs = Presentation(template_file)
-
-        approach_points = req.approach_points or ["Approach not generated."]
-        impact_points = req.impact_points or ["Impact points not generated."]
-
-        for slide in prs.slides:
-            impact_ph = _get_placeholder(slide, "Text Placeholder 10")
-            approach_ph = _get_placeholder(slide, "Text Placeholder 9")
-            picture_ph = _get_placeholder(slide, "Picture Placeholder 2")
-            caption_ph = _get_placeholder(slide, "Text Placeholder 3")
-            citation_ph = _get_placeholder(slide, "Text Placeholder 11")
-            objective_ph = _get_placeholder(slide, "Text Placeholder 8")
-            title_ph = _get_placeholder(slide, "Title 1")
-
-            for ph in (
-                title_ph,
-                objective_ph,
-                caption_ph,
-                citation_ph,
-                approach_ph,
-                impact_ph,
-                picture_ph,
-            ):
-                _remove_placeholder_outline(ph)
-
-            if title_ph is not None:
-                title_ph.text_frame.clear()
-                title_ph.text_frame.text = req.title
-            if objective_ph is not None:
-                objective_ph.text_frame.clear()
-                objective_ph.text_frame.text = req.objective
-            if caption_ph is not None:
-                caption_ph.text_frame.clear()
-                caption_ph.text_frame.text = req.figure_caption
-            if citation_ph is not None:
-                citation_ph.text_frame.clear()
-                citation_ph.text_frame.text = req.citation
-
-            _populate_bullets(approach_ph, approach_points)
-            _populate_bullets(impact_ph, impact_points)
-
-            if picture_ph is not None and figure_image is not None:
-                try:
-                    figure_image.seek(0)
-                    picture_ph.insert_picture(figure_image)
-                except Exception:  # noqa: BLE001 - leave placeholder if insert fails
-                    pass
-
-        ppt_io = io.BytesIO()
-        prs.save(ppt_io)
-        ppt_io.seek(0)
+    except (PoolBusyError, PoolTimeoutError) as exc:
+        raise _busy_or_timeout(exc) from exc
     except Exception as exc:  # noqa: BLE001
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"An error occurred while generating the PowerPoint: {exc}",
+            detail=f"An error occurred while generating the PowerPoint deck: {exc}",
         ) from exc
 
-    return StreamingResponse(
-        ppt_io,
+    today_str = datetime.date.today().strftime("%d%b%Y").lower()
+    return Response(
+        content=data,
         media_type=_PPTX_MIME,
-        headers={"Content-Disposition": f'attachment; filename="{base_name}.pptx"'},
+        headers=_export_headers(key, complete, f"ber-highlights_{today_str}.pptx"),
     )
 
 
-def _resolve_pdf_image(session: Session, index: int | None) -> io.BytesIO | None:
-    if index is None or not session.pdf_bytes:
-        return None
-    extracted = hlt.extract_images_from_pdf(session.pdf_bytes)
-    for item in extracted:
-        if item["index"] == index:
-            return io.BytesIO(item["bytes"])
-    return None
+async def _render_deck_export(
+    slides: list[PptExportRequest], sessions: dict[str, Session]
+) -> tuple[bytes, bool]:
+    """Resolve and prepare every figure, then render the deck as one job."""
+    figures = [
+        await _resolve_slide_figure(item, sessions[item.session_id]) for item in slides
+    ]
+    pictures = await asyncio.to_thread(_prepare_slide_pictures, figures)
+    contents = [_slide_content(item) for item in slides]
+    return await export_jobs.arender_deck(contents, pictures), True
+
+
+@router.post("/batch")
+async def export_batch(req: BatchExportRequest, request: Request) -> StreamingResponse:
+    """Render many highlights concurrently into one streamed ZIP archive.
+
+    Files are named from their citations like the single exports (numbered
+    when names collide) and written to the archive as they finish, so only
+    a few rendered documents are held in memory however long the batch is.
+    Documents that fail to render are listed in ``export-errors.txt`` at the
+    end of the archive rather than aborting the download.
+    """
+    settings = get_settings()
+    total = len(req.docx) + len(req.pptx)
+    if not total or total > settings.export_batch_max_items:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                f"Provide between 1 and {settings.export_batch_max_items} "
+                "documents to export."
+            ),
+        )
+
+    sessions = await _require_sessions([*req.docx, *req.pptx])
+    _require_slide_content(req.pptx, "pptx")
 
+    names = _unique_names(
+        [f"{_build_base_filename(item.citation)}.docx" for item in req.docx]
+        + [f"{_build_base_filename(item.citation)}.pptx" for item in req.pptx]
+    )
+    renders = [
+        functools.partial(
+            _export_bytes, _docx_export_key(item), functools.partial(_render_docx_export, item)
+        )
+        for item in req.docx
+    ] + [
+        functools.partial(
+            _export_bytes,
+            _pptx_export_key(item, sessions[item.session_id]),
+            functools.partial(_render_pptx_export, item, sessions[item.session_id]),
+        )
+        for item in req.pptx
+    ]
+    today_str = datetime.date.today().strftime("%d%b%Y").lower()
+    return StreamingResponse(
+        _stream_zip(
+            list(zip(names, renders)),
+            settings.export_batch_concurrency,
+            request.is_disconnected,
+        ),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": f'attachment; filename="ber-highlights_{today_str}.zip"'
+        },
+    )
 
-def _remove_placeholder_outline(placeholder) -> None:
-    """Force a placeholder's outline to 'no line'.
 
-    PowerPoint renders a default dashed/dotted border around placeholders that
-    do not explicitly declare a line style. Inserting an ``<a:ln><a:noFill/>``
-    element on the shape properties suppresses that border.
+async def _require_sessions(
+    items: list[WordExportRequest | PptExportRequest],
+) -> dict[str, Session]:
+    """Look up every item's session once; 401 if any is unknown."""
+    sessions: dict[str, Session] = {}
+    for item in items:
+        if item.session_id not in sessions:
+            sessions[item.session_id] = await arequire_session(item.session_id)
+    return sessions
+
+
+def _require_slide_content(items: list[PptExportRequest], field: str) -> None:
+    for index, item in enumerate(items):
+        if not _has_slide_content(item):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"{field}[{index}]: {_MISSING_SLIDE_CONTENT}",
+            )
+
+
+def _unique_names(names: list[str]) -> list[str]:
+    """Number repeated file names: ``a.docx``, ``a-2.docx``, ``a-3.docx``."""
+    seen: set[str] = set()
+    unique = []
+    for name in names:
+        stem, dot, ext = name.rpartition(".")
+        candidate, count = name, 1
+        while candidate in seen:
+            count += 1
+            candidate = f"{stem}-{count}{dot}{ext}"
+        seen.add(candidate)
+        unique.append(candidate)
+    return unique
+
+
+class _ZipSink:
+    """Unseekable write target that the streamed archive is drained from."""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def _stream_zip(
+    jobs: list[tuple[str, Callable[[], Awaitable[bytes]]]],
+    concurrency: int,
+    is_disconnected: Callable[[], Awaitable[bool]],
+) -> AsyncIterator[bytes]:
+    """Yield a ZIP of the rendered ``(name, render)`` jobs as they complete.
+
+    At most ``concurrency`` documents are rendering or waiting to be written
+    at any time; new renders start only as finished ones are sent. The
+    server discards writes to a disconnected client, so the stream checks
+    ``is_disconnected`` itself and stops rendering once the client is gone.
     """
-    if placeholder is None:
-        return
+
+    async def run(name, render):
+        try:
+            return name, await render(), None
+        except Exception as exc:  # noqa: BLE001 - reported in the archive
+            logging.error("Batch export of %s failed: %s", name, exc)
+            return name, None, str(exc) or type(exc).__name__
+
+    queued = iter(jobs)
+    pending: set[asyncio.Task] = set()
+    errors: list[str] = []
+    sink = _ZipSink()
+
+    def fill() -> None:
+        for name, render in itertools.islice(queued, max(1, concurrency) - len(pending)):
+            pending.add(asyncio.ensure_future(run(name, render)))
+
     try:
-        sp_pr = placeholder._element.spPr
-    except AttributeError:
-        return
-    if sp_pr is None:
-        return
-
-    # Remove any existing line definition so we can set a clean 'no fill'.
-    for existing in sp_pr.findall(qn("a:ln")):
-        sp_pr.remove(existing)
-
-    ln = sp_pr.makeelement(qn("a:ln"), {})
-    ln.append(sp_pr.makeelement(qn("a:noFill"), {}))
-    sp_pr.append(ln)
-
-
-def _populate_bullets(placeholder, points) -> None:
-    if placeholder is None or not hasattr(placeholder, "text_frame") or not points:
-        return
-    tf = placeholder.text_frame
-    tf.clear()
-    if len(tf.paragraphs):
-        first = tf.paragraphs[0]
-        if not first.text.strip() and len(first.runs) == 0:
-            first._element.getparent().remove(first._element)
-    for point_text in points[:3]:
-        para = tf.add_paragraph()
-        para.text = point_text.strip().lstrip("- ")
-        para.level = 0
-        para.font.size = Pt(13)
-        para.alignment = PP_ALIGN.LEFT
+        # Entries are stored: DOCX and PPTX files are already compressed.
+        with zipfile.ZipFile(sink, "w", zipfile.ZIP_STORED) as archive:
+            fill()
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                if await is_disconnected():
+                    return
+                finished = [task.result() for task in done]
+                fill()
+                for name, data, error in finished:
+                    if error is not None:
+                        errors.append(f"{name}: {error}")
+                        continue
+                    archive.writestr(name, data)
+                    yield sink.drain()
+            if errors:
+                archive.writestr(_BATCH_ERRORS_NAME, "\n".join(errors) + "\n")
+        yield sink.drain()
+    finally:
+        # Reached on completion and on disconnects; cancels unfinished renders.
+        for task in pending:
+            task.cancel()
@@ -1,17 +1,35 @@
-"""Generation router: all LLM-backed text and structured endpoints."""
+"""Generation router: all LLM-backed text and structured endpoints.
+
+Handlers are ``async`` and await the agent layer directly, so a slow upstream
+completion does not occupy a threadpool slot. ``/generate/highlight`` runs the
+whole set of sections as a dependency graph and streams each one back as
+newline-delimited JSON as soon as it completes. ``/generate/stream/<section>``
+streams a single text section token-by-token as server-sent events.
+
+Every request may set ``bypass_cache`` to skip the persistent LLM response
+cache (when enabled) and force fresh completions.
+"""
 
 from __future__ import annotations
 
+import json
+from typing import Any, AsyncIterator, Mapping, Optional, Type
+
 import highlight as hlt
 import highlight.prompts as prompts
 from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
 
-from ..agent import generate_structured, generate_text
-from ..deps import require_content, require_session
+from ..agent import agenerate_structured, agenerate_text, astream_text
+from ..config import get_settings
+from ..deps import arequire_session, require_content
+from ..pipeline import DagTask, run_dag
 from ..schemas import (
     FigureListResponse,
     GenerateRequest,
     GenerateResponse,
+    HighlightRequest,
     StructuredResponse,
 )
 from ..session import Session
@@ -19,6 +37,17 @@ from ..session import Session
 router = APIRouter(prefix="/generate", tags=["generate"])
 
 
+def _build_prompt(
+    content: str, prompt_name: str, additional_content: Optional[str] = None
+) -> str:
+    return hlt.generate_prompt(
+        content=content,
+        prompt_name=prompt_name,
+        additional_content=additional_content,
+        layout=get_settings().prompt_layout,
+    )
+
+
 def _resolve_input(session: Session, req: GenerateRequest) -> str:
     """Return the text the prompt should operate on."""
     if req.content_override is not None:
@@ -26,11 +55,12 @@ def _resolve_input(session: Session, req: GenerateRequest) -> str:
     return require_content(session)
 
 
-def _maybe_reduce_wordcount(
+async def _maybe_reduce_wordcount(
     session: Session,
     text: str,
     max_word_count: int | None,
     min_word_count: int | None,
+    use_cache: bool = True,
 ) -> str:
     """Reduce an oversized response to the requested word window."""
     if not max_word_count:
@@ -41,38 +71,113 @@ def _maybe_reduce_wordcount(
         min_word_count or 0, max_word_count, text
     )
     try:
-        return generate_text(
+        return await agenerate_text(
             reduction_prompt,
             api_key=session.api_key,
             base_url=session.base_url,
             model=session.model,
+            use_cache=use_cache,
         )
     except Exception:  # noqa: BLE001 - keep the original text on failure
         return text
 
 
-def _run_text_prompt(
+def _strip_quotes(resp: GenerateResponse) -> GenerateResponse:
+    resp.text = resp.text.replace('"', "")
+    resp.word_count = len(resp.text.split())
+    return resp
+
+
+def _parse_figure_list(raw: str) -> dict[str, str]:
+    """Parse ``identifier :: description`` lines, dropping any tables."""
+    figures: dict[str, str] = {}
+    for line in raw.strip().split("\n"):
+        if line.strip().lower().startswith("table"):
+            continue
+        if " :: " in line:
+            identifier, description = line.split(" :: ", 1)
+            identifier = identifier.strip()
+            description = description.strip()
+            if identifier and description and not identifier.lower().startswith("table"):
+                figures[identifier] = description
+    return figures
+
+
+async def _generate_section_text(
+    session: Session,
+    content: str,
+    prompt_name: str,
+    additional_content: Optional[str] = None,
+    max_word_count: Optional[int] = None,
+    min_word_count: Optional[int] = None,
+    use_cache: bool = True,
+) -> GenerateResponse:
+    """Run a text prompt (plus word-count reduction); errors propagate."""
+    user_prompt = _build_prompt(content, prompt_name, additional_content)
+    text = await agenerate_text(
+        user_prompt,
+        api_key=session.api_key,
+        base_url=session.base_url,
+        model=session.model,
+        use_cache=use_cache,
+    )
+    text = await _maybe_reduce_wordcount(
+        session, text, max_word_count, min_word_count, use_cache
+    )
+    return GenerateResponse(text=text, word_count=len(text.split()))
+
+
+async def _generate_section_points(
+    session: Session,
+    content: str,
+    prompt_name: str,
+    output_type: Type[BaseModel],
+    additional_content: Optional[str] = None,
+    use_cache: bool = True,
+) -> StructuredResponse:
+    """Run a structured bullet-point prompt; errors propagate."""
+    user_prompt = _build_prompt(content, prompt_name, additional_content)
+    result = await agenerate_structured(
+        user_prompt,
+        output_type,
+        api_key=session.api_key,
+        base_url=session.base_url,
+        model=session.model,
+        use_cache=use_cache,
+    )
+    return StructuredResponse(points=result.points)
+
+
+async def _generate_figure_list(
+    session: Session, content: str, use_cache: bool = True
+) -> FigureListResponse:
+    user_prompt = _build_prompt(content, "figure_list")
+    raw = await agenerate_text(
+        user_prompt,
+        api_key=session.api_key,
+        base_url=session.base_url,
+        model=session.model,
+        use_cache=use_cache,
+    )
+    return FigureListResponse(figures=_parse_figure_list(raw))
+
+
+async def _run_text_prompt(
     session: Session,
     req: GenerateRequest,
     prompt_name: str,
 ) -> GenerateResponse:
     content = _resolve_input(session, req)
     try:
-        user_prompt = hlt.generate_prompt(
-            content=content,
-            prompt_name=prompt_name,
+        return await _generate_section_text(
+            session,
+            content,
+            prompt_name,
             additional_content=req.additional_content,
+            max_word_count=req.max_word_count,
+            min_word_count=req.min_word_count,
+            use_cache=not req.bypass_cache,
         )
-        text = generate_text(
-            user_prompt,
-            api_key=session.api_key,
-            base_url=session.base_url,
-            model=session.model,
-        )
-        text = _maybe_reduce_wordcount(
-            session, text, req.max_word_count, req.min_word_count
-        )
-        return GenerateResponse(text=text, word_count=len(text.split()))
     except HTTPException:
         raise
     except Exception as exc:  # noqa: BLE001
@@ -84,106 +189,164 @@ def _run_text_prompt(
 
 # --- Simple text endpoints ---
 @router.post("/title", response_model=GenerateResponse)
-def gen_title(req: GenerateRequest) -> GenerateResponse:
-    return _run_text_prompt(require_session(req.session_id), req, "title")
+async def gen_title(req: GenerateRequest) -> GenerateResponse:
+    return await _run_text_prompt(await arequire_session(req.session_id), req, "title")
 
 
 @router.post("/subtitle", response_model=GenerateResponse)
-def gen_subtitle(req: GenerateRequest) -> GenerateResponse:
-    return _run_text_prompt(require_session(req.session_id), req, "subtitle")
+async def gen_subtitle(req: GenerateRequest) -> GenerateResponse:
+    return await _run_text_prompt(await arequire_session(req.session_id), req, "subtitle")
 
 
 @router.post("/science", response_model=GenerateResponse)
-def gen_science(req: GenerateRequest) -> GenerateResponse:
-    return _run_text_prompt(require_session(req.session_id), req, "science")
+async def gen_science(req: GenerateRequest) -> GenerateResponse:
+    return await _run_text_prompt(await arequire_session(req.session_id), req, "science")
 
 
 @router.post("/impact", response_model=GenerateResponse)
-def gen_impact(req: GenerateRequest) -> GenerateResponse:
-    return _run_text_prompt(require_session(req.session_id), req, "impact")
+async def gen_impact(req: GenerateRequest) -> GenerateResponse:
+    return await _run_text_prompt(await arequire_session(req.session_id), req, "impact")
 
 
 @router.post("/summary", response_model=GenerateResponse)
-def gen_summary(req: GenerateRequest) -> GenerateResponse:
-    return _run_text_prompt(require_session(req.session_id), req, "summary")
+async def gen_summary(req: GenerateRequest) -> GenerateResponse:
+    return await _run_text_prompt(await arequire_session(req.session_id), req, "summary")
 
 
 @router.post("/citation", response_model=GenerateResponse)
-def gen_citation(req: GenerateRequest) -> GenerateResponse:
-    resp = _run_text_prompt(require_session(req.session_id), req, "citation")
-    resp.text = resp.text.replace('"', "")
-    resp.word_count = len(resp.text.split())
-    return resp
+async def gen_citation(req: GenerateRequest) -> GenerateResponse:
+    resp = await _run_text_prompt(await arequire_session(req.session_id), req, "citation")
+    return _strip_quotes(resp)
 
 
 @router.post("/funding", response_model=GenerateResponse)
-def gen_funding(req: GenerateRequest) -> GenerateResponse:
-    resp = _run_text_prompt(require_session(req.session_id), req, "funding")
-    resp.text = resp.text.replace('"', "")
-    resp.word_count = len(resp.text.split())
-    return resp
+async def gen_funding(req: GenerateRequest) -> GenerateResponse:
+    resp = await _run_text_prompt(await arequire_session(req.session_id), req, "funding")
+    return _strip_quotes(resp)
 
 
 @router.post("/objective", response_model=GenerateResponse)
-def gen_objective(req: GenerateRequest) -> GenerateResponse:
-    return _run_text_prompt(require_session(req.session_id), req, "objective")
+async def gen_objective(req: GenerateRequest) -> GenerateResponse:
+    return await _run_text_prompt(await arequire_session(req.session_id), req, "objective")
 
 
 @router.post("/search-strings", response_model=GenerateResponse)
-def gen_search_strings(req: GenerateRequest) -> GenerateResponse:
+async def gen_search_strings(req: GenerateRequest) -> GenerateResponse:
     # Uses the 'figure' prompt; input is typically the general summary.
-    return _run_text_prompt(require_session(req.session_id), req, "figure")
+    return await _run_text_prompt(await arequire_session(req.session_id), req, "figure")
 
 
 @router.post("/image-caption", response_model=GenerateResponse)
-def gen_image_caption(req: GenerateRequest) -> GenerateResponse:
-    return _run_text_prompt(require_session(req.session_id), req, "figure_caption")
+async def gen_image_caption(req: GenerateRequest) -> GenerateResponse:
+    return await _run_text_prompt(await arequire_session(req.session_id), req, "figure_caption")
 
 
 @router.post("/figure-caption", response_model=GenerateResponse)
-def gen_figure_caption(req: GenerateRequest) -> GenerateResponse:
+async def gen_figure_caption(req: GenerateRequest) -> GenerateResponse:
     # additional_content carries the selected figure identifier.
-    return _run_text_prompt(
-        require_session(req.session_id), req, "selected_figure_caption"
+    return await _run_text_prompt(
+        await arequire_session(req.session_id), req, "selected_figure_caption"
     )
 
 
-# --- Figure list (parsed into a dict) ---
-@router.post("/figure-list", response_model=FigureListResponse)
-def gen_figure_list(req: GenerateRequest) -> FigureListResponse:
-    session = require_session(req.session_id)
-    content = _resolve_input(session, req)
+# --- Token streaming (server-sent events) ---
+# Streamable text endpoints and the prompt each one uses.
+_STREAM_PROMPTS = {
+    "title": "title",
+    "subtitle": "subtitle",
+    "science": "science",
+    "impact": "impact",
+    "summary": "summary",
+    "citation": "citation",
+    "funding": "funding",
+    "objective": "objective",
+    "search-strings": "figure",
+    "image-caption": "figure_caption",
+    "figure-caption": "selected_figure_caption",
+}
+_QUOTE_STRIPPED = {"citation", "funding"}
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _stream_text_prompt(
+    session: Session,
+    req: GenerateRequest,
+    section: str,
+    content: str,
+) -> AsyncIterator[str]:
+    prompt_name = _STREAM_PROMPTS[section]
     try:
-        user_prompt = hlt.generate_prompt(content=content, prompt_name="figure_list")
-        raw = generate_text(
+        user_prompt = _build_prompt(content, prompt_name, req.additional_content)
+        chunks: list[str] = []
+        async for delta in astream_text(
             user_prompt,
             api_key=session.api_key,
             base_url=session.base_url,
             model=session.model,
+            use_cache=not req.bypass_cache,
+        ):
+            chunks.append(delta)
+            yield _sse("token", {"delta": delta})
+        text = await _maybe_reduce_wordcount(
+            session,
+            "".join(chunks).strip(),
+            req.max_word_count,
+            req.min_word_count,
+            not req.bypass_cache,
+        )
+        resp = GenerateResponse(text=text, word_count=len(text.split()))
+        if section in _QUOTE_STRIPPED:
+            resp = _strip_quotes(resp)
+        yield _sse("done", resp.model_dump())
+    except Exception as exc:  # noqa: BLE001 - report in-band; headers are sent
+        yield _sse("error", {"detail": f"Generation failed for '{prompt_name}': {exc}"})
+
+
+@router.post("/stream/{section}")
+async def gen_stream(section: str, req: GenerateRequest) -> StreamingResponse:
+    """Stream a text section as server-sent events.
+
+    Emits ``token`` events (``{"delta"}``) while the model generates, then a
+    single ``done`` event carrying the final :class:`GenerateResponse`
+    (after any word-count reduction, so it may differ from the concatenated
+    tokens) or an ``error`` event (``{"detail"}``).
+    """
+    if section not in _STREAM_PROMPTS:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Streaming is not available for '{section}'.",
         )
+    session = await arequire_session(req.session_id)
+    content = _resolve_input(session, req)
+    return StreamingResponse(
+        _stream_text_prompt(session, req, section, content),
+        media_type="text/event-stream",
+        # Disable proxy buffering (Nginx) so tokens reach the browser promptly.
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# --- Figure list (parsed into a dict) ---
+@router.post("/figure-list", response_model=FigureListResponse)
+async def gen_figure_list(req: GenerateRequest) -> FigureListResponse:
+    session = await arequire_session(req.session_id)
+    content = _resolve_input(session, req)
+    try:
+        return await _generate_figure_list(session, content, not req.bypass_cache)
     except Exception as exc:  # noqa: BLE001
         raise HTTPException(
             status_code=status.HTTP_502_BAD_GATEWAY,
             detail=f"Figure list generation failed: {exc}",
         ) from exc
 
-    figures: dict[str, str] = {}
-    for line in raw.strip().split("\n"):
-        if line.strip().lower().startswith("table"):
-            continue
-        if " :: " in line:
-            identifier, description = line.split(" :: ", 1)
-            identifier = identifier.strip()
-            description = description.strip()
-            if identifier and description and not identifier.lower().startswith("table"):
-                figures[identifier] = description
-    return FigureListResponse(figures=figures)
-
 
 # --- Structured endpoints ---
 @router.post("/approach", response_model=StructuredResponse)
-def gen_approach(req: GenerateRequest) -> StructuredResponse:
-    session = require_session(req.session_id)
+async def gen_approach(req: GenerateRequest) -> StructuredResponse:
+    session = await arequire_session(req.session_id)
     content = _resolve_input(session, req)
     if not req.additional_content:
         raise HTTPException(
@@ -191,19 +354,14 @@ def gen_approach(req: GenerateRequest) -> StructuredResponse:
             detail="The objective statement is required to generate the approach.",
         )
     try:
-        user_prompt = hlt.generate_prompt(
-            content=content,
-            prompt_name="approach",
-            additional_content=req.additional_content,
-        )
-        result = generate_structured(
-            user_prompt,
+        return await _generate_section_points(
+            session,
+            content,
+            "approach",
             hlt.ApproachPoints,
-            api_key=session.api_key,
-            base_url=session.base_url,
-            model=session.model,
+            additional_content=req.additional_content,
+            use_cache=not req.bypass_cache,
         )
-        return StructuredResponse(points=result.points)
     except Exception as exc:  # noqa: BLE001
         raise HTTPException(
             status_code=status.HTTP_502_BAD_GATEWAY,
@@ -212,21 +370,145 @@ def gen_approach(req: GenerateRequest) -> StructuredResponse:
 
 
 @router.post("/ppt-impact", response_model=StructuredResponse)
-def gen_ppt_impact(req: GenerateRequest) -> StructuredResponse:
-    session = require_session(req.session_id)
+async def gen_ppt_impact(req: GenerateRequest) -> StructuredResponse:
+    session = await arequire_session(req.session_id)
     content = _resolve_input(session, req)
     try:
-        user_prompt = hlt.generate_prompt(content=content, prompt_name="ppt_impact")
-        result = generate_structured(
-            user_prompt,
-            hlt.ImpactPoints,
-            api_key=session.api_key,
-            base_url=session.base_url,
-            model=session.model,
+        return await _generate_section_points(
+            session, content, "ppt_impact", hlt.ImpactPoints, use_cache=not req.bypass_cache
         )
-        return StructuredResponse(points=result.points)
     except Exception as exc:  # noqa: BLE001
         raise HTTPException(
             status_code=status.HTTP_502_BAD_GATEWAY,
             detail=f"Impact points generation failed: {exc}",
         ) from exc
+
+
+# --- Full highlight (dependency graph of all sections) ---
+def _highlight_tasks(
+    session: Session, content: str, use_cache: bool = True
+) -> dict[str, DagTask]:
+    """Build the section graph, keyed by the per-section endpoint names.
+
+    Word-count windows match the ones the frontend requests per section.
+    """
+
+    def text(prompt_name: str, max_words=None, min_words=None, strip_quotes=False):
+        async def run(_inputs: Mapping[str, Any]) -> GenerateResponse:
+            resp = await _generate_section_text(
+                session, content, prompt_name, None, max_words, min_words, use_cache
+            )
+            return _strip_quotes(resp) if strip_quotes else resp
+
+        return DagTask(run)
+
+    async def subtitle(inputs):
+        return await _generate_section_text(
+            session, content, "subtitle", inputs["title"].text, 100, 75, use_cache
+        )
+
+    async def approach(inputs):
+        return await _generate_section_points(
+            session,
+            content,
+            "approach",
+            hlt.ApproachPoints,
+            inputs["objective"].text,
+            use_cache,
+        )
+
+    async def ppt_impact(_inputs):
+        return await _generate_section_points(
+            session, content, "ppt_impact", hlt.ImpactPoints, use_cache=use_cache
+        )
+
+    async def figure_list(_inputs):
+        return await _generate_figure_list(session, content, use_cache)
+
+    # Search strings and the image caption operate on the general summary.
+    async def search_strings(inputs):
+        return await _generate_section_text(
+            session, inputs["summary"].text, "figure", use_cache=use_cache
+        )
+
+    async def image_caption(inputs):
+        return await _generate_section_text(
+            session, inputs["summary"].text, "figure_caption", None, 30, 10, use_cache
+        )
+
+    return {
+        "title": text("title"),
+        "subtitle": DagTask(subtitle, deps=("title",)),
+        "science": text("science", 100, 75),
+        "impact": text("impact", 100, 75),
+        "summary": text("summary", 200, 100),
+        "citation": text("citation", strip_quotes=True),
+        "funding": text("funding", strip_quotes=True),
+        "objective": text("objective"),
+        "approach": DagTask(approach, deps=("objective",)),
+        "ppt-impact": DagTask(ppt_impact),
+        "figure-list": DagTask(figure_list),
+        "search-strings": DagTask(search_strings, deps=("summary",)),
+        "image-caption": DagTask(image_caption, deps=("summary",)),
+    }
+
+
+def _select_sections(
+    tasks: dict[str, DagTask], requested: Optional[list[str]]
+) -> dict[str, DagTask]:
+    """Restrict ``tasks`` to ``requested`` plus everything they depend on."""
+    if not requested:
+        return tasks
+    unknown = sorted(set(requested) - set(tasks))
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown section(s): {', '.join(unknown)}. "
+            f"Valid sections: {', '.join(tasks)}.",
+        )
+    selected: set = set()
+    stack = list(requested)
+    while stack:
+        name = stack.pop()
+        if name not in selected:
+            selected.add(name)
+            stack.extend(tasks[name].deps)
+    return {name: task for name, task in tasks.items() if name in selected}
+
+
+async def _stream_highlight(tasks: dict[str, DagTask]) -> AsyncIterator[str]:
+    async for outcome in run_dag(tasks):
+        event: dict[str, Any] = {
+            "section": outcome.name,
+            "elapsed_ms": round(outcome.elapsed * 1000),
+        }
+        if outcome.ok:
+            event["status"] = "ok"
+            event["result"] = outcome.result.model_dump()
+        else:
+            event["status"] = "error"
+            event["detail"] = f"Generation failed for '{outcome.name}': {outcome.error}"
+        yield json.dumps(event) + "\n"
+
+
+@router.post("/highlight")
+async def gen_highlight(req: HighlightRequest) -> StreamingResponse:
+    """Generate every section concurrently, streaming NDJSON as each completes.
+
+    Each line is ``{"section", "status": "ok"|"error", "result"|"detail",
+    "elapsed_ms"}``. Independent sections run in parallel; dependent ones
+    (subtitle <- title, approach <- objective, search-strings and
+    image-caption <- summary) start as soon as their input is ready.
+    """
+    session = await arequire_session(req.session_id)
+    content = (
+        req.content_override
+        if req.content_override is not None
+        else require_content(session)
+    )
+    tasks = _select_sections(
+        _highlight_tasks(session, content, not req.bypass_cache), req.sections
+    )
+    return StreamingResponse(
+        _stream_highlight(tasks), media_type="application/x-ndjson"
+    )
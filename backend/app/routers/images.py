@@ -1,78 +1,509 @@
-"""Images router: Wikimedia search/proxy and PDF image extraction."""
+"""Images router: Wikimedia search/proxy and PDF image listing/serving."""
 
 from __future__ import annotations
 
-import base64
+import asyncio
+import json
+import time
+from contextlib import AsyncExitStack
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Optional
+from urllib.parse import urlencode
 
 import highlight as hlt
-import requests
-from fastapi import APIRouter, HTTPException, Query, status
-from fastapi.responses import Response
+import httpx
+from fastapi import APIRouter, Header, HTTPException, Query, status
+from fastapi.responses import FileResponse, Response, StreamingResponse
 
-from ..deps import require_session
+from .. import wikimedia
+from ..config import get_settings
+from ..deps import arequire_session, etag_matches, require_session
+from ..http import http_pool
+from ..ingest import image_pool
+from ..proxy_cache import CachedImage, proxy_cache
+from ..renders import MIN_DPI, render_cache, render_key, resolve_dpi
 from ..schemas import (
+    FigureRegionInfo,
+    FigureRegionsResponse,
     PdfImageInfo,
     PdfImagesResponse,
+    RankedWikimediaImage,
+    WikimediaBatchSearchRequest,
+    WikimediaBatchSearchResponse,
     WikimediaImage,
+    WikimediaQueryOutcome,
     WikimediaSearchResponse,
 )
+from ..session import Session
+from ..workers import PoolBusyError
 
 router = APIRouter(prefix="/images", tags=["images"])
 
-_USER_AGENT = (
-    "PAIGE/1.0 (https://github.com/crvernon/highlight; chris.vernon@pnnl.gov)"
-)
+# Session-scoped, content-addressed responses: private but never stale.
+_IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+# Proxied third-party images: shareable, revalidated daily via ETag.
+_PROXY_CACHE_CONTROL = "public, max-age=86400"
+# Size of the chunks an uncached proxied body is read and relayed in.
+_RELAY_CHUNK_BYTES = 64 * 1024
 
 
 @router.get("/wikimedia", response_model=WikimediaSearchResponse)
-def wikimedia_search(
+async def wikimedia_search(
     query: str = Query(..., min_length=1),
     limit: int = Query(9, ge=1, le=30),
 ) -> WikimediaSearchResponse:
-    raw = hlt.search_wikimedia_commons(query=query, limit=limit)
+    raw = await wikimedia.search(query=query, limit=limit)
     return WikimediaSearchResponse(results=[WikimediaImage(**item) for item in raw])
 
 
+@router.post("/wikimedia/batch", response_model=WikimediaBatchSearchResponse)
+async def wikimedia_batch_search(
+    req: WikimediaBatchSearchRequest,
+) -> WikimediaBatchSearchResponse:
+    """Search several phrases at once and return one merged, ranked list.
+
+    Images found by more than one query are listed once, ranked above those
+    matched by a single query. Per-query failures are reported in
+    ``queries`` without discarding the other results.
+    """
+    settings = get_settings()
+    queries = [query for query in req.queries if query.strip()]
+    if not queries or len(queries) > settings.wikimedia_batch_max_queries:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                "Provide between 1 and "
+                f"{settings.wikimedia_batch_max_queries} search queries."
+            ),
+        )
+    results, outcomes = await wikimedia.search_many(
+        queries, req.limit, max_concurrency=settings.wikimedia_batch_concurrency
+    )
+    if req.max_results is not None:
+        results = results[: req.max_results]
+    return WikimediaBatchSearchResponse(
+        results=[RankedWikimediaImage(**item) for item in results],
+        queries=[WikimediaQueryOutcome(**outcome) for outcome in outcomes],
+    )
+
+
 @router.get("/proxy")
-def proxy_image(url: str = Query(..., min_length=1)) -> Response:
-    """Fetch an image server-side to avoid client CORS / User-Agent issues."""
+async def proxy_image(
+    url: str = Query(..., min_length=1),
+    if_none_match: Optional[str] = Header(default=None),
+    if_modified_since: Optional[str] = Header(default=None),
+) -> Response:
+    """Fetch an image server-side to avoid client CORS / User-Agent issues.
+
+    Cached images are served from disk with ETag, Last-Modified and Range
+    support. Otherwise the upstream body is streamed through in chunks and
+    written to the cache as it goes (a Range header is ignored on that first
+    fetch and the whole image is returned). The body is read ahead of the
+    browser, so a slow client does not keep the upstream host's request slot.
+    """
     if not url.startswith(("http://", "https://")):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid image URL."
         )
+    cached = await asyncio.to_thread(proxy_cache.lookup, url)
+    if cached is not None:
+        headers = {
+            "ETag": cached.etag,
+            "Last-Modified": cached.last_modified,
+            "Cache-Control": _PROXY_CACHE_CONTROL,
+        }
+        if _not_modified(cached, if_none_match, if_modified_since):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return FileResponse(cached.path, media_type=cached.content_type, headers=headers)
+
+    upstream_context = AsyncExitStack()
     try:
-        resp = requests.get(
-            url, timeout=30, headers={"User-Agent": _USER_AGENT}, stream=True
-        )
-        resp.raise_for_status()
-    except requests.RequestException as exc:
+        upstream = await upstream_context.enter_async_context(http_pool.stream(url))
+    except httpx.HTTPError as exc:
+        await upstream_context.aclose()
         raise HTTPException(
             status_code=status.HTTP_502_BAD_GATEWAY,
             detail=f"Failed to fetch image: {exc}",
         ) from exc
 
-    content_type = resp.headers.get("Content-Type", "application/octet-stream")
-    return Response(content=resp.content, media_type=content_type)
+    headers = {"Cache-Control": _PROXY_CACHE_CONTROL}
+    for name in ("ETag", "Last-Modified"):
+        if name in upstream.headers:
+            headers[name] = upstream.headers[name]
+    return StreamingResponse(
+        _relay_image(url, upstream, upstream_context),
+        media_type=upstream.headers.get("Content-Type", "application/octet-stream"),
+        headers=headers,
+    )
 
 
-@router.post("/pdf-extract", response_model=PdfImagesResponse)
-def pdf_extract(session_id: str) -> PdfImagesResponse:
-    session = require_session(session_id)
+def _not_modified(
+    cached: CachedImage, if_none_match: Optional[str], if_modified_since: Optional[str]
+) -> bool:
+    if if_none_match:
+        return etag_matches(if_none_match, cached.etag)
+    if not if_modified_since:
+        return False
+    try:
+        return parsedate_to_datetime(cached.last_modified) <= parsedate_to_datetime(
+            if_modified_since
+        )
+    except (TypeError, ValueError):
+        return False
+
+
+async def _relay_image(
+    url: str, upstream: httpx.Response, upstream_context: AsyncExitStack
+) -> AsyncIterator[bytes]:
+    """Yield the upstream body chunk by chunk, writing it through to the cache.
+
+    A reader task pulls the body up to ``proxy_read_ahead_bytes`` ahead of
+    the browser and closes the upstream response -- releasing its host slot
+    in :data:`~app.http.http_pool` -- as soon as the body has been read.
+    """
+    read_ahead = max(1, get_settings().proxy_read_ahead_bytes // _RELAY_CHUNK_BYTES)
+    chunks: asyncio.Queue = asyncio.Queue(maxsize=read_ahead)
+    reader = asyncio.ensure_future(_read_upstream(url, upstream, upstream_context, chunks))
+    try:
+        while True:
+            item = await chunks.get()
+            if isinstance(item, BaseException):
+                raise item
+            if item is None:
+                break
+            yield item
+    finally:
+        # Reached on completion, upstream errors and client disconnects alike.
+        reader.cancel()
+        await asyncio.gather(reader, return_exceptions=True)
+
+
+async def _read_upstream(
+    url: str,
+    upstream: httpx.Response,
+    upstream_context: AsyncExitStack,
+    chunks: asyncio.Queue,
+) -> None:
+    """Feed the upstream body into ``chunks`` and the cache, then ``None``.
+
+    An upstream error is queued in place of the final ``None``.
+    """
+    staged = None
+    outcome: Optional[Exception] = None
+    try:
+        if proxy_cache.cacheable(upstream.status_code, upstream.headers):
+            staged = await asyncio.to_thread(proxy_cache.stage, url)
+        async for chunk in upstream.aiter_bytes(_RELAY_CHUNK_BYTES):
+            if staged is not None:
+                if staged.size + len(chunk) > proxy_cache.max_object_bytes:
+                    staged.discard()
+                    staged = None
+                else:
+                    staged.write(chunk)
+            await chunks.put(chunk)
+        await upstream_context.aclose()
+        if staged is not None:
+            await asyncio.to_thread(proxy_cache.commit, url, staged, upstream.headers)
+            staged = None
+    except Exception as exc:  # noqa: BLE001 - re-raised by the relaying generator
+        outcome = exc
+    finally:
+        if staged is not None:
+            staged.discard()
+        await upstream_context.aclose()
+    await chunks.put(outcome)
+
+
+def _require_image_index(session: Session) -> hlt.PdfImageIndex:
     if not session.pdf_bytes:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="No PDF is associated with this session.",
         )
-    extracted = hlt.extract_images_from_pdf(session.pdf_bytes)
+    return session.document.image_index()
+
+
+@router.post("/pdf-extract", response_model=PdfImagesResponse)
+def pdf_extract(session_id: str, include_all: bool = False) -> PdfImagesResponse:
+    """List the PDF's candidate figures as metadata.
+
+    Soft masks, images below the configured size thresholds and duplicates
+    are left out (and counted in ``skipped``) unless ``include_all`` is set.
+    Full-resolution bytes are fetched per image from ``GET /images/pdf/{index}``
+    and JPEG thumbnails from the same endpoint with ``thumb=true``.
+    """
+    image_index = _require_image_index(require_session(session_id))
+    settings = get_settings()
+    if include_all:
+        entries, skipped = image_index.entries, {}
+    else:
+        entries, skipped = image_index.candidates(
+            min_dimension=settings.pdf_image_min_dimension,
+            min_bytes=settings.pdf_image_min_bytes,
+            dedupe_distance=(
+                settings.pdf_image_dedupe_distance
+                if settings.pdf_image_dedupe_distance >= 0
+                else None
+            ),
+        )
+    max_px = settings.pdf_thumbnail_max_px
     images = []
-    for item in extracted:
-        b64 = base64.b64encode(item["bytes"]).decode()
-        images.append(
-            PdfImageInfo(
-                index=item["index"],
-                page=item["page"],
-                data_url=f"data:image/png;base64,{b64}",
-                mime="image/png",
+    for entry in entries:
+        mime = image_index.mime_type(entry.xref)
+        if mime is None:
+            continue
+        has_thumbnail = image_index.thumbnail(entry.xref, max_px) is not None
+        images.append(_image_info(session_id, entry, mime, has_thumbnail))
+    return PdfImagesResponse(images=images, skipped=skipped)
+
+
+def _image_info(
+    session_id: str,
+    entry: hlt.PdfImageEntry,
+    mime: str,
+    has_thumbnail: bool,
+) -> PdfImageInfo:
+    url = f"/api/images/pdf/{entry.index}?{urlencode({'session_id': session_id})}"
+    return PdfImageInfo(
+        index=entry.index,
+        page=entry.page,
+        xref=entry.xref,
+        width=entry.width,
+        height=entry.height,
+        mime=mime,
+        url=url,
+        thumbnail_url=f"{url}&thumb=true" if has_thumbnail else None,
+    )
+
+
+async def _stream_pdf_images(
+    session: Session, image_index: hlt.PdfImageIndex, include_all: bool
+) -> AsyncIterator[str]:
+    settings = get_settings()
+    started = time.monotonic()
+    options = {
+        "thumbnail_size": settings.pdf_thumbnail_max_px,
+        "skip_masks": not include_all,
+    }
+    dedupe_distance = None
+    if not include_all:
+        options["min_dimension"] = settings.pdf_image_min_dimension
+        options["min_bytes"] = settings.pdf_image_min_bytes
+        if settings.pdf_image_dedupe_distance >= 0:
+            dedupe_distance = settings.pdf_image_dedupe_distance
+
+    pdf_path = await asyncio.to_thread(session.document.pdf_path)
+    queued = iter(
+        hlt.page_shards(image_index.page_count, settings.pdf_image_pages_per_shard)
+    )
+    # At most one shard per pool worker is submitted at a time, so a long
+    # document never overruns the pool's admitted backlog and other requests
+    # still get a turn.
+    running: dict = {}
+
+    def submit_next() -> None:
+        shard = next(queued, None)
+        if shard is not None:
+            task = asyncio.ensure_future(
+                image_pool.run(hlt.extract_page_range, pdf_path, *shard, **options)
+            )
+            running[task] = shard
+
+    skipped = dict.fromkeys(("mask", "small", "duplicate", "low_bytes"), 0)
+    failed_pages: list[int] = []
+    kept_xrefs: set = set()
+    kept_hashes: list[int] = []
+    try:
+        for _ in range(image_pool.max_workers):
+            submit_next()
+        while running:
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            shard = done.pop()
+            start, stop = running.pop(shard)
+            submit_next()
+            try:
+                records = shard.result()
+            except Exception as exc:  # noqa: BLE001 - report in-band; headers are sent
+                pages = list(range(start + 1, stop + 1))
+                failed_pages.extend(pages)
+                yield json.dumps(
+                    {"type": "error", "pages": pages, "detail": f"Image scan failed: {exc}"}
+                ) + "\n"
+                continue
+            for record in records:
+                for reason, count in record["skipped"].items():
+                    skipped[reason] += count
+                images = []
+                for image in record["images"]:
+                    entry = image_index.entry_at(record["page"], image["slot"])
+                    if entry is None:
+                        continue
+                    if not include_all:
+                        image_hash = image["hash"] if dedupe_distance is not None else None
+                        if entry.xref in kept_xrefs or (
+                            image_hash is not None
+                            and any(
+                                bin(image_hash ^ other).count("1") <= dedupe_distance
+                                for other in kept_hashes
+                            )
+                        ):
+                            skipped["duplicate"] += 1
+                            continue
+                        kept_xrefs.add(entry.xref)
+                        if image_hash is not None:
+                            kept_hashes.append(image_hash)
+                    # Served by GET /images/pdf/{index}?thumb=true without
+                    # rendering it again in this process.
+                    image_index.add_thumbnail(
+                        entry.xref, settings.pdf_thumbnail_max_px, image["thumbnail"]
+                    )
+                    info = _image_info(
+                        session.session_id,
+                        entry,
+                        hlt.image_mime_type(image["ext"]),
+                        image["thumbnail"] is not None,
+                    )
+                    images.append(info.model_dump())
+                yield json.dumps(
+                    {
+                        "type": "page",
+                        "page": record["page"],
+                        "elapsed_ms": round(record["elapsed"] * 1000, 1),
+                        "images": images,
+                    }
+                ) + "\n"
+        yield json.dumps(
+            {
+                "type": "done",
+                "pages": image_index.page_count,
+                "failed_pages": sorted(failed_pages),
+                "skipped": skipped,
+                "elapsed_ms": round((time.monotonic() - started) * 1000),
+            }
+        ) + "\n"
+    finally:
+        for shard in running:
+            shard.cancel()
+
+
+@router.post("/pdf-extract/stream")
+async def pdf_extract_stream(session_id: str, include_all: bool = False) -> StreamingResponse:
+    """Scan the PDF's pages in parallel shards, streaming images as NDJSON.
+
+    Emits one ``{"type": "page", "page", "elapsed_ms", "images"}`` line per
+    page as soon as its shard finishes (so pages may arrive out of order),
+    ``{"type": "error", "pages", "detail"}`` for a shard that failed, and a
+    final ``{"type": "done", "pages", "failed_pages", "skipped",
+    "elapsed_ms"}``. ``elapsed_ms`` on
+    a page line is the time spent scanning that page. ``images`` items match
+    :class:`PdfImageInfo` (with the MIME type inferred from the stream
+    filter). Duplicates are dropped in arrival order, so which copy of a
+    repeated figure is kept may differ from ``/pdf-extract``.
+    """
+    session = await arequire_session(session_id)
+    image_index = await asyncio.to_thread(_require_image_index, session)
+    return StreamingResponse(
+        _stream_pdf_images(session, image_index, include_all),
+        media_type="application/x-ndjson",
+    )
+
+
+@router.get("/pdf/{index}")
+def pdf_image(
+    index: int,
+    session_id: str,
+    thumb: bool = False,
+    if_none_match: Optional[str] = Header(default=None),
+) -> Response:
+    """Serve one embedded PDF image at full resolution with its real MIME type.
+
+    With ``thumb`` the listing's JPEG preview is served instead. The bytes
+    are fixed for a given document and xref, so the ETag is derived from both
+    and the response may be cached indefinitely by the browser.
+    """
+    session = require_session(session_id)
+    image_index = _require_image_index(session)
+    entry = image_index.by_index(index)
+    if entry is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Image not found."
+        )
+    max_px = get_settings().pdf_thumbnail_max_px
+    variant = f"-thumb{max_px}" if thumb else ""
+    etag = f'"{session.document.digest[:16]}-{entry.xref}{variant}"'
+    headers = {"ETag": etag, "Cache-Control": _IMMUTABLE_CACHE_CONTROL}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    if thumb:
+        thumbnail = image_index.thumbnail(entry.xref, max_px)
+        if thumbnail is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Thumbnail could not be rendered."
             )
+        return Response(content=thumbnail, media_type="image/jpeg", headers=headers)
+    image_bytes = image_index.image_bytes(entry.xref)
+    if image_bytes is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Image could not be extracted."
+        )
+    return Response(
+        content=image_bytes,
+        media_type=image_index.mime_type(entry.xref),
+        headers=headers,
+    )
+
+
+@router.get("/figures", response_model=FigureRegionsResponse)
+def figure_regions(session_id: str) -> FigureRegionsResponse:
+    """List captioned figures located on the PDF's pages.
+
+    Covers figures drawn as vector graphics, which have no embedded image to
+    extract; each is served as a rendered PNG from ``GET /images/figures/{index}``.
+    """
+    session = require_session(session_id)
+    _require_image_index(session)
+    query = urlencode({"session_id": session_id})
+    figures = [
+        FigureRegionInfo(
+            index=index,
+            page=region.page,
+            bbox=list(region.bbox),
+            label=region.label,
+            caption=region.caption,
+            url=f"/api/images/figures/{index}?{query}",
+            thumbnail_url=f"/api/images/figures/{index}?{query}&dpi={MIN_DPI}",
         )
-    return PdfImagesResponse(images=images)
+        for index, region in enumerate(session.document.figure_regions())
+    ]
+    return FigureRegionsResponse(figures=figures)
+
+
+@router.get("/figures/{index}")
+async def figure_region_image(
+    index: int,
+    session_id: str,
+    dpi: Optional[int] = Query(None, ge=1),
+    if_none_match: Optional[str] = Header(default=None),
+) -> Response:
+    """Serve one figure region rendered as PNG, from the on-disk render cache."""
+    session = await arequire_session(session_id)
+    await asyncio.to_thread(_require_image_index, session)
+    regions = await asyncio.to_thread(session.document.figure_regions)
+    if not 0 <= index < len(regions):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Figure not found."
+        )
+    region, dpi = regions[index], resolve_dpi(dpi)
+    stem = render_key(region, dpi).removesuffix(".png")
+    etag = f'"{session.document.digest[:16]}-{stem}"'
+    headers = {"ETag": etag, "Cache-Control": _IMMUTABLE_CACHE_CONTROL}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    try:
+        png = await render_cache.arender(session.document, region, dpi)
+    except PoolBusyError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(exc),
+        ) from exc
+    return Response(content=png, media_type="image/png", headers=headers)
@@ -1,4 +1,4 @@
-"""Miscellaneous router: health check and logo asset."""
+"""Miscellaneous router: health check, runtime metrics and logo asset."""
 
 from __future__ import annotations
 
@@ -7,6 +7,20 @@ import importlib.resources
 from fastapi import APIRouter, HTTPException, status
 from fastapi.responses import Response
 
+from ..agent import pool_stats
+from ..documents import document_cache
+from ..export_cache import export_cache
+from ..export_jobs import export_pool
+from ..export_templates import export_templates
+from ..http import http_pool
+from ..image_prep import prepared_images
+from ..ingest import image_pool, ingest_pool
+from ..llm_cache import get_response_cache
+from ..proxy_cache import proxy_cache
+from ..renders import render_cache
+from ..session import store
+from ..wikimedia import search_cache
+
 router = APIRouter(tags=["misc"])
 
 
@@ -15,6 +29,28 @@ def health() -> dict:
     return {"status": "ok"}
 
 
+@router.get("/metrics")
+def metrics() -> dict:
+    """Return counters for the worker pools and in-process caches."""
+    cache = get_response_cache()
+    return {
+        "ingest": ingest_pool.stats(),
+        "images": image_pool.stats(),
+        "export": export_pool.stats(),
+        "documents": document_cache.stats(),
+        "renders": render_cache.stats(),
+        "sessions": store.stats(),
+        "llm_pool": pool_stats(),
+        "http": http_pool.stats(),
+        "wikimedia_cache": search_cache.stats(),
+        "proxy_cache": proxy_cache.stats(),
+        "export_images": prepared_images.stats(),
+        "export_templates": export_templates.stats(),
+        "export_cache": export_cache.stats(),
+        "llm_cache": cache.stats() if cache is not None else {"enabled": False},
+    }
+
+
 @router.get("/logo")
 def logo() -> Response:
     """Serve the IM3 logo used in the app header."""
@@ -2,14 +2,17 @@
 
 from __future__ import annotations
 
-import io
+import asyncio
 
 from fastapi import APIRouter, File, Form, HTTPException, UploadFile, status
 
-import highlight as hlt
 from ..config import get_settings
-from ..deps import require_session
+from ..deps import arequire_session
+from ..documents import document_cache
+from ..ingest import detect_kind
 from ..schemas import UploadResponse
+from ..session import store
+from ..workers import PoolBusyError
 
 router = APIRouter(prefix="/upload", tags=["upload"])
 
@@ -19,38 +22,44 @@ async def upload(
     session_id: str = Form(...),
     file: UploadFile = File(...),
 ) -> UploadResponse:
-    session = require_session(session_id)
+    session = await arequire_session(session_id)
     settings = get_settings()
 
     raw = await file.read()
     content_type = file.content_type or ""
     filename = file.filename or "upload"
 
-    pdf_bytes = None
-    if content_type == "application/pdf" or filename.lower().endswith(".pdf"):
-        pdf_bytes = raw
-        content_dict = hlt.read_pdf(io.BytesIO(raw))
-    elif content_type == "text/plain" or filename.lower().endswith(".txt"):
-        content_dict = hlt.read_text(io.BytesIO(raw))
-    else:
+    kind = detect_kind(filename, content_type)
+    if kind is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Unsupported file type. Upload a PDF or text file.",
         )
 
+    # Known documents are served from the shared cache; new ones are parsed
+    # on the ingest pool so the event loop keeps serving other requests.
+    try:
+        document = await document_cache.load(raw, kind)
+    except PoolBusyError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(exc),
+        ) from exc
+
     # Persist on the session for subsequent generation calls.
-    session.content = content_dict["content"]
+    session.document = document
     session.filename = filename
-    session.stats = content_dict
-    session.pdf_bytes = pdf_bytes
+    # The SQLite backend writes the document blobs here.
+    await asyncio.to_thread(store.update, session)
 
+    stats = document.stats
     return UploadResponse(
         filename=filename,
-        n_pages=content_dict["n_pages"],
-        n_characters=content_dict["n_characters"],
-        n_words=content_dict["n_words"],
-        n_tokens=content_dict["n_tokens"],
+        n_pages=stats["n_pages"],
+        n_characters=stats["n_characters"],
+        n_words=stats["n_words"],
+        n_tokens=stats["n_tokens"],
         max_allowable_tokens=settings.max_allowable_tokens,
-        exceeds_limit=content_dict["n_tokens"] > settings.max_allowable_tokens,
-        has_pdf_images=pdf_bytes is not None,
+        exceeds_limit=stats["n_tokens"] > settings.max_allowable_tokens,
+        has_pdf_images=document.pdf_bytes is not None,
     )
@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -46,6 +46,8 @@ class GenerateRequest(BaseModel):
     content_override: Optional[str] = None
     max_word_count: Optional[int] = None
     min_word_count: Optional[int] = None
+    # Skip the LLM response cache (when enabled) and force a fresh completion.
+    bypass_cache: bool = False
 
 
 class GenerateResponse(BaseModel):
@@ -57,6 +59,17 @@ class StructuredResponse(BaseModel):
     points: List[str]
 
 
+class HighlightRequest(BaseModel):
+    """Generate several sections in one call (streamed back as NDJSON)."""
+
+    session_id: str
+    # Section names (the /generate/<name> endpoints). Omit for all sections;
+    # dependencies of the requested sections are generated too.
+    sections: Optional[List[str]] = None
+    content_override: Optional[str] = None
+    bypass_cache: bool = False
+
+
 # --- Wikimedia ---
 class WikimediaImage(BaseModel):
     id: Optional[int] = None
@@ -75,17 +88,69 @@ class WikimediaSearchResponse(BaseModel):
     results: List[WikimediaImage]
 
 
+class WikimediaBatchSearchRequest(BaseModel):
+    queries: List[str]
+    # Results requested from Commons per query.
+    limit: int = Field(9, ge=1, le=30)
+    # Cap on the merged result list (all merged results when omitted).
+    max_results: Optional[int] = Field(None, ge=1)
+
+
+class RankedWikimediaImage(WikimediaImage):
+    # Reciprocal-rank-fusion score over the queries that found the image.
+    score: float
+    matched_queries: List[str]
+
+
+class WikimediaQueryOutcome(BaseModel):
+    query: str
+    count: int
+    # Upstream failure for this query (its results are simply missing).
+    error: Optional[str] = None
+
+
+class WikimediaBatchSearchResponse(BaseModel):
+    results: List[RankedWikimediaImage]
+    queries: List[WikimediaQueryOutcome]
+
+
 # --- PDF image extraction ---
 class PdfImageInfo(BaseModel):
     index: int
     page: int
-    # Base64-encoded image bytes for preview/transport.
-    data_url: str
-    mime: str = "image/png"
+    xref: int
+    width: int
+    height: int
+    # MIME type of the full-resolution image served at ``url``.
+    mime: str
+    # Path of the binary full-resolution image endpoint.
+    url: str
+    # Path of the small JPEG preview (``None`` if it cannot be decoded).
+    thumbnail_url: Optional[str] = None
 
 
 class PdfImagesResponse(BaseModel):
     images: List[PdfImageInfo]
+    # Images left out of the listing, by reason (mask/small/duplicate/low_bytes).
+    skipped: Dict[str, int] = {}
+
+
+class FigureRegionInfo(BaseModel):
+    index: int
+    page: int
+    # Region in PDF points (x0, y0, x1, y1), above the caption.
+    bbox: List[float]
+    # "Figure 3"-style label and caption text found below the figure.
+    label: str
+    caption: str
+    # Path of the rendered PNG endpoint (accepts an optional ``dpi``).
+    url: str
+    # Same endpoint at a low resolution, for previews.
+    thumbnail_url: str
+
+
+class FigureRegionsResponse(BaseModel):
+    figures: List[FigureRegionInfo]
 
 
 # --- Exports ---
@@ -125,6 +190,23 @@ class PptExportRequest(BaseModel):
     impact_points: List[str] = Field(default_factory=list)
     # Index into the extracted PDF images to embed in the slide (optional).
     figure_image_index: Optional[int] = None
+    # PDF object number of the figure image; takes precedence over the index.
+    figure_image_xref: Optional[int] = None
+    # Index into the rendered figure regions; takes precedence over the
+    # embedded image, with an optional render resolution.
+    figure_region_index: Optional[int] = None
+    figure_region_dpi: Optional[int] = None
+
+
+class BatchExportRequest(BaseModel):
+    # Highlights to export in one archive; each item carries its own session.
+    docx: List[WordExportRequest] = Field(default_factory=list)
+    pptx: List[PptExportRequest] = Field(default_factory=list)
+
+
+class DeckExportRequest(BaseModel):
+    # One slide per paper, in deck order; each carries its own session.
+    slides: List[PptExportRequest] = Field(default_factory=list)
 
 
 class FigureListResponse(BaseModel):
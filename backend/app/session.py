@@ -1,16 +1,36 @@
-"""In-memory session store.
+"""Session stores.
 
-Suitable for a single-instance EC2 deployment. Each session holds the resolved
-LLM credentials and the most recently uploaded document content so that
-generation endpoints don't need to re-transmit the full document body.
+Each session holds the resolved LLM credentials and a reference to the most
+recently uploaded document so that generation endpoints don't need to
+re-transmit the full document body. The document itself is shared through
+:mod:`app.documents`.
+
+Two backends implement :class:`SessionBackend`, selected by
+``SESSION_BACKEND``:
+
+* ``memory`` (:class:`InMemorySessionStore`) for a single uvicorn worker.
+* ``sqlite`` (:class:`~app.session_sqlite.SQLiteSessionStore`), shared by
+  every worker process so the API can run with ``uvicorn --workers N``.
+
+Sessions expire after ``SESSION_IDLE_TTL_SECONDS`` without use. A background
+sweeper (started by the app lifespan) reclaims idle sessions that are never
+looked up again.
 """
 
 from __future__ import annotations
 
+import abc
+import asyncio
+import logging
 import threading
+import time
 import uuid
+from collections import OrderedDict
 from dataclasses import dataclass, field
-from typing import Dict, Optional
+from typing import Mapping, Optional
+
+from .config import Settings, get_settings
+from .documents import Document
 
 
 @dataclass
@@ -22,20 +42,79 @@ class Session:
     base_url: str
     model: str
     active_project: str = "Other"
-    # Uploaded document
-    content: Optional[str] = None
+    # Uploaded document (shared, immutable) and the name this user gave it
+    document: Optional[Document] = None
     filename: Optional[str] = None
-    stats: dict = field(default_factory=dict)
-    # Raw PDF bytes retained for image extraction
-    pdf_bytes: Optional[bytes] = None
+    # Wall-clock time of the last lookup, used for idle expiry.
+    last_access: float = field(default_factory=time.time, repr=False)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory charged to this session (its document's content and bytes)."""
+        return self.document.nbytes if self.document else 0
+
+    @property
+    def content(self) -> Optional[str]:
+        return self.document.content if self.document else None
+
+    @property
+    def stats(self) -> Mapping[str, int]:
+        return self.document.stats if self.document else {}
+
+    @property
+    def pdf_bytes(self) -> Optional[bytes]:
+        return self.document.pdf_bytes if self.document else None
+
+
+class SessionBackend(abc.ABC):
+    """Interface shared by the session stores.
+
+    Sessions returned by :meth:`get` may be fresh copies, so callers must pass
+    a mutated session to :meth:`update` for the change to persist.
+    """
+
+    @abc.abstractmethod
+    def create(self, *, api_key: str, base_url: str, model: str, active_project: str) -> Session:
+        """Register and return a new session."""
+
+    @abc.abstractmethod
+    def get(self, session_id: str) -> Optional[Session]:
+        """Return a live session (refreshing its idle timer) or ``None``."""
+
+    @abc.abstractmethod
+    def update(self, session: Session) -> None:
+        """Persist changes to an existing session (e.g. a new document)."""
+
+    @abc.abstractmethod
+    def delete(self, session_id: str) -> None:
+        """Remove a session if it exists."""
+
+    @abc.abstractmethod
+    def sweep(self) -> int:
+        """Reclaim expired sessions; return how many were removed."""
+
+    @abc.abstractmethod
+    def stats(self) -> dict:
+        """Return counters for ``/api/metrics``."""
 
 
-class SessionStore:
-    """Thread-safe in-memory session registry."""
+class InMemorySessionStore(SessionBackend):
+    """Thread-safe in-memory session registry with idle TTL and a byte budget.
 
-    def __init__(self) -> None:
-        self._sessions: Dict[str, Session] = {}
+    A document shared by several sessions is charged to each of them, so the
+    budget is a conservative upper bound on the memory actually held.
+    """
+
+    def __init__(self, *, idle_ttl_seconds: float, max_bytes: int) -> None:
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.max_bytes = max_bytes
+        # Ordered least- to most-recently used.
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._charged: dict[str, int] = {}
+        self._bytes_held = 0
         self._lock = threading.Lock()
+        self._expired = 0
+        self._evicted = 0
 
     def create(self, *, api_key: str, base_url: str, model: str, active_project: str) -> Session:
         session_id = uuid.uuid4().hex
@@ -48,16 +127,127 @@ class SessionStore:
         )
         with self._lock:
             self._sessions[session_id] = session
+            self._charged[session_id] = 0
         return session
 
     def get(self, session_id: str) -> Optional[Session]:
+        now = time.time()
         with self._lock:
-            return self._sessions.get(session_id)
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            if self._is_expired(session, now):
+                self._remove_locked(session_id)
+                self._expired += 1
+                return None
+            session.last_access = now
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def update(self, session: Session) -> None:
+        """Re-account a session after its document changed.
+
+        Enforces the byte budget, evicting other least-recently-used sessions
+        first; the updated session itself is never evicted here.
+        """
+        with self._lock:
+            if session.session_id not in self._sessions:
+                return
+            self._charge_locked(session)
+            self._sessions.move_to_end(session.session_id)
+            self._enforce_budget_locked(keep=session.session_id)
 
     def delete(self, session_id: str) -> None:
         with self._lock:
-            self._sessions.pop(session_id, None)
+            self._remove_locked(session_id)
+
+    def sweep(self) -> int:
+        """Drop expired sessions and re-apply the byte budget.
+
+        Returns the number of sessions removed.
+        """
+        now = time.time()
+        with self._lock:
+            before = len(self._sessions)
+            for session_id, session in list(self._sessions.items()):
+                if self._is_expired(session, now):
+                    self._remove_locked(session_id)
+                    self._expired += 1
+                else:
+                    # Documents grow once their images are extracted.
+                    self._charge_locked(session)
+            self._enforce_budget_locked()
+            return before - len(self._sessions)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "live_sessions": len(self._sessions),
+                "bytes_held": self._bytes_held,
+                "max_bytes": self.max_bytes,
+                "idle_ttl_seconds": self.idle_ttl_seconds,
+                "expired": self._expired,
+                "evicted": self._evicted,
+            }
+
+    def _is_expired(self, session: Session, now: float) -> bool:
+        return now - session.last_access > self.idle_ttl_seconds
+
+    def _charge_locked(self, session: Session) -> None:
+        nbytes = session.nbytes
+        previous = self._charged.get(session.session_id, 0)
+        self._charged[session.session_id] = nbytes
+        self._bytes_held += nbytes - previous
+
+    def _remove_locked(self, session_id: str) -> None:
+        if self._sessions.pop(session_id, None) is not None:
+            self._bytes_held -= self._charged.pop(session_id, 0)
+
+    def _enforce_budget_locked(self, keep: Optional[str] = None) -> None:
+        for session_id in list(self._sessions):
+            if self._bytes_held <= self.max_bytes:
+                break
+            if session_id == keep:
+                continue
+            self._remove_locked(session_id)
+            self._evicted += 1
+
+
+def create_session_store(settings: Settings) -> SessionBackend:
+    """Build the session backend selected by ``settings.session_backend``."""
+    if settings.session_backend == "memory":
+        return InMemorySessionStore(
+            idle_ttl_seconds=settings.session_idle_ttl_seconds,
+            max_bytes=settings.session_max_bytes,
+        )
+    if settings.session_backend == "sqlite":
+        from .session_sqlite import SQLiteSessionStore
+
+        return SQLiteSessionStore(
+            settings.session_db_path,
+            blob_dir=settings.session_blob_dir,
+            idle_ttl_seconds=settings.session_idle_ttl_seconds,
+        )
+    raise ValueError(
+        f"Unknown SESSION_BACKEND '{settings.session_backend}'; "
+        "expected 'memory' or 'sqlite'."
+    )
+
+
+async def run_sweeper(session_store: SessionBackend, interval_seconds: float) -> None:
+    """Periodically sweep ``session_store`` until cancelled."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            # The SQLite backend prunes blob files from disk while sweeping.
+            removed = await asyncio.to_thread(session_store.sweep)
+        except Exception:  # noqa: BLE001 - keep the sweeper alive
+            logging.exception("Session sweep failed")
+            continue
+        if removed:
+            logging.info("Session sweep removed %d session(s)", removed)
 
 
 # Module-level singleton
-store = SessionStore()
+store = create_session_store(get_settings())
@@ -0,0 +1,223 @@
+"""SQLite session backend shared by multiple uvicorn worker processes.
+
+Session rows hold credentials and document metadata only. The document's
+text and raw PDF bytes live in a :class:`~app.blobs.BlobStore` keyed by the
+document digest, and are rehydrated through the process-local
+:data:`~app.documents.document_cache` so each worker reads a given document
+from disk at most once.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Optional
+
+from .blobs import BlobStore
+from .documents import Document, document_cache
+from .ingest import PDF
+from .session import Session, SessionBackend
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id      TEXT PRIMARY KEY,
+    api_key         TEXT NOT NULL,
+    base_url        TEXT NOT NULL,
+    model           TEXT NOT NULL,
+    active_project  TEXT NOT NULL,
+    filename        TEXT,
+    document_digest TEXT,
+    document_kind   TEXT,
+    document_stats  TEXT,
+    last_access     REAL NOT NULL
+)
+"""
+
+def _content_suffix(kind: str) -> str:
+    # The same bytes parsed as PDF or as text yield different content.
+    return f"{kind}.txt"
+
+
+class SQLiteSessionStore(SessionBackend):
+    """Session registry persisted in SQLite (WAL mode) with file-backed blobs.
+
+    The database stores user-supplied API keys, so the file and its WAL
+    sidecars are owner-only: the file is created 0600 before SQLite opens
+    it, and SQLite gives the ``-wal``/``-shm`` files the database's mode.
+    """
+
+    def __init__(
+        self,
+        db_path: str | os.PathLike,
+        *,
+        blob_dir: str | os.PathLike,
+        idle_ttl_seconds: float,
+    ) -> None:
+        self.db_path = str(db_path)
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.blobs = BlobStore(blob_dir)
+        self._local = threading.local()
+        self._expired = 0
+        self._counter_lock = threading.Lock()
+
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        os.close(os.open(self.db_path, os.O_CREAT | os.O_WRONLY, 0o600))
+        os.chmod(self.db_path, 0o600)
+        conn = self._conn()
+        conn.execute(_SCHEMA)
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS sessions_last_access ON sessions (last_access)"
+        )
+        # Sidecars left by an earlier version that created them world-readable.
+        for sidecar in (f"{self.db_path}-wal", f"{self.db_path}-shm"):
+            if os.path.exists(sidecar):
+                os.chmod(sidecar, 0o600)
+
+    def _conn(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def create(self, *, api_key: str, base_url: str, model: str, active_project: str) -> Session:
+        session = Session(
+            session_id=uuid.uuid4().hex,
+            api_key=api_key,
+            base_url=base_url,
+            model=model,
+            active_project=active_project,
+        )
+        self._conn().execute(
+            "INSERT INTO sessions (session_id, api_key, base_url, model, "
+            "active_project, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                session.session_id,
+                session.api_key,
+                session.base_url,
+                session.model,
+                session.active_project,
+                session.last_access,
+            ),
+        )
+        return session
+
+    def get(self, session_id: str) -> Optional[Session]:
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT * FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        if now - row["last_access"] > self.idle_ttl_seconds:
+            conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            with self._counter_lock:
+                self._expired += 1
+            return None
+
+        document = None
+        if row["document_digest"]:
+            document = self._load_document(
+                row["document_digest"], row["document_kind"], row["document_stats"]
+            )
+            if document is None:
+                # Blobs were pruned out from under the row; treat as expired.
+                conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+                return None
+
+        conn.execute(
+            "UPDATE sessions SET last_access = ? WHERE session_id = ?",
+            (now, session_id),
+        )
+        return Session(
+            session_id=row["session_id"],
+            api_key=row["api_key"],
+            base_url=row["base_url"],
+            model=row["model"],
+            active_project=row["active_project"],
+            document=document,
+            filename=row["filename"],
+            last_access=now,
+        )
+
+    def update(self, session: Session) -> None:
+        document = session.document
+        if document is not None:
+            # Blobs are written before the row references them.
+            self.blobs.put(
+                document.digest,
+                _content_suffix(document.kind),
+                document.content.encode("utf-8"),
+            )
+            if document.pdf_bytes is not None:
+                self.blobs.put(document.digest, PDF, document.pdf_bytes)
+        session.last_access = time.time()
+        self._conn().execute(
+            "UPDATE sessions SET filename = ?, document_digest = ?, document_kind = ?, "
+            "document_stats = ?, last_access = ? WHERE session_id = ?",
+            (
+                session.filename,
+                document.digest if document else None,
+                document.kind if document else None,
+                json.dumps(dict(document.stats)) if document else None,
+                session.last_access,
+                session.session_id,
+            ),
+        )
+
+    def delete(self, session_id: str) -> None:
+        self._conn().execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def sweep(self) -> int:
+        conn = self._conn()
+        cutoff = time.time() - self.idle_ttl_seconds
+        removed = conn.execute(
+            "DELETE FROM sessions WHERE last_access < ?", (cutoff,)
+        ).rowcount
+        with self._counter_lock:
+            self._expired += removed
+        referenced = [
+            row["document_digest"]
+            for row in conn.execute(
+                "SELECT DISTINCT document_digest FROM sessions "
+                "WHERE document_digest IS NOT NULL"
+            )
+        ]
+        self.blobs.prune(referenced, older_than_seconds=self.idle_ttl_seconds)
+        return removed
+
+    def stats(self) -> dict:
+        live = self._conn().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        with self._counter_lock:
+            expired = self._expired
+        return {
+            "backend": "sqlite",
+            "live_sessions": live,
+            "blob_bytes": self.blobs.total_bytes(),
+            "idle_ttl_seconds": self.idle_ttl_seconds,
+            "expired": expired,
+        }
+
+    def _load_document(
+        self, digest: str, kind: str, stats_json: Optional[str]
+    ) -> Optional[Document]:
+        cached = document_cache.get(digest, kind)
+        if cached is not None:
+            return cached
+        content = self.blobs.get(digest, _content_suffix(kind))
+        pdf_bytes = self.blobs.get(digest, PDF) if kind == PDF else None
+        if content is None or (kind == PDF and pdf_bytes is None):
+            return None
+        parsed = json.loads(stats_json or "{}")
+        parsed["content"] = content.decode("utf-8")
+        return document_cache.put(Document.from_parsed(digest, kind, parsed, pdf_bytes))
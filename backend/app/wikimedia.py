@@ -0,0 +1,254 @@
+"""Async Wikimedia Commons image search on the shared HTTP client.
+
+Builds the request and parses the response with the same helpers as
+:func:`highlight.search_wikimedia_commons`, but awaits the pooled
+:data:`~app.http.http_pool` client instead of blocking a worker thread.
+
+Parsed results are kept in a bounded in-process cache keyed by the normalised
+query and limit. Identical concurrent searches share one upstream call, and
+expired entries are served stale while a single background refresh runs, so
+users only wait on Commons for queries nobody has asked recently.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import httpx
+
+import highlight as hlt
+from .config import get_settings
+from .http import http_pool
+
+_Key = Tuple[str, int]
+# Reciprocal rank fusion constant: flattens the gap between top ranks so an
+# image found by several queries outranks one ranked first by a single query.
+_RRF_K = 60
+
+
+@dataclass
+class _Entry:
+    results: list
+    fetched: float
+
+
+def _normalise(query: str) -> str:
+    return " ".join(query.split()).casefold()
+
+
+class SearchCache:
+    """TTL/LRU cache of parsed searches with coalescing and stale-while-revalidate.
+
+    Entries younger than ``ttl_seconds`` are served as is. Older ones are
+    served for up to ``stale_seconds`` more while one background refresh
+    replaces them; beyond that the caller waits for a fresh search. Failed
+    searches are never cached.
+    """
+
+    def __init__(self, *, max_entries: int, ttl_seconds: float, stale_seconds: float) -> None:
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = max(0.0, stale_seconds)
+        self._entries: "OrderedDict[_Key, _Entry]" = OrderedDict()
+        self._inflight: Dict[_Key, asyncio.Task] = {}
+        # Strong references to background refreshes until they finish.
+        self._refreshes: Set[asyncio.Task] = set()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._stale_hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._errors = 0
+
+    def _lookup(self, key: _Key) -> Tuple[Optional[_Entry], float]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, 0.0
+            self._entries.move_to_end(key)
+            return entry, time.monotonic() - entry.fetched
+
+    def _store(self, key: _Key, results: list) -> None:
+        with self._lock:
+            self._entries[key] = _Entry(results, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, f"_{name}", getattr(self, f"_{name}") + 1)
+
+    def _fetch(self, key: _Key) -> asyncio.Task:
+        """Start (or join) the upstream search for ``key`` on this loop."""
+        task = self._inflight.get(key)
+        if task is not None and not task.done() and task.get_loop() is asyncio.get_running_loop():
+            self._count("coalesced")
+            return task
+
+        async def run() -> list:
+            try:
+                results = await _search_upstream(*key)
+            except (httpx.HTTPError, ValueError):
+                self._count("errors")
+                raise
+            finally:
+                if self._inflight.get(key) is task:
+                    del self._inflight[key]
+            self._store(key, results)
+            return results
+
+        task = asyncio.ensure_future(run())
+        task.add_done_callback(self._settled)
+        self._inflight[key] = task
+        return task
+
+    def _revalidate(self, key: _Key) -> None:
+        self._refreshes.add(self._fetch(key))
+
+    def _settled(self, task: asyncio.Task) -> None:
+        # Retrieve the exception even when every waiter was cancelled.
+        error = None if task.cancelled() else task.exception()
+        if task in self._refreshes:
+            self._refreshes.discard(task)
+            if error is not None:
+                logging.warning("Wikimedia search refresh failed: %s", error)
+
+    async def search(self, query: str, limit: int) -> list:
+        """Return cached results for ``query``, searching Commons when needed.
+
+        Raises ``httpx.HTTPError`` or ``ValueError`` if the upstream search
+        fails and no cached result can be served.
+        """
+        key = (_normalise(query), limit)
+        entry, age = self._lookup(key)
+        if entry is not None and age < self.ttl_seconds:
+            self._count("hits")
+            return entry.results
+        if entry is not None and age < self.ttl_seconds + self.stale_seconds:
+            self._count("stale_hits")
+            self._revalidate(key)
+            return entry.results
+
+        self._count("misses")
+        task = self._fetch(key)
+        # A cancelled request must not cancel the search other callers share.
+        return await asyncio.shield(task)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            served = self._hits + self._stale_hits
+            lookups = served + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "stale_seconds": self.stale_seconds,
+                "hits": self._hits,
+                "stale_hits": self._stale_hits,
+                "misses": self._misses,
+                "coalesced": self._coalesced,
+                "errors": self._errors,
+                "hit_rate": round(served / lookups, 4) if lookups else 0.0,
+            }
+
+
+async def _search_upstream(query: str, limit: int) -> list:
+    logging.info("Searching Wikimedia Commons for: '%s' with limit %s", query, limit)
+    response = await http_pool.get(
+        hlt.utils.WIKIMEDIA_API_ENDPOINT,
+        params=hlt.wikimedia_search_params(query, limit),
+        timeout=10,
+    )
+    payload = response.json()
+    try:
+        return hlt.parse_wikimedia_response(payload)
+    except (AttributeError, IndexError, KeyError, TypeError) as exc:
+        # A malformed payload fails like a bad response: stale results are
+        # served if there are any, otherwise the search comes back empty.
+        raise ValueError(f"Malformed Wikimedia response: {exc!r}") from exc
+
+
+async def search(query: str, limit: int = 9) -> list:
+    """Search Wikimedia Commons (cached); ``[]`` when the upstream call fails."""
+    try:
+        return await search_cache.search(query, limit)
+    except (httpx.HTTPError, ValueError) as exc:
+        logging.error("Wikimedia search for '%s' failed: %s", query, exc)
+        return []
+
+
+async def search_many(
+    queries: Sequence[str], limit: int = 9, *, max_concurrency: int = 4
+) -> Tuple[List[dict], List[dict]]:
+    """Run several searches concurrently and merge them into one ranking.
+
+    Queries are deduplicated (after normalisation) and searched through the
+    cache, at most ``max_concurrency`` at a time. Images are merged by page
+    id and ranked by reciprocal rank fusion over the queries that found them.
+
+    Returns:
+        ``(results, outcomes)``: the ranked images, each with ``score`` and
+        ``matched_queries`` added, and one ``{"query", "count", "error"}``
+        record per distinct query. A failed query is reported in its record
+        and does not affect the others.
+    """
+    distinct: Dict[str, str] = {}
+    for query in queries:
+        if query.strip():
+            distinct.setdefault(_normalise(query), query.strip())
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run(query: str) -> list:
+        async with semaphore:
+            return await search_cache.search(query, limit)
+
+    settled = await asyncio.gather(
+        *(run(query) for query in distinct.values()), return_exceptions=True
+    )
+
+    merged: Dict[object, dict] = {}
+    outcomes = []
+    for query, outcome in zip(distinct.values(), settled):
+        if isinstance(outcome, Exception):
+            logging.error("Wikimedia search for '%s' failed: %s", query, outcome)
+            error = str(outcome) or type(outcome).__name__
+            outcomes.append({"query": query, "count": 0, "error": error})
+            continue
+        if isinstance(outcome, BaseException):
+            raise outcome
+        outcomes.append({"query": query, "count": len(outcome), "error": None})
+        for rank, item in enumerate(outcome, start=1):
+            key = item["id"] if item.get("id") is not None else item.get("title")
+            entry = merged.get(key)
+            if entry is None:
+                # Copy: the cached result lists are shared between requests.
+                entry = merged[key] = {**item, "score": 0.0, "matched_queries": []}
+            entry["score"] += 1.0 / (_RRF_K + rank)
+            entry["matched_queries"].append(query)
+
+    # sorted() is stable, so ties keep first-seen (query, rank) order.
+    results = sorted(merged.values(), key=lambda entry: -entry["score"])
+    for entry in results:
+        entry["score"] = round(entry["score"], 6)
+    return results, outcomes
+
+
+_settings = get_settings()
+
+# Module-level singleton
+search_cache = SearchCache(
+    max_entries=_settings.wikimedia_cache_max_entries,
+    ttl_seconds=_settings.wikimedia_cache_ttl_seconds,
+    stale_seconds=_settings.wikimedia_cache_stale_seconds,
+)
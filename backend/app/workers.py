@@ -0,0 +1,169 @@
+"""Bounded worker pools for CPU-bound work kept off the event loop.
+
+Async route handlers must never run PDF parsing, token counting or office
+rendering inline: doing so stalls every other request on the uvicorn worker.
+:class:`WorkerPool` wraps a thread or process executor with a hard cap on
+in-flight jobs and exposes queue-depth counters for ``/api/metrics``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+R = TypeVar("R")
+
+POOL_KINDS = ("thread", "process")
+
+
+class PoolBusyError(RuntimeError):
+    """Raised when a pool's backlog is full and new work is refused."""
+
+
+class PoolTimeoutError(TimeoutError):
+    """Raised when a job does not finish within the pool's timeout."""
+
+
+class WorkerPool:
+    """A lazily started executor with a bounded backlog.
+
+    Args:
+        name: Label used in metrics and error messages.
+        kind: ``"thread"`` or ``"process"``. Process pools sidestep the GIL
+            for pure-Python parsers but require picklable callables/arguments.
+        max_workers: Number of jobs executed concurrently.
+        max_pending: Maximum jobs admitted at once (running + queued). Further
+            submissions raise :class:`PoolBusyError` instead of queueing
+            without bound.
+        timeout: Seconds a caller waits for its job (queueing included)
+            before :class:`PoolTimeoutError`; ``None`` waits indefinitely.
+            A job that has already started cannot be interrupted, so it
+            keeps its slot until it finishes.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        kind: str = "thread",
+        max_workers: int = 4,
+        max_pending: int = 32,
+        timeout: Optional[float] = None,
+    ) -> None:
+        if kind not in POOL_KINDS:
+            raise ValueError(f"Unknown pool kind '{kind}'; expected one of {POOL_KINDS}.")
+        self.name = name
+        self.kind = kind
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max(self.max_workers, max_pending)
+        self.timeout = timeout if timeout and timeout > 0 else None
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._peak_in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._timed_out = 0
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.kind == "process":
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix=f"paige-{self.name}",
+                    )
+            return self._executor
+
+    def start(self) -> None:
+        """Create the executor now rather than on the first job.
+
+        Called from the application lifespan, before the server opens its
+        sockets. Forked process workers (all started on first use) inherit
+        every open descriptor, and a worker holding a client's socket stops
+        the server from noticing that client disconnect.
+        """
+        executor = self._get_executor()
+        if self.kind == "process":
+            executor.submit(int).result()
+
+    def _admit(self) -> None:
+        with self._lock:
+            if self._in_flight >= self.max_pending:
+                self._rejected += 1
+                raise PoolBusyError(
+                    f"The {self.name} pool is busy ({self._in_flight} jobs pending). "
+                    "Please retry shortly."
+                )
+            self._in_flight += 1
+            self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+
+    def _release(self, failed: bool) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            if failed:
+                self._failed += 1
+            else:
+                self._completed += 1
+
+    def _settled(self, future: Future) -> None:
+        self._release(future.cancelled() or future.exception() is not None)
+
+    async def run(self, fn: Callable[..., R], *args: Any, **kwargs: Any) -> R:
+        """Run ``fn(*args, **kwargs)`` on the pool and await its result.
+
+        The job's slot is released when the job itself finishes, not when
+        the caller stops waiting, so abandoned jobs still count against the
+        backlog.
+        """
+        self._admit()
+        try:
+            future = self._get_executor().submit(functools.partial(fn, *args, **kwargs))
+        except BaseException:
+            self._release(failed=True)
+            raise
+        # Registered before the asyncio wrapper so the counters are settled
+        # by the time the caller resumes.
+        future.add_done_callback(self._settled)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            # Drops the job if it is still queued; a running one finishes.
+            future.cancel()
+            with self._lock:
+                self._timed_out += 1
+            raise PoolTimeoutError(
+                f"The {self.name} job did not finish within {self.timeout:g} seconds."
+            ) from None
+
+    def stats(self) -> dict:
+        """Return a snapshot of the pool's counters."""
+        with self._lock:
+            in_flight = self._in_flight
+            return {
+                "kind": self.kind,
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "in_flight": in_flight,
+                "running": min(in_flight, self.max_workers),
+                "queue_depth": max(0, in_flight - self.max_workers),
+                "peak_in_flight": self._peak_in_flight,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "timed_out": self._timed_out,
+                "timeout_seconds": self.timeout,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the underlying executor; it is recreated on next use."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
@@ -3,12 +3,14 @@
 import type {
   AuthResponse,
   FigureListResponse,
+  FigureRegionsResponse,
   GenerateResponse,
   PdfImagesResponse,
   ProjectsResponse,
   SelectedImage,
   StructuredResponse,
   UploadResponse,
+  WikimediaBatchSearchResponse,
   WikimediaSearchResponse,
 } from "./types";
 
@@ -115,6 +117,17 @@ export const api = {
     return request<WikimediaSearchResponse>(`/images/wikimedia?${qs.toString()}`);
   },
 
+  wikimediaBatch(
+    queries: string[],
+    limit: number,
+    maxResults?: number,
+  ): Promise<WikimediaBatchSearchResponse> {
+    return request<WikimediaBatchSearchResponse>("/images/wikimedia/batch", {
+      method: "POST",
+      body: JSON.stringify({ queries, limit, max_results: maxResults ?? null }),
+    });
+  },
+
   pdfExtract(sessionId: string): Promise<PdfImagesResponse> {
     const qs = new URLSearchParams({ session_id: sessionId });
     return request<PdfImagesResponse>(`/images/pdf-extract?${qs.toString()}`, {
@@ -122,6 +135,11 @@ export const api = {
     });
   },
 
+  figureRegions(sessionId: string): Promise<FigureRegionsResponse> {
+    const qs = new URLSearchParams({ session_id: sessionId });
+    return request<FigureRegionsResponse>(`/images/figures?${qs.toString()}`);
+  },
+
   proxyImageUrl(url: string): string {
     return `${BASE}/images/proxy?url=${encodeURIComponent(url)}`;
   },
@@ -140,10 +158,9 @@ export const api = {
     pointOfContact?: string;
     selectedImage?: SelectedImage | null;
   }): Promise<Blob> {
-    const res = await fetch(`${BASE}/export/docx`, {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({
+    return postExport(
+      "/export/docx",
+      JSON.stringify({
         session_id: payload.sessionId,
         title: payload.title ?? "",
         subtitle: payload.subtitle ?? "",
@@ -157,9 +174,7 @@ export const api = {
         point_of_contact: payload.pointOfContact ?? "",
         selected_image: payload.selectedImage ?? null,
       }),
-    });
-    if (!res.ok) throw new Error(await extractError(res));
-    return res.blob();
+    );
   },
 
   async exportPptx(payload: {
@@ -171,11 +186,11 @@ export const api = {
     approachPoints: string[];
     impactPoints: string[];
     figureImageIndex?: number | null;
+    figureRegionIndex?: number | null;
   }): Promise<Blob> {
-    const res = await fetch(`${BASE}/export/pptx`, {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({
+    return postExport(
+      "/export/pptx",
+      JSON.stringify({
         session_id: payload.sessionId,
         title: payload.title,
         objective: payload.objective,
@@ -184,13 +199,30 @@ export const api = {
         approach_points: payload.approachPoints,
         impact_points: payload.impactPoints,
         figure_image_index: payload.figureImageIndex ?? null,
+        figure_region_index: payload.figureRegionIndex ?? null,
       }),
-    });
-    if (!res.ok) throw new Error(await extractError(res));
-    return res.blob();
+    );
   },
 };
 
+// Last download of each export endpoint. Repeating an identical export sends
+// its ETag back and reuses the blob when the server answers 304.
+const lastExports = new Map<string, { etag: string; blob: Blob }>();
+
+async function postExport(path: string, body: string): Promise<Blob> {
+  const previous = lastExports.get(path);
+  const headers: Record<string, string> = { "Content-Type": "application/json" };
+  if (previous) headers["If-None-Match"] = previous.etag;
+  const res = await fetch(`${BASE}${path}`, { method: "POST", headers, body });
+  if (res.status === 304 && previous) return previous.blob;
+  if (!res.ok) throw new Error(await extractError(res));
+  const blob = await res.blob();
+  const etag = res.headers.get("ETag");
+  if (etag) lastExports.set(path, { etag, blob });
+  else lastExports.delete(path);
+  return blob;
+}
+
 async function extractError(res: Response): Promise<string> {
   try {
     const body = await res.json();
@@ -44,15 +44,56 @@ export interface WikimediaSearchResponse {
   results: WikimediaImage[];
 }
 
+export interface RankedWikimediaImage extends WikimediaImage {
+  score: number;
+  matched_queries: string[];
+}
+
+export interface WikimediaQueryOutcome {
+  query: string;
+  count: number;
+  // Upstream failure for this query; the other queries' results still count.
+  error: string | null;
+}
+
+export interface WikimediaBatchSearchResponse {
+  results: RankedWikimediaImage[];
+  queries: WikimediaQueryOutcome[];
+}
+
 export interface PdfImageInfo {
   index: number;
   page: number;
-  data_url: string;
+  xref: number;
+  width: number;
+  height: number;
+  // MIME type of the full-resolution image served at `url`.
   mime: string;
+  url: string;
+  // Small JPEG preview (`url` with `thumb=true`); null if it could not be decoded.
+  thumbnail_url: string | null;
 }
 
 export interface PdfImagesResponse {
   images: PdfImageInfo[];
+  // Images left out of the listing, by reason.
+  skipped: Record<string, number>;
+}
+
+export interface FigureRegionInfo {
+  index: number;
+  page: number;
+  // Region in PDF points: [x0, y0, x1, y1].
+  bbox: number[];
+  label: string;
+  caption: string;
+  // Rendered PNG; `thumbnail_url` is the same endpoint at a low dpi.
+  url: string;
+  thumbnail_url: string;
+}
+
+export interface FigureRegionsResponse {
+  figures: FigureRegionInfo[];
 }
 
 export interface FigureListResponse {
@@ -83,6 +83,7 @@ export function PptExport() {
         approachPoints: store.approachPoints,
         impactPoints: store.pptImpactPoints,
         figureImageIndex: store.selectedFigureImageIndex,
+        figureRegionIndex: store.selectedFigureRegionIndex,
       });
       downloadBlob(blob, "ber-highlight.pptx");
     } catch (e) {
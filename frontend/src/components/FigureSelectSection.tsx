@@ -11,6 +11,7 @@ export function FigureSelectSection() {
   const figures = store.figures;
   const selectedId = store.selectedFigureId;
   const pdfImages = store.pdfImages;
+  const regions = store.figureRegions;
 
   async function listFigures() {
     setBusy(true);
@@ -45,8 +46,12 @@ export function FigureSelectSection() {
     setBusy(true);
     setError(null);
     try {
-      const res = await api.pdfExtract(sessionId);
+      const [res, regionsRes] = await Promise.all([
+        api.pdfExtract(sessionId),
+        api.figureRegions(sessionId),
+      ]);
       store.set("pdfImages", res.images);
+      store.set("figureRegions", regionsRes.figures);
     } catch (e) {
       setError((e as Error).message);
     } finally {
@@ -54,6 +59,16 @@ export function FigureSelectSection() {
     }
   }
 
+  function assignImage(index: number) {
+    store.set("selectedFigureImageIndex", index);
+    store.set("selectedFigureRegionIndex", null);
+  }
+
+  function assignRegion(index: number) {
+    store.set("selectedFigureRegionIndex", index);
+    store.set("selectedFigureImageIndex", null);
+  }
+
   return (
     <section className="card">
       <h3 className="section-title">
@@ -126,7 +141,7 @@ export function FigureSelectSection() {
               {pdfImages.map((img) => (
                 <div key={img.index} className="text-center">
                   <img
-                    src={img.data_url}
+                    src={img.thumbnail_url ?? img.url}
                     alt={`PDF image ${img.index}`}
                     className={`mx-auto h-24 object-contain ${
                       store.selectedFigureImageIndex === img.index
@@ -137,9 +152,7 @@ export function FigureSelectSection() {
                   <p className="text-xs text-gray-500">page {img.page}</p>
                   <button
                     className="btn-secondary mt-1 text-xs"
-                    onClick={() =>
-                      store.set("selectedFigureImageIndex", img.index)
-                    }
+                    onClick={() => assignImage(img.index)}
                   >
                     {store.selectedFigureImageIndex === img.index
                       ? "Assigned"
@@ -154,6 +167,41 @@ export function FigureSelectSection() {
               No embedded images found in the PDF.
             </p>
           )}
+
+          {regions && regions.length > 0 && (
+            <>
+              <p className="mt-4 text-sm text-gray-700">
+                Figures rendered from the PDF pages:
+              </p>
+              <div className="mt-2 grid max-h-[400px] grid-cols-2 gap-3 overflow-y-auto rounded-md border border-gray-200 p-3 sm:grid-cols-4">
+                {regions.map((region) => (
+                  <div key={region.index} className="text-center">
+                    <img
+                      src={region.thumbnail_url}
+                      alt={region.label}
+                      title={region.caption}
+                      className={`mx-auto h-24 object-contain ${
+                        store.selectedFigureRegionIndex === region.index
+                          ? "ring-2 ring-im3"
+                          : ""
+                      }`}
+                    />
+                    <p className="text-xs text-gray-500">
+                      {region.label}, page {region.page}
+                    </p>
+                    <button
+                      className="btn-secondary mt-1 text-xs"
+                      onClick={() => assignRegion(region.index)}
+                    >
+                      {store.selectedFigureRegionIndex === region.index
+                        ? "Assigned"
+                        : "Assign"}
+                    </button>
+                  </div>
+                ))}
+              </div>
+            </>
+          )}
         </div>
       )}
     </section>
@@ -14,8 +14,12 @@ export function ImageSearchSection() {
   const results = store.wikimediaResults;
   const selected = store.selectedImage;
 
+  const suggestedQueries = store.suggestedSearchStrings
+    .split("\n")
+    .map((line) => line.trim())
+    .filter(Boolean);
   const defaultQuery =
-    store.suggestedSearchStrings.split("\n")[0]?.trim() ||
+    suggestedQueries[0] ||
     store.title ||
     store.summary.split(/\s+/).slice(0, 15).join(" ");
 
@@ -39,8 +43,18 @@ export function ImageSearchSection() {
     setBusy(true);
     setError(null);
     try {
-      const res = await api.wikimedia(q, limit);
-      store.set("wikimediaResults", res.results);
+      if (!query && suggestedQueries.length > 1) {
+        // Search every suggested phrase at once; one merged, ranked grid.
+        const res = await api.wikimediaBatch(suggestedQueries, limit, limit * 2);
+        const failed = res.queries.filter((outcome) => outcome.error);
+        if (failed.length === res.queries.length) {
+          throw new Error("Wikimedia Commons search failed; please retry.");
+        }
+        store.set("wikimediaResults", res.results);
+      } else {
+        const res = await api.wikimedia(q, limit);
+        store.set("wikimediaResults", res.results);
+      }
       store.set("selectedImage", null);
     } catch (e) {
       setError((e as Error).message);
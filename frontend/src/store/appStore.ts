@@ -1,5 +1,6 @@
 import { create } from "zustand";
 import type {
+  FigureRegionInfo,
   PdfImageInfo,
   UploadResponse,
   WikimediaImage,
@@ -41,6 +42,10 @@ export interface AppState {
   figureCaption: string;
   pdfImages: PdfImageInfo[] | null;
   selectedFigureImageIndex: number | null;
+  // Vector figures rendered from page regions; a selected region takes
+  // precedence over an embedded image in the slide export.
+  figureRegions: FigureRegionInfo[] | null;
+  selectedFigureRegionIndex: number | null;
 
   // POC directory
   projects: Record<string, string>;
@@ -87,6 +92,8 @@ export const useAppStore = create<AppState>((set) => ({
   figureCaption: "",
   pdfImages: null,
   selectedFigureImageIndex: null,
+  figureRegions: null,
+  selectedFigureRegionIndex: null,
 
   projects: {},
 
@@ -118,6 +125,8 @@ export const useAppStore = create<AppState>((set) => ({
       figureCaption: "",
       pdfImages: null,
       selectedFigureImageIndex: null,
+      figureRegions: null,
+      selectedFigureRegionIndex: null,
       wikimediaResults: null,
       selectedImage: null,
       suggestedSearchStrings: "",
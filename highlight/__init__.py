@@ -1,13 +1,26 @@
 from highlight.prompts import prompt_queue
 from highlight.utils import (
     ApproachPoints,
+    FigureRegion,
     ImpactPoints,
+    PdfImageEntry,
+    PdfImageIndex,
+    commons_thumbnail_url,
     extract_images_from_pdf,
+    extract_page_range,
+    find_figure_regions,
     generate_prompt,
     get_token_count,
+    image_mime_type,
+    iter_pdf_images,
+    page_shards,
+    parse_wikimedia_response,
+    prepare_image,
     read_pdf,
     read_text,
+    render_region,
     search_wikimedia_commons,
+    wikimedia_search_params,
 )
 
 __version__ = "1.0.0"
@@ -15,11 +28,24 @@ __version__ = "1.0.0"
 __all__ = [
     "prompt_queue",
     "ApproachPoints",
+    "FigureRegion",
     "ImpactPoints",
+    "PdfImageEntry",
+    "PdfImageIndex",
+    "commons_thumbnail_url",
     "extract_images_from_pdf",
+    "extract_page_range",
+    "find_figure_regions",
     "generate_prompt",
     "get_token_count",
+    "image_mime_type",
+    "iter_pdf_images",
+    "page_shards",
+    "parse_wikimedia_response",
+    "prepare_image",
     "read_pdf",
     "read_text",
+    "render_region",
     "search_wikimedia_commons",
+    "wikimedia_search_params",
 ]
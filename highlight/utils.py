@@ -9,7 +9,10 @@ The helpers here cover:
 * document ingestion (:func:`read_pdf`, :func:`read_text`)
 * token counting (:func:`get_token_count`)
 * Wikimedia Commons image search (:func:`search_wikimedia_commons`)
-* PDF image extraction (:func:`extract_images_from_pdf`)
+* PDF image extraction (:class:`PdfImageIndex`, :func:`extract_images_from_pdf`,
+  and the page-sharded :func:`iter_pdf_images`)
+* vector figure capture (:func:`find_figure_regions`, :func:`render_region`)
+* export image preparation (:func:`prepare_image`, :func:`commons_thumbnail_url`)
 * user-prompt formatting (:func:`generate_prompt`)
 
 It also defines the structured-output models :class:`ApproachPoints`
@@ -18,12 +21,17 @@ and :class:`ImpactPoints`.
 
 import io
 import logging
+import os
 import re
-from typing import List
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 
 import fitz  # PyMuPDF
 import requests
 import tiktoken
+from PIL import Image, ImageOps
 from pydantic import BaseModel, Field
 from pypdf import PdfReader
 
@@ -31,6 +39,8 @@ import highlight.prompts as prompts
 
 
 WIKIMEDIA_API_ENDPOINT = "https://commons.wikimedia.org/w/api.php"
+# Wikimedia requires an identifying User-Agent on API and upload requests.
+USER_AGENT = "PAIGE/1.0 (https://github.com/crvernon/highlight; chris.vernon@pnnl.gov)"
 
 
 # --- Structured output models (used by the Pydantic AI agents) ---
@@ -56,18 +66,17 @@ class ImpactPoints(BaseModel):
     )
 
 
-def search_wikimedia_commons(query: str, limit: int = 9) -> list:
-    """Search Wikimedia Commons for images matching the query.
+def wikimedia_search_params(query: str, limit: int = 9) -> dict:
+    """Query-string parameters of a Wikimedia Commons image search.
 
     Args:
         query: The search phrase.
         limit: Maximum number of images to retrieve.
 
     Returns:
-        A list of image metadata dictionaries.
+        The parameters for a GET request to :data:`WIKIMEDIA_API_ENDPOINT`.
     """
-    logging.info("Searching Wikimedia Commons for: '%s' with limit %s", query, limit)
-    params = {
+    return {
         "action": "query",
         "format": "json",
         "generator": "search",
@@ -80,64 +89,87 @@ def search_wikimedia_commons(query: str, limit: int = 9) -> list:
         "iiurlwidth": 200,
         "formatversion": 2,
     }
+
+
+def parse_wikimedia_response(raw_data: dict) -> list:
+    """Convert a Wikimedia Commons search response into image metadata.
+
+    Args:
+        raw_data: The decoded JSON body of the search response.
+
+    Returns:
+        A list of image metadata dictionaries; pages without a thumbnail are
+        skipped.
+    """
     results: list = []
+    if "query" not in raw_data or "pages" not in raw_data["query"]:
+        return results
+
+    for page_data in raw_data["query"]["pages"]:
+        if page_data.get("missing", False) or "imageinfo" not in page_data:
+            continue
+
+        image_info = page_data["imageinfo"][0]
+        metadata = image_info.get("extmetadata", {})
+
+        title = page_data.get("title", "Unknown Title")
+        thumbnail_url = image_info.get("thumburl", None)
+        full_url = image_info.get("url", None)
+        description_url = image_info.get("descriptionurl", None)
+        license_short = metadata.get("LicenseShortName", {}).get("value", "")
+        artist_html = metadata.get("Artist", {}).get("value", "")
+        license_url = metadata.get("LicenseUrl", {}).get("value", None)
+
+        artist_plain = re.sub(r"<.*?>", "", artist_html).strip()
+        artist_plain = (
+            artist_plain.replace("&amp;", "&")
+            .replace("&lt;", "<")
+            .replace("&gt;", ">")
+        )
+        artist_plain_final = artist_plain or "Unknown Artist"
+
+        mime_type = image_info.get("mime", "application/octet-stream")
+
+        if thumbnail_url:
+            results.append(
+                {
+                    "id": page_data.get("pageid"),
+                    "title": title,
+                    "thumbnail_url": thumbnail_url,
+                    "full_url": full_url,
+                    "page_url": description_url,
+                    "license": license_short,
+                    "artist_html": artist_html,
+                    "artist_plain": artist_plain_final,
+                    "license_url": license_url,
+                    "mime": mime_type,
+                }
+            )
+    return results
+
+
+def search_wikimedia_commons(query: str, limit: int = 9) -> list:
+    """Search Wikimedia Commons for images matching the query.
+
+    Args:
+        query: The search phrase.
+        limit: Maximum number of images to retrieve.
+
+    Returns:
+        A list of image metadata dictionaries.
+    """
+    logging.info("Searching Wikimedia Commons for: '%s' with limit %s", query, limit)
     raw_data = None
     try:
-        headers = {
-            "User-Agent": (
-                "PAIGE/1.0 (https://github.com/crvernon/highlight; "
-                "chris.vernon@pnnl.gov)"
-            )
-        }
         response = requests.get(
-            WIKIMEDIA_API_ENDPOINT, params=params, timeout=10, headers=headers
+            WIKIMEDIA_API_ENDPOINT,
+            params=wikimedia_search_params(query, limit),
+            timeout=10,
+            headers={"User-Agent": USER_AGENT},
         )
         response.raise_for_status()
         raw_data = response.json()
-
-        if "query" in raw_data and "pages" in raw_data["query"]:
-            pages = raw_data["query"]["pages"]
-            for page_data in pages:
-                if page_data.get("missing", False) or "imageinfo" not in page_data:
-                    continue
-
-                image_info = page_data["imageinfo"][0]
-                metadata = image_info.get("extmetadata", {})
-
-                title = page_data.get("title", "Unknown Title")
-                thumbnail_url = image_info.get("thumburl", None)
-                full_url = image_info.get("url", None)
-                description_url = image_info.get("descriptionurl", None)
-                license_short = metadata.get("LicenseShortName", {}).get("value", "")
-                artist_html = metadata.get("Artist", {}).get("value", "")
-                license_url = metadata.get("LicenseUrl", {}).get("value", None)
-
-                artist_plain = re.sub(r"<.*?>", "", artist_html).strip()
-                artist_plain = (
-                    artist_plain.replace("&amp;", "&")
-                    .replace("&lt;", "<")
-                    .replace("&gt;", ">")
-                )
-                artist_plain_final = artist_plain or "Unknown Artist"
-
-                mime_type = image_info.get("mime", "application/octet-stream")
-
-                if thumbnail_url:
-                    results.append(
-                        {
-                            "id": page_data.get("pageid"),
-                            "title": title,
-                            "thumbnail_url": thumbnail_url,
-                            "full_url": full_url,
-                            "page_url": description_url,
-                            "license": license_short,
-                            "artist_html": artist_html,
-                            "artist_plain": artist_plain_final,
-                            "license_url": license_url,
-                            "mime": mime_type,
-                        }
-                    )
-        return results
+        return parse_wikimedia_response(raw_data)
     except Exception as exc:  # noqa: BLE001 - log and degrade gracefully
         logging.error("Error processing Wikimedia response: %s", exc, exc_info=True)
         if raw_data:
@@ -145,6 +177,44 @@ def search_wikimedia_commons(query: str, limit: int = 9) -> list:
         return []
 
 
+# Thumbnail widths Commons pre-renders; other widths may be refused.
+_COMMONS_THUMB_WIDTHS = (120, 250, 330, 500, 960, 1280, 1920, 3840)
+_COMMONS_UPLOAD_PATTERN = re.compile(
+    r"^(https://upload\.wikimedia\.org/wikipedia/[^/]+)/([0-9a-f]/[0-9a-f]{2})/([^/?#]+)$"
+)
+
+
+def commons_thumbnail_url(url: str, width: int) -> Optional[str]:
+    """Return a Commons pre-scaled rendition of ``url`` at least ``width`` wide.
+
+    Args:
+        url: Original file URL on ``upload.wikimedia.org``.
+        width: Minimum width needed, in pixels.
+
+    Returns:
+        The thumbnail URL at the smallest standard width that is large
+        enough, or ``None`` if ``url`` is not a Commons original of a
+        scalable type or no standard width is large enough. Commons refuses
+        to upscale, so callers should fall back to ``url`` if the thumbnail
+        cannot be fetched.
+    """
+    match = _COMMONS_UPLOAD_PATTERN.match(url)
+    step = next((size for size in _COMMONS_THUMB_WIDTHS if size >= width), None)
+    if match is None or step is None:
+        return None
+    base, path, name = match.groups()
+    ext = name.rsplit(".", 1)[-1].lower()
+    if ext in ("jpg", "jpeg", "png", "gif", "webp"):
+        thumb_name = f"{step}px-{name}"
+    elif ext == "svg":
+        thumb_name = f"{step}px-{name}.png"
+    elif ext in ("tif", "tiff"):
+        thumb_name = f"lossy-page1-{step}px-{name}.jpg"
+    else:
+        return None
+    return f"{base}/thumb/{path}/{name}/{thumb_name}"
+
+
 def get_token_count(text: str, model: str = "gpt-4o") -> int:
     """Calculate the number of tokens in ``text`` for a given ``model``."""
     try:
@@ -209,70 +279,723 @@ def generate_prompt(
     content: str,
     prompt_name: str,
     additional_content: str = None,
+    layout: str = "inline",
 ) -> str:
     """Format the user-specific portion of a prompt.
 
     Args:
         content: The main document text.
-        prompt_name: Key into :data:`highlight.prompts.prompt_queue`.
+        prompt_name: Key into :data:`highlight.prompts.prompt_queue` (or
+            :data:`highlight.prompts.prefix_prompt_queue` for the prefix layout).
         additional_content: Extra content needed by some prompts (e.g. the
             title for the subtitle, the objective for the approach, or the
             figure identifier for a figure caption).
+        layout: ``"inline"`` interpolates ``content`` into the template as
+            written. ``"prefix"`` emits ``content`` first (see
+            :data:`highlight.prompts.DOCUMENT_PREFIX`) followed by the task
+            worded against the document above, so every prompt for the same document
+            shares an identical leading block that upstream prompt caching
+            can reuse.
 
     Returns:
         The formatted user prompt string.
     """
+    if layout not in ("inline", "prefix"):
+        raise ValueError(f"Unknown prompt layout: '{layout}'")
+    templates = prompts.prompt_queue if layout == "inline" else prompts.prefix_prompt_queue
     try:
-        prompt_template_string = prompts.prompt_queue[prompt_name]
+        prompt_template_string = templates[prompt_name]
     except KeyError as exc:
         raise ValueError(f"Unknown prompt_name: '{prompt_name}'") from exc
-
+    if (
+        prompt_name in ("approach", "subtitle", "selected_figure_caption")
+        and additional_content is None
+    ):
+        raise ValueError(f"additional_content is required for prompt '{prompt_name}'")
+
+    # Prefix templates have no document slot; the unused argument is ignored.
+    body = content if layout == "inline" else ""
     try:
         if prompt_name in ("objective",):
-            return prompt_template_string.format(
+            task = prompt_template_string.format(
                 prompts.EXAMPLE_TEXT_ONE,
                 prompts.EXAMPLE_TEXT_TWO,
-                content,
+                body,
             )
-        if prompt_name in ("approach", "subtitle", "selected_figure_caption"):
-            if additional_content is None:
-                raise ValueError(
-                    f"additional_content is required for prompt '{prompt_name}'"
-                )
-            return prompt_template_string.format(content, additional_content)
-        return prompt_template_string.format(content)
+        elif prompt_name in ("approach", "subtitle", "selected_figure_caption"):
+            task = prompt_template_string.format(body, additional_content)
+        else:
+            task = prompt_template_string.format(body)
     except Exception as exc:  # noqa: BLE001
         raise KeyError(
             f"Error formatting prompt '{prompt_name}': {exc}. "
             "Check prompt template and arguments."
         ) from exc
+    if layout == "inline":
+        return task
+    return prompts.DOCUMENT_PREFIX.format(content) + task
+
+
+# PyMuPDF ``extract_image`` extensions mapped to MIME types.
+IMAGE_MIME_TYPES = {
+    "png": "image/png",
+    "jpeg": "image/jpeg",
+    "jpg": "image/jpeg",
+    "jpx": "image/jp2",
+    "jp2": "image/jp2",
+    "jxr": "image/vnd.ms-photo",
+    "jb2": "image/jbig2",
+    "bmp": "image/bmp",
+    "gif": "image/gif",
+    "tiff": "image/tiff",
+    "tif": "image/tiff",
+    "pnm": "image/x-portable-anymap",
+    "pam": "image/x-portable-arbitrarymap",
+    "psd": "image/vnd.adobe.photoshop",
+}
+
+
+def image_mime_type(ext: str) -> str:
+    """Return the MIME type for an image file extension."""
+    return IMAGE_MIME_TYPES.get(ext.lower(), "application/octet-stream")
+
+
+def _stream_length(doc, xref: int) -> int:
+    """Encoded (undecoded) stream length of ``xref`` in bytes, or 0."""
+    try:
+        kind, value = doc.xref_get_key(xref, "Length")
+        if kind == "int":
+            return int(value)
+        if kind == "xref":  # indirect object, e.g. "12 0 R"
+            return int(doc.xref_object(int(value.split()[0])).strip())
+        return len(doc.xref_stream_raw(xref))
+    except Exception:  # noqa: BLE001
+        return 0
+
+
+def _render_thumbnail(doc, xref: int, max_size: int) -> Optional[bytes]:
+    """JPEG thumbnail of image ``xref`` with its longest side <= ``max_size``."""
+    try:
+        pixmap = fitz.Pixmap(doc, xref)
+        if pixmap.alpha:
+            pixmap = fitz.Pixmap(pixmap, 0)
+        if pixmap.colorspace is None or pixmap.colorspace.n not in (1, 3):
+            pixmap = fitz.Pixmap(fitz.csRGB, pixmap)
+        scale = max_size / max(pixmap.width, pixmap.height, 1)
+        if scale < 1:
+            pixmap = fitz.Pixmap(
+                pixmap,
+                max(1, round(pixmap.width * scale)),
+                max(1, round(pixmap.height * scale)),
+            )
+        return pixmap.tobytes("jpeg", jpg_quality=80)
+    except Exception as exc:  # noqa: BLE001
+        logging.error("Error rendering thumbnail for PDF image %s: %s", xref, exc)
+        return None
 
 
-def extract_images_from_pdf(pdf_bytes: bytes) -> list:
+def _difference_hash(doc, xref: int) -> Optional[int]:
+    """64-bit difference hash of image ``xref`` from a 9x8 greyscale downscale."""
+    try:
+        pixmap = fitz.Pixmap(doc, xref)
+        if pixmap.alpha:
+            pixmap = fitz.Pixmap(pixmap, 0)
+        if pixmap.colorspace is None or pixmap.colorspace.n != 1:
+            pixmap = fitz.Pixmap(fitz.csGRAY, pixmap)
+        small = fitz.Pixmap(pixmap, 9, 8)
+        samples, stride = small.samples, small.stride
+    except Exception:  # noqa: BLE001
+        return None
+    bits = 0
+    for row in range(8):
+        offset = row * stride
+        for col in range(8):
+            left, right = samples[offset + col], samples[offset + col + 1]
+            bits = (bits << 1) | (left < right)
+    return bits
+
+
+@dataclass(frozen=True)
+class PdfImageEntry:
+    """Metadata for one image occurrence in a PDF (no pixel data)."""
+
+    index: int
+    page: int
+    xref: int
+    width: int
+    height: int
+    # Bits per component, colour space name and PDF stream filter
+    # (e.g. ``DCTDecode`` for JPEG) as reported by ``Page.get_images``.
+    bpc: int
+    colorspace: str
+    filter: str
+    # xref of the soft mask (alpha channel) applied to this image, or 0.
+    smask: int
+
+
+class PdfImageIndex:
+    """Index of the images embedded in a PDF, with lazily extracted bytes.
+
+    Building the index only walks each page's image list; pixel data is
+    extracted on first request and memoized per xref, so an image repeated on
+    several pages (a logo, say) is decoded once. Entries are numbered in page
+    order exactly like :func:`extract_images_from_pdf`. Lookups by index or
+    xref are O(1). Safe to share between threads.
+    """
+
+    def __init__(self, pdf_bytes: bytes) -> None:
+        self._doc = None
+        self._lock = threading.Lock()
+        self._entries: List[PdfImageEntry] = []
+        self._first_by_xref: Dict[int, PdfImageEntry] = {}
+        self._extracted: Dict[int, dict] = {}
+        self._thumbnails: Dict[tuple, Optional[bytes]] = {}
+        self._hashes: Dict[int, Optional[int]] = {}
+        self.page_count = 0
+        self._page_starts: Dict[int, int] = {}
+        try:
+            self._doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+            self.page_count = len(self._doc)
+            for page_num in range(len(self._doc)):
+                page = self._doc.load_page(page_num)
+                self._page_starts[page_num + 1] = len(self._entries)
+                for img_info in page.get_images(full=True):
+                    xref, smask, width, height, bpc, colorspace = img_info[:6]
+                    entry = PdfImageEntry(
+                        index=len(self._entries),
+                        page=page_num + 1,
+                        xref=xref,
+                        width=width,
+                        height=height,
+                        bpc=bpc,
+                        colorspace=colorspace,
+                        filter=img_info[8],
+                        smask=smask,
+                    )
+                    self._entries.append(entry)
+                    self._first_by_xref.setdefault(xref, entry)
+        except Exception as exc:  # noqa: BLE001
+            logging.error("Error indexing images in PDF: %s", exc, exc_info=True)
+            self._entries = []
+            self._first_by_xref = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    @property
+    def entries(self) -> List[PdfImageEntry]:
+        return list(self._entries)
+
+    def by_index(self, index: int) -> Optional[PdfImageEntry]:
+        """Return the entry numbered ``index``, or ``None`` if out of range."""
+        if 0 <= index < len(self._entries):
+            return self._entries[index]
+        return None
+
+    def entry_at(self, page: int, slot: int) -> Optional[PdfImageEntry]:
+        """Return the ``slot``-th image on 1-based ``page``, or ``None``."""
+        start = self._page_starts.get(page)
+        if start is None or slot < 0:
+            return None
+        entry = self.by_index(start + slot)
+        return entry if entry is not None and entry.page == page else None
+
+    def by_xref(self, xref: int) -> Optional[PdfImageEntry]:
+        """Return the first occurrence of ``xref``, or ``None``."""
+        return self._first_by_xref.get(xref)
+
+    def extract(self, xref: int) -> Optional[dict]:
+        """Return PyMuPDF's ``extract_image`` dict for ``xref`` (memoized).
+
+        The dict carries the encoded ``image`` bytes and their ``ext``
+        (``png``, ``jpeg``, ...). Returns ``None`` for unknown xrefs or when
+        extraction fails.
+        """
+        if xref not in self._first_by_xref:
+            return None
+        with self._lock:
+            if xref not in self._extracted:
+                try:
+                    self._extracted[xref] = self._doc.extract_image(xref)
+                except Exception as exc:  # noqa: BLE001
+                    logging.error("Error extracting PDF image %s: %s", xref, exc)
+                    return None
+            return self._extracted[xref]
+
+    def image_bytes(self, xref: int) -> Optional[bytes]:
+        """Return the encoded bytes of image ``xref`` (memoized)."""
+        extracted = self.extract(xref)
+        return extracted["image"] if extracted else None
+
+    def raw_length(self, xref: int) -> int:
+        """Return the encoded (undecoded) stream length of ``xref`` in bytes."""
+        with self._lock:
+            return _stream_length(self._doc, xref)
+
+    def perceptual_hash(self, xref: int) -> Optional[int]:
+        """Return a 64-bit difference hash (dHash) of ``xref`` (memoized).
+
+        Visually near-identical images (re-encoded or rescaled copies) have
+        hashes a small Hamming distance apart. ``None`` if undecodable.
+        """
+        if xref not in self._first_by_xref:
+            return None
+        with self._lock:
+            if xref not in self._hashes:
+                self._hashes[xref] = _difference_hash(self._doc, xref)
+            return self._hashes[xref]
+
+    def candidates(
+        self,
+        *,
+        min_dimension: int = 0,
+        min_bytes: int = 0,
+        dedupe_distance: Optional[int] = None,
+    ) -> Tuple[List[PdfImageEntry], Dict[str, int]]:
+        """Return the entries likely to be figures, and skip counts by reason.
+
+        Checks run cheapest first, so most rejects never decode pixels:
+
+        * ``mask``: the image is another image's soft mask (alpha channel);
+        * ``small``: width or height below ``min_dimension`` (from metadata);
+        * ``duplicate``: the xref was already kept for an earlier page, or
+          (when ``dedupe_distance`` is not ``None``) its perceptual hash is
+          within that many bits of an already kept image;
+        * ``low_bytes``: encoded stream shorter than ``min_bytes``.
+        """
+        skipped = dict.fromkeys(("mask", "small", "duplicate", "low_bytes"), 0)
+        masks = {entry.smask for entry in self._entries if entry.smask}
+        kept: List[PdfImageEntry] = []
+        kept_xrefs: set = set()
+        kept_hashes: List[int] = []
+        for entry in self._entries:
+            if entry.xref in masks:
+                reason = "mask"
+            elif min(entry.width, entry.height) < min_dimension:
+                reason = "small"
+            elif entry.xref in kept_xrefs:
+                reason = "duplicate"
+            elif min_bytes and self.raw_length(entry.xref) < min_bytes:
+                reason = "low_bytes"
+            else:
+                image_hash = (
+                    self.perceptual_hash(entry.xref) if dedupe_distance is not None else None
+                )
+                if image_hash is not None and any(
+                    bin(image_hash ^ other).count("1") <= dedupe_distance
+                    for other in kept_hashes
+                ):
+                    reason = "duplicate"
+                else:
+                    if image_hash is not None:
+                        kept_hashes.append(image_hash)
+                    kept_xrefs.add(entry.xref)
+                    kept.append(entry)
+                    continue
+            skipped[reason] += 1
+        return kept, skipped
+
+    def mime_type(self, xref: int) -> Optional[str]:
+        """Return the MIME type of the encoded bytes of ``xref``."""
+        extracted = self.extract(xref)
+        return image_mime_type(extracted["ext"]) if extracted else None
+
+    def thumbnail(self, xref: int, max_size: int = 192) -> Optional[bytes]:
+        """Return a JPEG thumbnail of ``xref`` no larger than ``max_size`` px.
+
+        Rendered from the decoded pixels (so JPX, JBIG2 and CMYK sources yield
+        browser-displayable output) and memoized per ``(xref, max_size)``.
+        Returns ``None`` when the image cannot be decoded.
+        """
+        if xref not in self._first_by_xref:
+            return None
+        key = (xref, max_size)
+        with self._lock:
+            if key not in self._thumbnails:
+                self._thumbnails[key] = _render_thumbnail(self._doc, xref, max_size)
+            return self._thumbnails[key]
+
+    def add_thumbnail(self, xref: int, max_size: int, thumbnail: Optional[bytes]) -> None:
+        """Memoize a thumbnail rendered elsewhere (e.g. by :func:`extract_page_range`).
+
+        It must come from the same PDF and ``max_size``, so it matches what
+        :meth:`thumbnail` would render; an existing entry is kept.
+        """
+        if xref not in self._first_by_xref:
+            return
+        with self._lock:
+            self._thumbnails.setdefault((xref, max_size), thumbnail)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the images and thumbnails extracted so far."""
+        with self._lock:
+            return sum(len(item["image"]) for item in self._extracted.values()) + sum(
+                len(thumb) for thumb in self._thumbnails.values() if thumb
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            if self._doc is not None:
+                self._doc.close()
+                self._doc = None
+
+
+def extract_images_from_pdf(
+    pdf_bytes: bytes,
+    min_dimension: int = 0,
+    min_bytes: int = 0,
+    dedupe_distance: Optional[int] = None,
+) -> list:
     """Extract embedded images from PDF bytes.
 
     Returns a list of dicts with ``index``, ``page``, ``xref`` and ``bytes``.
+    With the default arguments every image occurrence is returned; the
+    thresholds filter out trivial images as described in
+    :meth:`PdfImageIndex.candidates`. Use :class:`PdfImageIndex` to avoid
+    decoding images that are not needed.
     """
-    images: list = []
+    index = PdfImageIndex(pdf_bytes)
     try:
-        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-        for page_num in range(len(doc)):
-            page = doc.load_page(page_num)
-            image_list = page.get_images(full=True)
-            for img_info in image_list:
-                xref = img_info[0]
-                base_image = doc.extract_image(xref)
-                image_bytes = base_image["image"]
+        if min_dimension or min_bytes or dedupe_distance is not None:
+            entries, _ = index.candidates(
+                min_dimension=min_dimension,
+                min_bytes=min_bytes,
+                dedupe_distance=dedupe_distance,
+            )
+        else:
+            entries = index.entries
+        images = []
+        for entry in entries:
+            image_bytes = index.image_bytes(entry.xref)
+            if image_bytes is None:
+                continue
+            images.append(
+                {
+                    "index": entry.index,
+                    "page": entry.page,
+                    "xref": entry.xref,
+                    "bytes": image_bytes,
+                }
+            )
+        return images
+    finally:
+        index.close()
+
+
+# Extensions PyMuPDF's ``extract_image`` reports for stream filters it passes
+# through unchanged; other images are re-encoded as PNG.
+_FILTER_EXTENSIONS = {"DCTDecode": "jpeg", "JPXDecode": "jpx", "JBIG2Decode": "jb2"}
+
+
+def page_shards(page_count: int, pages_per_shard: int) -> List[Tuple[int, int]]:
+    """Split ``range(page_count)`` into ``(start, stop)`` ranges."""
+    step = max(1, pages_per_shard)
+    return [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+
+
+def _open_pdf(source: Union[bytes, str, os.PathLike]):
+    if isinstance(source, (bytes, bytearray)):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(source)
+
+
+def extract_page_range(
+    source: Union[bytes, str, os.PathLike],
+    start: int,
+    stop: int,
+    min_dimension: int = 0,
+    min_bytes: int = 0,
+    thumbnail_size: Optional[int] = None,
+    skip_masks: bool = True,
+) -> List[dict]:
+    """Scan pages ``start`` to ``stop - 1`` (0-based) for candidate images.
+
+    ``source`` is the PDF's bytes or a path to it. The function opens its own
+    copy of the document and is module-level, so page ranges can be processed
+    in parallel worker processes; pass a path there to avoid copying the
+    whole PDF to every worker. Returns one record per page::
+
+        {"page": 1-based number, "elapsed": seconds,
+         "images": [{"slot", "xref", "width", "height", "ext",
+                     "thumbnail", "hash"}],
+         "skipped": {"mask", "small", "low_bytes"}}
+
+    ``slot`` is the image's position in the page's image list, which
+    together with ``page`` identifies the :class:`PdfImageIndex` entry.
+    Soft masks and images failing the size thresholds are skipped without
+    decoding; ``thumbnail`` (JPEG, when ``thumbnail_size`` is given) and the
+    perceptual ``hash`` are computed once per xref within the range.
+    Cross-page deduplication is left to the caller.
+    """
+    records: List[dict] = []
+    decoded: Dict[int, tuple] = {}
+    doc = _open_pdf(source)
+    try:
+        for page_num in range(start, min(stop, len(doc))):
+            started = time.perf_counter()
+            image_list = doc.load_page(page_num).get_images(full=True)
+            masks = (
+                {img_info[1] for img_info in image_list if img_info[1]}
+                if skip_masks
+                else set()
+            )
+            skipped = dict.fromkeys(("mask", "small", "low_bytes"), 0)
+            images = []
+            for slot, img_info in enumerate(image_list):
+                xref, _smask, width, height = img_info[:4]
+                if xref in masks:
+                    skipped["mask"] += 1
+                    continue
+                if min(width, height) < min_dimension:
+                    skipped["small"] += 1
+                    continue
+                if min_bytes and _stream_length(doc, xref) < min_bytes:
+                    skipped["low_bytes"] += 1
+                    continue
+                if xref not in decoded:
+                    decoded[xref] = (
+                        _render_thumbnail(doc, xref, thumbnail_size)
+                        if thumbnail_size
+                        else None,
+                        _difference_hash(doc, xref),
+                    )
+                thumbnail, image_hash = decoded[xref]
                 images.append(
                     {
-                        "index": len(images),
-                        "page": page_num + 1,
+                        "slot": slot,
                         "xref": xref,
-                        "bytes": image_bytes,
+                        "width": width,
+                        "height": height,
+                        "ext": _FILTER_EXTENSIONS.get(img_info[8], "png"),
+                        "thumbnail": thumbnail,
+                        "hash": image_hash,
                     }
                 )
+            records.append(
+                {
+                    "page": page_num + 1,
+                    "elapsed": time.perf_counter() - started,
+                    "images": images,
+                    "skipped": skipped,
+                }
+            )
+    finally:
         doc.close()
-        return images
-    except Exception as exc:  # noqa: BLE001
-        logging.error("Error extracting images from PDF: %s", exc, exc_info=True)
-        return []
+    return records
+
+
+def iter_pdf_images(
+    source: Union[bytes, str, os.PathLike],
+    pages_per_shard: int = 8,
+    **options,
+) -> Iterator[dict]:
+    """Yield :func:`extract_page_range` page records for the whole document.
+
+    Pages are scanned one shard of ``pages_per_shard`` pages at a time and
+    yielded in page order. Callers that scan shards in parallel submit
+    :func:`extract_page_range` jobs for :func:`page_shards` themselves.
+    ``options`` are passed through to :func:`extract_page_range`.
+    """
+    doc = _open_pdf(source)
+    page_count = len(doc)
+    doc.close()
+    for start, stop in page_shards(page_count, pages_per_shard):
+        yield from extract_page_range(source, start, stop, **options)
+
+
+# Caption anchors: "Figure 3", "Fig. 2a", "FIGURE 10" at the start of a block.
+_CAPTION_PATTERN = re.compile(r"^\s*fig(?:ure)?\.?\s*(\d+[a-z]?)\b", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class FigureRegion:
+    """A figure located on a page by its caption and surrounding graphics."""
+
+    # 1-based page number and the region in PDF points (x0, y0, x1, y1).
+    page: int
+    bbox: Tuple[float, float, float, float]
+    # Normalised caption anchor ("Figure 3") and the caption block's text.
+    label: str
+    caption: str
+
+
+def _page_graphics(page) -> list:
+    """Bounding boxes of vector drawings and placed images on ``page``."""
+    page_rect = page.rect
+    rects = []
+    for drawing in page.get_drawings():
+        rect = fitz.Rect(drawing["rect"])
+        if rect.width < 1 and rect.height < 1:
+            continue
+        if rect.width >= page_rect.width * 0.9 and rect.height >= page_rect.height * 0.9:
+            continue  # page frames and backgrounds
+        # Pad so zero-height/width strokes (axes, rules) still intersect.
+        rects.append(rect + (-0.5, -0.5, 0.5, 0.5))
+    for info in page.get_image_info():
+        rects.append(fitz.Rect(info["bbox"]))
+    return rects
+
+
+def find_figure_regions(
+    source: Union[bytes, str, os.PathLike],
+    min_size: float = 72.0,
+    max_gap: float = 36.0,
+    padding: float = 4.0,
+) -> List[FigureRegion]:
+    """Locate figures drawn as vector graphics (or composited images).
+
+    For every caption block that starts with a figure anchor ("Figure N",
+    "Fig. N") the drawings and images directly above it (within ``max_gap``
+    points, and below any previous caption on the page) are merged into a
+    region, together with the text labels inside it. Regions smaller than
+    ``min_size`` points on either side are discarded.
+    """
+    regions: List[FigureRegion] = []
+    doc = _open_pdf(source)
+    try:
+        for page_num in range(len(doc)):
+            page = doc.load_page(page_num)
+            captions = []
+            text_blocks = []
+            for block in page.get_text("blocks"):
+                rect, text, block_type = fitz.Rect(block[:4]), block[4], block[6]
+                if block_type != 0:
+                    continue
+                match = _CAPTION_PATTERN.match(text)
+                if match:
+                    captions.append((rect, f"Figure {match.group(1)}", " ".join(text.split())))
+                else:
+                    text_blocks.append(rect)
+            if not captions:
+                continue
+            graphics = _page_graphics(page)
+            ceiling = page.rect.y0
+            for caption_rect, label, caption in sorted(captions, key=lambda c: c[0].y0):
+                pool = [g for g in graphics if g.y0 >= ceiling - padding and g.y1 <= caption_rect.y0 + padding]
+                seed_area = fitz.Rect(
+                    caption_rect.x0, caption_rect.y0 - max_gap, caption_rect.x1, caption_rect.y0 + padding
+                )
+                region = None
+                grown = True
+                while grown:
+                    grown = False
+                    reach = seed_area if region is None else region + (-max_gap, -max_gap, max_gap, max_gap)
+                    for rect in list(pool):
+                        if reach.intersects(rect):
+                            region = fitz.Rect(rect) if region is None else region | rect
+                            pool.remove(rect)
+                            grown = True
+                ceiling = caption_rect.y1
+                if region is None:
+                    continue
+                # Pull in axis labels and legends around the drawn area.
+                labels_area = region + (-max_gap, -max_gap, max_gap, max_gap)
+                for rect in text_blocks:
+                    if labels_area.contains(rect) and rect.y1 <= caption_rect.y0 + padding:
+                        region |= rect
+                if region.width < min_size or region.height < min_size:
+                    continue
+                region = (region + (-padding, -padding, padding, padding)) & page.rect
+                regions.append(
+                    FigureRegion(
+                        page=page_num + 1,
+                        bbox=tuple(round(value, 2) for value in region),
+                        label=label,
+                        caption=caption[:500],
+                    )
+                )
+    finally:
+        doc.close()
+    return regions
+
+
+def render_region(
+    source: Union[bytes, str, os.PathLike],
+    page: int,
+    bbox: Tuple[float, float, float, float],
+    dpi: int = 150,
+) -> bytes:
+    """Rasterise ``bbox`` on 1-based ``page`` to PNG at ``dpi``."""
+    doc = _open_pdf(source)
+    try:
+        pixmap = doc.load_page(page - 1).get_pixmap(clip=fitz.Rect(bbox), dpi=dpi, alpha=False)
+        return pixmap.tobytes("png")
+    finally:
+        doc.close()
+
+
+def prepare_image(
+    data: bytes,
+    width: int,
+    height: Optional[int] = None,
+    fit: str = "contain",
+    jpeg_quality: int = 85,
+) -> Tuple[bytes, str]:
+    """Downscale an image to a pixel box and re-encode it compactly.
+
+    Images are never upscaled. Photographic images are written as
+    progressive JPEG; images with transparency or at most 256 colours (charts,
+    line art) as PNG. A JPEG or PNG that needs no resizing is returned as is
+    unless re-encoding makes it at least a quarter smaller.
+
+    Args:
+        data: Encoded source image (any format Pillow can read).
+        width: Target box width in pixels.
+        height: Target box height in pixels (``None`` for width only).
+        fit: ``"contain"`` to fit inside the box, or ``"cover"`` to fill it
+            (for placeholders that crop to their own aspect ratio).
+        jpeg_quality: JPEG quality (1-95).
+
+    Returns:
+        ``(image_bytes, mime_type)``.
+
+    Raises:
+        ValueError: If the image cannot be decoded or ``fit`` is unknown.
+    """
+    if fit not in ("contain", "cover") or (fit == "cover" and not height):
+        raise ValueError(f"Unsupported fit {fit!r} for a {width}x{height} box.")
+    try:
+        image = Image.open(io.BytesIO(data))
+        source_mime = Image.MIME.get(image.format or "")
+        image = ImageOps.exif_transpose(image)
+    except (OSError, ValueError, Image.DecompressionBombError) as exc:
+        raise ValueError(f"Cannot decode image: {exc}") from exc
+
+    has_alpha = image.mode in ("RGBA", "LA", "PA") or (
+        image.mode == "P" and "transparency" in image.info
+    )
+    if has_alpha:
+        image = image.convert("RGBA")
+    elif image.mode not in ("L", "RGB"):
+        image = image.convert("RGB")
+
+    scales = [width / image.width]
+    if height:
+        scales.append(height / image.height)
+    scale = min(scales) if fit == "contain" else max(scales)
+    resized = scale < 1
+    if resized:
+        size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        image = image.resize(size, Image.Resampling.LANCZOS)
+
+    out = io.BytesIO()
+    if has_alpha or image.getcolors(256) is not None:
+        image.save(out, format="PNG", optimize=True)
+        mime = "image/png"
+    else:
+        image.save(out, format="JPEG", quality=jpeg_quality, optimize=True, progressive=True)
+        mime = "image/jpeg"
+    prepared = out.getvalue()
+    # Without a resize, re-encoding only pays off if it saves a real share of
+    # the size (e.g. a photograph stored as PNG); otherwise keep the original.
+    if (
+        not resized
+        and source_mime in ("image/jpeg", "image/png")
+        and len(prepared) > 0.75 * len(data)
+    ):
+        return data, source_mime
+    return prepared, mime
@@ -0,0 +1,36 @@
+"""Shared setup for tests that drive the API through a ``TestClient``."""
+
+import os
+import sys
+import unittest
+
+# Ensure the backend package is importable when tests run from the repo root.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from app.session import store  # noqa: E402
+
+
+def start_client(case: unittest.TestCase, *patchers):
+    """Start ``patchers`` and a ``TestClient`` for the app; undone on cleanup.
+
+    The client is entered so the application lifespan (pools, shared HTTP
+    client) runs as it does under uvicorn.
+    """
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    for patcher in patchers:
+        patcher.start()
+        case.addCleanup(patcher.stop)
+    client = TestClient(app)
+    client.__enter__()
+    case.addCleanup(client.__exit__, None, None, None)
+    return client
+
+
+def create_session() -> str:
+    """Create a session with placeholder credentials and return its id."""
+    return store.create(
+        api_key="key", base_url="https://example.test", model="gpt-x", active_project="IM3"
+    ).session_id
@@ -37,6 +37,46 @@ class TestGeneratePrompt(unittest.TestCase):
         with self.assertRaises(ValueError):
             hlt.generate_prompt(content="body", prompt_name="does_not_exist")
 
+    def test_prefix_layout_shares_leading_document(self):
+        prompts = [
+            hlt.generate_prompt(content="paper body", prompt_name=name, layout="prefix")
+            for name in ("title", "science", "objective", "figure_list")
+        ]
+        prompts.append(
+            hlt.generate_prompt(
+                content="paper body",
+                prompt_name="subtitle",
+                additional_content="A Title",
+                layout="prefix",
+            )
+        )
+        prefix = hlt.prompts.DOCUMENT_PREFIX.format("paper body")
+        for prompt in prompts:
+            self.assertTrue(prompt.startswith(prefix))
+            # The document appears once, ahead of the task instructions.
+            self.assertEqual(prompt.count("paper body"), 1)
+        self.assertIn("A Title", prompts[-1])
+
+    def test_prefix_tasks_refer_to_the_document_above(self):
+        prefix = hlt.prompts.DOCUMENT_PREFIX.format("paper body")
+        for name in hlt.prompts.prefix_prompt_queue:
+            prompt = hlt.generate_prompt(
+                content="paper body",
+                prompt_name=name,
+                additional_content="Figure 1",
+                layout="prefix",
+            )
+            task = prompt[len(prefix):]
+            # Only the leading document block is delimited by backticks.
+            self.assertNotIn("```", task, name)
+            self.assertNotIn("triple backticks", task, name)
+        title = hlt.generate_prompt(content="paper body", prompt_name="title", layout="prefix")
+        self.assertIn("Generate a title for the document above.", title)
+
+    def test_unknown_layout_raises(self):
+        with self.assertRaises(ValueError):
+            hlt.generate_prompt(content="body", prompt_name="title", layout="sideways")
+
 
 class TestAgentConfig(unittest.TestCase):
     def test_resolve_config_uses_overrides(self):
@@ -59,5 +99,114 @@ class TestAgentConfig(unittest.TestCase):
         self.assertEqual(cfg.model, settings.openai_model)
 
 
+class TestAgentPool(unittest.TestCase):
+    def test_lru_pool_evicts_unpinned_entries(self):
+        from app.agent import _LRUPool
+
+        evicted = []
+        pool = _LRUPool(2, on_evict=evicted.append)
+        pool.get_or_create("pinned", lambda: "p", pinned=True)
+        for key in ("a", "b", "c"):
+            pool.get_or_create(key, lambda key=key: key.upper())
+
+        self.assertEqual(evicted, ["A"])
+        self.assertEqual(pool.get_or_create("pinned", lambda: "new"), "p")
+        stats = pool.stats()
+        self.assertEqual((stats["pinned"], stats["entries"]), (1, 2))
+
+    def test_agents_are_reused_per_config(self):
+        import asyncio
+
+        from app.agent import _leased_agent, resolve_config
+
+        async def fetch():
+            cfg = resolve_config(api_key="k", base_url="https://example.test")
+            other = resolve_config(api_key="k2", base_url="https://example.test")
+            agents = []
+            for config in (cfg, cfg, other):
+                with _leased_agent(config, None, "system") as agent:
+                    agents.append(agent)
+            return agents
+
+        first, second, third = asyncio.run(fetch())
+        self.assertIs(first, second)
+        self.assertIsNot(first, third)
+
+    def test_evicted_client_closes_after_its_last_call(self):
+        import asyncio
+        from unittest import mock
+
+        from app import agent as agent_module
+
+        pool = agent_module._LRUPool(1, on_evict=agent_module._PooledClient.retire)
+
+        async def scenario():
+            first = agent_module.resolve_config(api_key="k1", base_url="https://example.test")
+            second = agent_module.resolve_config(api_key="k2", base_url="https://example.test")
+            with agent_module._leased_agent(first, None, "system") as leased:
+                [client] = pool._entries.values()
+                # Evicts the leased client from the pool of one.
+                with agent_module._leased_agent(second, None, "system"):
+                    pass
+                await asyncio.sleep(0)
+                closed_while_leased = client.http_client.is_closed
+            await asyncio.sleep(0.01)
+            with agent_module._leased_agent(first, None, "system") as fresh:
+                replaced = fresh is not leased
+            return closed_while_leased, client.http_client.is_closed, replaced
+
+        with mock.patch.object(agent_module, "_clients", pool):
+            closed_while_leased, closed_after, replaced = asyncio.run(scenario())
+        self.assertFalse(closed_while_leased)
+        self.assertTrue(closed_after)
+        self.assertTrue(replaced)
+
+    def test_clients_of_finished_loops_are_evicted(self):
+        import asyncio
+        from unittest import mock
+
+        from app import agent as agent_module
+
+        pool = agent_module._LRUPool(4, on_evict=agent_module._PooledClient.retire)
+        config = agent_module.resolve_config(api_key="k", base_url="https://example.test")
+
+        async def lease():
+            with agent_module._leased_agent(config, None, "system"):
+                pass
+
+        with mock.patch.object(agent_module, "_clients", pool), mock.patch.object(
+            agent_module, "_is_default", return_value=True
+        ):
+            for _ in range(3):
+                asyncio.run(lease())
+        # The pinned default client of each finished loop was dropped.
+        self.assertEqual(pool.stats()["pinned"], 1)
+
+
+class TestCallLimiter(unittest.TestCase):
+    def test_limits_concurrent_calls(self):
+        import asyncio
+
+        from app.agent import _CallLimiter
+
+        limiter = _CallLimiter(2)
+        active = {"now": 0, "peak": 0}
+
+        async def call():
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+            await asyncio.sleep(0.01)
+            active["now"] -= 1
+            return "done"
+
+        async def scenario():
+            return await asyncio.gather(*(limiter.run(call) for _ in range(6)))
+
+        self.assertEqual(asyncio.run(scenario()), ["done"] * 6)
+        self.assertEqual(active["peak"], 2)
+        stats = limiter.stats()
+        self.assertEqual((stats["completed"], stats["in_flight"]), (6, 0))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,139 @@
+"""Tests for the content-addressed document cache."""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+# Ensure the backend package is importable when tests run from the repo root.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from app import renders  # noqa: E402
+from app.documents import Document, DocumentCache, digest_bytes  # noqa: E402
+from app.ingest import PDF, TEXT  # noqa: E402
+from app.renders import RENDER_DPIS, RenderCache, render_key, resolve_dpi  # noqa: E402
+from app.workers import WorkerPool  # noqa: E402
+from test_utils import _pdf_with_vector_figure  # noqa: E402
+
+
+def _document(text: str) -> Document:
+    parsed = {"content": text, "n_pages": 1, "n_characters": len(text)}
+    return Document.from_parsed(digest_bytes(text.encode()), TEXT, parsed, None)
+
+
+class TestDocument(unittest.TestCase):
+    def test_stats_exclude_content_and_are_read_only(self):
+        document = _document("body")
+        self.assertNotIn("content", document.stats)
+        with self.assertRaises(TypeError):
+            document.stats["n_pages"] = 2
+
+    def test_text_documents_have_no_images(self):
+        self.assertIsNone(_document("body").image_index())
+        self.assertEqual(_document("body").figure_regions(), ())
+
+
+class TestDocumentCache(unittest.TestCase):
+    def test_put_returns_existing_copy(self):
+        cache = DocumentCache(max_entries=4, max_bytes=10**6)
+        first = cache.put(_document("same"))
+        second = cache.put(_document("same"))
+        self.assertIs(first, second)
+
+    def test_lru_eviction_by_entry_count(self):
+        cache = DocumentCache(max_entries=2, max_bytes=10**6)
+        a, b, c = _document("a"), _document("b"), _document("c")
+        cache.put(a)
+        cache.put(b)
+        cache.get(a.digest, TEXT)  # "a" becomes most recently used
+        cache.put(c)
+        self.assertIsNotNone(cache.get(a.digest, TEXT))
+        self.assertIsNone(cache.get(b.digest, TEXT))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_grown_documents_are_evicted_on_use_not_by_stats(self):
+        cache = DocumentCache(max_entries=4, max_bytes=100)
+        a, b = _document("a"), _document("b")
+        cache.put(a)
+        cache.put(b)
+        with patch.object(Document, "nbytes", 60):
+            stats = cache.stats()
+            self.assertEqual((stats["entries"], stats["evictions"]), (2, 0))
+            self.assertIsNotNone(cache.get(b.digest, TEXT))
+        self.assertIsNone(cache.get(a.digest, TEXT))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_repeat_upload_is_served_from_cache(self):
+        cache = DocumentCache(max_entries=4, max_bytes=10**6)
+        raw = b"hello cached world"
+        with patch("highlight.utils.get_token_count", return_value=3) as counter:
+            first = asyncio.run(cache.load(raw, TEXT))
+            second = asyncio.run(cache.load(raw, TEXT))
+        self.assertIs(first, second)
+        self.assertEqual(counter.call_count, 1)
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+
+class TestRenderCache(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = tmp.name
+        pool = WorkerPool("test", max_workers=1)
+        self.addCleanup(pool.shutdown)
+        patcher = patch.object(renders, "image_pool", pool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        raw = _pdf_with_vector_figure()
+        parsed = {"content": "", "n_pages": 2}
+        self.document = Document.from_parsed(digest_bytes(raw), PDF, parsed, raw)
+
+    def _render(self, cache, region, dpi):
+        return asyncio.run(cache.arender(self.document, region, dpi))
+
+    def test_regions_are_rendered_once_and_persisted(self):
+        region = self.document.figure_regions()[0]
+        self.assertIs(self.document.figure_regions()[0], region)
+
+        cache = RenderCache(self.root, max_bytes=10**6)
+        with patch("highlight.render_region", return_value=b"png") as render:
+            self.assertEqual(self._render(cache, region, 72), b"png")
+            self.assertEqual(self._render(cache, region, 72), b"png")
+            self._render(cache, region, 150)
+            # A fresh cache over the same directory reuses the files.
+            self._render(RenderCache(self.root, max_bytes=10**6), region, 72)
+        self.assertEqual(render.call_count, 2)
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 2))
+
+    def test_least_recently_served_renders_are_pruned(self):
+        region = self.document.figure_regions()[0]
+        cache = RenderCache(self.root, max_bytes=2500)
+        with patch("highlight.render_region", return_value=b"x" * 1000):
+            for dpi in (36, 72):
+                self._render(cache, region, dpi)
+            # Age the 72 dpi render so it is the least recently served.
+            past = time.time() - 60
+            os.utime(cache.blobs.path(self.document.digest, render_key(region, 72)), (past, past))
+            self._render(cache, region, 150)
+        self.assertIsNotNone(cache.get(self.document.digest, region, 36))
+        self.assertIsNone(cache.get(self.document.digest, region, 72))
+        self.assertIsNotNone(cache.get(self.document.digest, region, 150))
+        stats = cache.stats()
+        self.assertEqual((stats["evictions"], stats["bytes"]), (1, 2000))
+
+    def test_dpi_is_snapped_to_fixed_resolutions(self):
+        self.assertEqual(resolve_dpi(1), 36)
+        self.assertEqual(resolve_dpi(73), 150)
+        self.assertEqual(resolve_dpi(200), 200)
+        self.assertEqual(resolve_dpi(10**6), 600)
+        self.assertEqual(resolve_dpi(None), 200)
+        self.assertTrue(all(resolve_dpi(dpi) in RENDER_DPIS for dpi in range(1, 700)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+"""Tests for the content-hash export cache and the export ETags."""
+
+import io
+import os
+import sys
+import unittest
+import zipfile
+from unittest import mock
+
+# Ensure the backend package is importable when tests run from the repo root.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from app import export_jobs  # noqa: E402
+from app.export_cache import ExportCache, export_etag, export_key  # noqa: E402
+from app.routers import export as export_router  # noqa: E402
+from app.schemas import WordExportRequest  # noqa: E402
+from app.workers import WorkerPool  # noqa: E402
+from app_client import create_session, start_client  # noqa: E402
+from test_utils import _encoded_image  # noqa: E402
+
+
+class TestExportCache(unittest.TestCase):
+    def test_key_covers_payload_template_and_image(self):
+        key = export_key("docx", {"title": "A", "citation": "C"}, "v1", "https://x/a.jpg")
+        self.assertEqual(
+            key, export_key("docx", {"citation": "C", "title": "A"}, "v1", "https://x/a.jpg")
+        )
+        for other in (
+            export_key("pptx", {"title": "A", "citation": "C"}, "v1", "https://x/a.jpg"),
+            export_key("docx", {"title": "B", "citation": "C"}, "v1", "https://x/a.jpg"),
+            export_key("docx", {"title": "A", "citation": None}, "v1", "https://x/a.jpg"),
+            export_key("docx", {"title": "A", "citation": "C"}, "v2", "https://x/a.jpg"),
+            export_key("docx", {"title": "A", "citation": "C"}, "v1", "https://x/b.jpg"),
+        ):
+            self.assertNotEqual(key, other)
+
+    def test_least_recently_used_exports_are_evicted(self):
+        cache = ExportCache(max_entries=2, max_bytes=10)
+        cache.put("a", b"aaaa")
+        cache.put("b", b"bbbb")
+        self.assertEqual(cache.get("a"), b"aaaa")
+        cache.put("c", b"cccc")
+        self.assertIsNone(cache.get("b"))
+        cache.put("d", b"dddddd")
+        self.assertIsNone(cache.get("a"))
+        cache.put("huge", b"x" * 11)
+        self.assertIsNone(cache.get("huge"))
+        # Evicted or oversized complete renders can still be revalidated.
+        self.assertTrue(cache.known("a") and cache.known("huge"))
+        self.assertFalse(cache.known("never-stored"))
+        stats = cache.stats()
+        self.assertEqual((stats["entries"], stats["bytes"]), (2, 10))
+
+
+class TestExportRoutes(unittest.TestCase):
+    def setUp(self):
+        self.renders = []
+        render = export_jobs.render
+
+        def counted(template, context, image=None):
+            self.renders.append(template)
+            return render(template, context, image)
+
+        pool = WorkerPool("test", max_workers=1)
+        self.addCleanup(pool.shutdown)
+        self.cache = ExportCache(max_entries=8, max_bytes=64 * 1024 * 1024)
+        self.client = start_client(
+            self,
+            mock.patch.object(export_jobs, "export_pool", pool),
+            mock.patch.object(export_jobs, "render", counted),
+            mock.patch.object(export_router, "export_cache", self.cache),
+        )
+        self.session_id = create_session()
+
+    def _docx(self, **fields):
+        return {"session_id": self.session_id, "title": "Cached", **fields}
+
+    def test_repeat_export_is_served_without_rendering(self):
+        first = self.client.post("/api/export/docx", json=self._docx())
+        second = self.client.post("/api/export/docx", json=self._docx())
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second.headers["etag"], first.headers["etag"])
+        self.assertEqual(self.renders, ["docx"])
+
+        changed = self.client.post("/api/export/docx", json=self._docx(title="Other"))
+        self.assertNotEqual(changed.headers["etag"], first.headers["etag"])
+        self.assertEqual(self.renders, ["docx", "docx"])
+
+    def test_export_missing_its_photo_is_not_cached(self):
+        body = self._docx(selected_image={"full_url": "https://example.test/a.jpg"})
+        with mock.patch.object(export_router, "_fetch_photo", mock.AsyncMock(return_value=None)):
+            for _ in range(2):
+                self.assertEqual(self.client.post("/api/export/docx", json=body).status_code, 200)
+        self.assertEqual(self.renders, ["docx", "docx"])
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+    def test_export_missing_its_photo_is_not_revalidated(self):
+        body = self._docx(selected_image={"full_url": "https://example.test/a.jpg"})
+        stale_etag = export_etag(export_router._docx_export_key(WordExportRequest(**body)))
+        with mock.patch.object(export_router, "_fetch_photo", mock.AsyncMock(return_value=None)):
+            incomplete = self.client.post("/api/export/docx", json=body)
+        self.assertEqual(incomplete.status_code, 200)
+        self.assertNotIn("etag", incomplete.headers)
+
+        photo = _encoded_image("RGB", (64, 48), "JPEG")
+        with mock.patch.object(export_router, "_fetch_photo", mock.AsyncMock(return_value=photo)):
+            complete = self.client.post(
+                "/api/export/docx", json=body, headers={"If-None-Match": stale_etag}
+            )
+        self.assertEqual(complete.status_code, 200)
+        self.assertEqual(complete.headers["etag"], stale_etag)
+        self.assertNotEqual(complete.content, incomplete.content)
+        with zipfile.ZipFile(io.BytesIO(complete.content)) as archive:
+            self.assertTrue(any(n.startswith("word/media/") for n in archive.namelist()))
+
+        again = self.client.post(
+            "/api/export/docx", json=body, headers={"If-None-Match": stale_etag}
+        )
+        self.assertEqual(again.status_code, 304)
+
+    def test_matching_if_none_match_gets_not_modified(self):
+        slide = {
+            "session_id": self.session_id,
+            "title": "Slide",
+            "objective": "Objective",
+            "approach_points": ["Approach"],
+            "impact_points": ["Impact"],
+        }
+        etag = self.client.post("/api/export/pptx", json=slide).headers["etag"]
+        response = self.client.post(
+            "/api/export/pptx", json=slide, headers={"If-None-Match": etag}
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers["etag"], etag)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(self.cache.stats()["not_modified"], 1)
+        self.assertEqual(self.renders, ["pptx"])
+
+
+if __name__ == "__main__":
+    unittest.main()
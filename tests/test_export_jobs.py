@@ -0,0 +1,170 @@
+"""Tests for the pooled export renderers, the deck export and the batch ZIP export."""
+
+import asyncio
+import io
+import os
+import sys
+import unittest
+import zipfile
+from unittest import mock
+
+# Ensure the backend package is importable when tests run from the repo root.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from pptx import Presentation  # noqa: E402
+from pptx.enum.shapes import MSO_SHAPE_TYPE  # noqa: E402
+
+from app import export_jobs  # noqa: E402
+from app.routers.export import _unique_names  # noqa: E402
+from app.workers import WorkerPool  # noqa: E402
+from app_client import create_session, start_client  # noqa: E402
+from test_utils import _encoded_image  # noqa: E402
+
+_CONTENT = {
+    "title": "Pooled Title",
+    "objective": "Objective",
+    "figure_caption": "Caption",
+    "citation": "Citation",
+    "approach_points": ["- First approach"],
+    "impact_points": ["Impact"],
+}
+
+
+class TestExportJobs(unittest.TestCase):
+    def test_pptx_is_filled_with_content_and_picture(self):
+        picture = _encoded_image("RGB", (200, 120), "PNG", photo=False)
+        data = export_jobs.render(export_jobs.PPTX, _CONTENT, picture)
+        slide = Presentation(io.BytesIO(data)).slides[0]
+        texts = [shape.text_frame.text for shape in slide.shapes if shape.has_text_frame]
+        self.assertIn("Pooled Title", texts)
+        self.assertIn("First approach", texts)
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            self.assertTrue(any(n.startswith("ppt/media/") for n in archive.namelist()))
+
+    def test_deck_has_a_filled_slide_per_paper(self):
+        picture = _encoded_image("RGB", (200, 120), "PNG", photo=False)
+        contents = [{**_CONTENT, "title": f"Paper {i}"} for i in range(3)]
+        data = export_jobs.render_deck(contents, [picture, None, picture])
+        slides = Presentation(io.BytesIO(data)).slides
+        titles = [
+            next(s.text_frame.text for s in slide.shapes if s.name == "Title 1")
+            for slide in slides
+        ]
+        self.assertEqual(titles, ["Paper 0", "Paper 1", "Paper 2"])
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            media = [n for n in archive.namelist() if n.startswith("ppt/media/")]
+        self.assertEqual(len(media), 1)
+
+    def test_cloned_slide_keeps_its_pictures(self):
+        prs = export_jobs.export_templates.pptx()
+        source = prs.slides[0]
+        picture = _encoded_image("RGB", (64, 48), "PNG", photo=False)
+        source.shapes.add_picture(io.BytesIO(picture), 0, 0)
+        export_jobs._clone_slide(prs, source)
+        buffer = io.BytesIO()
+        prs.save(buffer)
+        clone = Presentation(buffer).slides[1]
+        [copied] = [s for s in clone.shapes if s.shape_type == MSO_SHAPE_TYPE.PICTURE]
+        self.assertEqual(copied.image.size, (64, 48))
+
+    def test_unknown_template_is_rejected(self):
+        with self.assertRaises(ValueError):
+            export_jobs.render("xlsx", {})
+
+    def test_docx_renders_in_a_process_pool(self):
+        pool = WorkerPool("test", kind="process", max_workers=1)
+        try:
+            data = asyncio.run(
+                pool.run(export_jobs.render, export_jobs.DOCX, {"title": "Pooled Title"})
+            )
+        finally:
+            pool.shutdown()
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            self.assertIn(b"Pooled Title", archive.read("word/document.xml"))
+
+
+class TestBatchExport(unittest.TestCase):
+    _CITATION = 'Smith, John. 2021. "A Title." Nature Energy 6:1-10.'
+
+    def setUp(self):
+        render = export_jobs.render
+
+        def flaky(template, context, image=None):
+            if context.get("title") == "boom":
+                raise RuntimeError("template exploded")
+            return render(template, context, image)
+
+        pool = WorkerPool("test", max_workers=2)
+        self.addCleanup(pool.shutdown)
+        self.client = start_client(
+            self,
+            mock.patch.object(export_jobs, "export_pool", pool),
+            mock.patch.object(export_jobs, "render", flaky),
+        )
+        self.session_id = create_session()
+
+    def _slide(self, **fields):
+        return {"session_id": self.session_id, **_CONTENT, **fields}
+
+    def test_archive_holds_each_document_under_a_unique_name(self):
+        docx = [
+            {"session_id": self.session_id, "title": f"Doc {i}", "citation": self._CITATION}
+            for i in range(2)
+        ]
+        response = self.client.post(
+            "/api/export/batch",
+            json={"docx": docx, "pptx": [self._slide(citation=self._CITATION)]},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["content-type"], "application/zip")
+        with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+            names = sorted(archive.namelist())
+            slides = Presentation(io.BytesIO(archive.read(names[-1])))
+        stem = names[-1].rpartition(".")[0]
+        self.assertTrue(stem.startswith("smith_etal_2021_"))
+        self.assertEqual(names, [f"{stem}-2.docx", f"{stem}.docx", f"{stem}.pptx"])
+        self.assertEqual(len(slides.slides), 1)
+
+    def test_failed_documents_are_listed_in_the_archive(self):
+        docx = [
+            {"session_id": self.session_id, "title": title} for title in ("ok", "boom")
+        ]
+        response = self.client.post("/api/export/batch", json={"docx": docx})
+        self.assertEqual(response.status_code, 200)
+        with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+            self.assertEqual(len(archive.namelist()), 2)
+            errors = archive.read("export-errors.txt").decode()
+        self.assertIn("-2.docx: template exploded", errors)
+
+    def test_invalid_batches_are_rejected(self):
+        post = lambda body: self.client.post("/api/export/batch", json=body)  # noqa: E731
+        self.assertEqual(post({}).status_code, 400)
+        response = post({"pptx": [self._slide(), self._slide(objective="")]})
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(response.json()["detail"].startswith("pptx[1]:"))
+        self.assertEqual(post({"docx": [{"session_id": "unknown"}]}).status_code, 401)
+
+    def test_deck_has_a_slide_per_paper(self):
+        slides = [self._slide(title=f"Paper {i}") for i in range(3)]
+        response = self.client.post("/api/export/deck", json={"slides": slides})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-disposition"].endswith('.pptx"'))
+        deck = Presentation(io.BytesIO(response.content))
+        self.assertEqual(len(deck.slides), 3)
+
+    def test_invalid_decks_are_rejected(self):
+        post = lambda body: self.client.post("/api/export/deck", json=body)  # noqa: E731
+        self.assertEqual(post({"slides": []}).status_code, 400)
+        response = post({"slides": [self._slide(), self._slide(title="")]})
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(response.json()["detail"].startswith("slides[1]:"))
+
+    def test_unique_names_number_repeats(self):
+        self.assertEqual(
+            _unique_names(["a.docx", "a.docx", "a.pptx", "a.docx"]),
+            ["a.docx", "a-2.docx", "a.pptx", "a-3.docx"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
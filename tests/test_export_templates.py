@@ -0,0 +1,110 @@
+"""Tests for the cached, cloned export templates."""
+
+import importlib.resources
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+import zipfile
+
+# Ensure the backend package is importable when tests run from the repo root.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from docxtpl import DocxTemplate  # noqa: E402
+
+from app.export_templates import (  # noqa: E402
+    DOCX_TEMPLATE,
+    PPTX_TEMPLATE,
+    TemplateCache,
+)
+
+_CONTEXT = {
+    "title": "Cached Title",
+    "subtitle": "Subtitle",
+    "photo": None,
+    "photo_link": "",
+    "photo_site_name": "Wikimedia Commons",
+    "image_caption": "Caption",
+    "science": "Science",
+    "impact": "Impact",
+    "summary": "Summary",
+    "funding": "Funding",
+    "citation": "Citation",
+    "related_links": "",
+    "point_of_contact": "Contact",
+}
+
+
+def _saved_parts(saveable) -> dict:
+    buffer = io.BytesIO()
+    saveable.save(buffer)
+    with zipfile.ZipFile(buffer) as archive:
+        return {name: archive.read(name) for name in archive.namelist()}
+
+
+class TestTemplateCache(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        data = importlib.resources.files("highlight.data")
+        for name in (DOCX_TEMPLATE, PPTX_TEMPLATE):
+            with data.joinpath(name).open("rb") as src, open(
+                os.path.join(self.root, name), "wb"
+            ) as dst:
+                shutil.copyfileobj(src, dst)
+        self.cache = TemplateCache(self.root)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_docx_clone_renders_like_a_fresh_template(self):
+        fresh = DocxTemplate(os.path.join(self.root, DOCX_TEMPLATE))
+        fresh.render(_CONTEXT)
+        for _ in range(2):
+            clone = self.cache.docx()
+            clone.render(_CONTEXT)
+            self.assertEqual(_saved_parts(clone), _saved_parts(fresh))
+        self.assertEqual(self.cache.stats()["loads"], 1)
+
+    def test_clones_do_not_share_state(self):
+        first = self.cache.docx()
+        first.render(_CONTEXT)
+        self.assertIn("Cached Title", first.docx.element.xml)
+        second = self.cache.docx()
+        self.assertNotIn("Cached Title", second.docx.element.xml)
+        self.assertIn("{{", second.docx.element.xml)
+
+        prs = self.cache.pptx()
+        shape = next(s for s in prs.slides[0].shapes if s.has_text_frame)
+        shape.text_frame.text = "Edited"
+        again = self.cache.pptx()
+        edited = next(s for s in again.slides[0].shapes if s.shape_id == shape.shape_id)
+        self.assertNotEqual(edited.text_frame.text, "Edited")
+
+    def test_measured_template_clones_can_add_slides(self):
+        self.assertIsNotNone(self.cache.shape_size("Title 1"))
+        prs = self.cache.pptx()
+        prs.slides.add_slide(prs.slides[0].slide_layout)
+        buffer = io.BytesIO()
+        prs.save(buffer)
+        with zipfile.ZipFile(buffer) as archive:
+            slides = [n for n in archive.namelist() if n.startswith("ppt/slides/slide")]
+        self.assertEqual(len(slides), 2)
+
+    def test_modified_template_is_reloaded(self):
+        self.cache.preload()
+        self.cache.pptx()
+        self.assertEqual(self.cache.stats()["reloads"], 0)
+
+        path = os.path.join(self.root, PPTX_TEMPLATE)
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        self.cache.pptx()
+        self.cache.pptx()
+        stats = self.cache.stats()
+        self.assertEqual((stats["loads"], stats["reloads"]), (3, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,261 @@
+"""Tests for the shared outbound HTTP client and the async Wikimedia search."""
+
+import asyncio
+import os
+import sys
+import unittest
+from unittest import mock
+
+import httpx
+
+# Ensure the backend package is importable when tests run from the repo root.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from app import http, wikimedia  # noqa: E402
+from test_utils import _WIKIMEDIA_RESPONSE  # noqa: E402
+
+
+def _mock_client(handler):
+    return lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+class TestHttpClientPool(unittest.TestCase):
+    def test_client_is_shared_within_a_loop(self):
+        pool = http.HttpClientPool()
+
+        async def scenario():
+            first, second = pool.client(), pool.client()
+            await pool.aclose()
+            return first, second, pool.client()
+
+        first, second, reopened = asyncio.run(scenario())
+        self.assertIs(first, second)
+        self.assertTrue(first.is_closed)
+        self.assertIsNot(reopened, first)
+
+    def test_concurrent_requests_are_capped_per_host(self):
+        pool = http.HttpClientPool()
+        active = {"now": 0, "peak": 0}
+
+        async def handler(request):
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+            await asyncio.sleep(0.01)
+            active["now"] -= 1
+            return httpx.Response(200, content=request.url.host.encode())
+
+        async def scenario():
+            urls = ["https://a.test/x"] * 6 + ["https://b.test/y"] * 2
+            responses = await asyncio.gather(*(pool.get(url) for url in urls))
+            await pool.aclose()
+            return [response.content for response in responses]
+
+        settings = mock.Mock(http_max_connections_per_host=2)
+        with mock.patch.object(http, "_new_client", _mock_client(handler)), \
+                mock.patch.object(http, "get_settings", return_value=settings):
+            bodies = asyncio.run(scenario())
+        self.assertEqual(bodies, [b"a.test"] * 6 + [b"b.test"] * 2)
+        # Two slots for each of the two hosts.
+        self.assertEqual(active["peak"], 4)
+        stats = pool.stats()
+        self.assertEqual((stats["requests"], stats["failed"], stats["in_flight"]), (8, 0, 0))
+
+    def test_error_statuses_raise_and_are_counted(self):
+        pool = http.HttpClientPool()
+
+        async def scenario():
+            try:
+                await pool.get("https://a.test/missing")
+            finally:
+                await pool.aclose()
+
+        handler = _mock_client(lambda request: httpx.Response(404))
+        with mock.patch.object(http, "_new_client", handler):
+            with self.assertRaises(httpx.HTTPStatusError):
+                asyncio.run(scenario())
+        self.assertEqual(pool.stats()["failed"], 1)
+
+
+def _cache(ttl=3600, stale=0, max_entries=16):
+    return wikimedia.SearchCache(
+        max_entries=max_entries, ttl_seconds=ttl, stale_seconds=stale
+    )
+
+
+class TestSearchCache(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+        self.fail = False
+        patcher = mock.patch.object(wikimedia, "_search_upstream", self._upstream)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def _upstream(self, query, limit):
+        self.calls.append((query, limit))
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise httpx.ConnectError("down")
+        return [{"query": query, "n": len(self.calls)}]
+
+    def test_hits_are_keyed_by_normalised_query_and_limit(self):
+        cache = _cache()
+
+        async def scenario():
+            first = await cache.search("River  Delta", 9)
+            again = await cache.search(" river delta ", 9)
+            other = await cache.search("river delta", 3)
+            return first, again, other
+
+        first, again, other = asyncio.run(scenario())
+        self.assertIs(first, again)
+        self.assertIsNot(first, other)
+        self.assertEqual(self.calls, [("river delta", 9), ("river delta", 3)])
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["hit_rate"]), (1, 2, 0.3333))
+
+    def test_concurrent_identical_searches_are_coalesced(self):
+        cache = _cache()
+
+        async def scenario():
+            return await asyncio.gather(*(cache.search("river", 9) for _ in range(5)))
+
+        results = asyncio.run(scenario())
+        self.assertEqual(len(self.calls), 1)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(cache.stats()["coalesced"], 4)
+
+    def test_stale_entries_are_served_while_refreshing(self):
+        cache = _cache(ttl=0, stale=3600)
+
+        async def scenario():
+            first = await cache.search("river", 9)
+            stale = await cache.search("river", 9)
+            # Served immediately; one refresh is shared by both stale hits.
+            also_stale = await cache.search("river", 9)
+            await asyncio.sleep(0.05)
+            refreshed = await cache.search("river", 9)
+            return first, stale, also_stale, refreshed
+
+        first, stale, also_stale, refreshed = asyncio.run(scenario())
+        self.assertIs(stale, first)
+        self.assertIs(also_stale, first)
+        self.assertEqual(refreshed[0]["n"], 2)
+        self.assertEqual(len(self.calls), 3)
+        self.assertEqual(cache.stats()["stale_hits"], 3)
+
+    def test_failures_are_not_cached_and_stale_results_survive_them(self):
+        cache = _cache(ttl=0, stale=3600)
+
+        async def scenario():
+            self.fail = True
+            with self.assertRaises(httpx.ConnectError):
+                await cache.search("river", 9)
+            self.fail = False
+            first = await cache.search("river", 9)
+            self.fail = True
+            stale = await cache.search("river", 9)
+            await asyncio.sleep(0.05)
+            return first, stale, await cache.search("river", 9)
+
+        first, stale, still_stale = asyncio.run(scenario())
+        self.assertIs(stale, first)
+        self.assertIs(still_stale, first)
+        # The first miss and the completed refresh; the last refresh is pending.
+        self.assertEqual(cache.stats()["errors"], 2)
+
+    def test_least_recently_used_entries_are_dropped(self):
+        cache = _cache(max_entries=2)
+
+        async def scenario():
+            for query in ("a", "b", "a", "c", "a", "b"):
+                await cache.search(query, 9)
+
+        asyncio.run(scenario())
+        self.assertEqual([query for query, _ in self.calls], ["a", "b", "c", "b"])
+        self.assertEqual(cache.stats()["entries"], 2)
+
+
+class TestSearchMany(unittest.TestCase):
+    def _run(self, queries, pages, max_concurrency=4):
+        active = {"now": 0, "peak": 0}
+
+        async def upstream(query, limit):
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+            await asyncio.sleep(0.01)
+            active["now"] -= 1
+            if pages[query] is None:
+                raise httpx.ConnectError("down")
+            return [{"id": page, "title": f"File:{page}"} for page in pages[query]]
+
+        with mock.patch.object(wikimedia, "_search_upstream", upstream), \
+                mock.patch.object(wikimedia, "search_cache", _cache()):
+            results, outcomes = asyncio.run(
+                wikimedia.search_many(queries, 9, max_concurrency=max_concurrency)
+            )
+        return results, outcomes, active["peak"]
+
+    def test_results_are_merged_by_page_and_ranked(self):
+        results, outcomes, _ = self._run(
+            ["river", "delta", "River "], {"river": [1, 2, 3], "delta": [4, 3]}
+        )
+        # Page 3 is found by both queries, so it outranks each query's top hit.
+        self.assertEqual([item["id"] for item in results], [3, 1, 4, 2])
+        self.assertEqual(results[0]["matched_queries"], ["river", "delta"])
+        self.assertEqual([outcome["query"] for outcome in outcomes], ["river", "delta"])
+
+    def test_failed_queries_do_not_discard_the_others(self):
+        results, outcomes, _ = self._run(["a", "b", "c"], {"a": None, "b": [0, 7], "c": [0]})
+        self.assertEqual([item["id"] for item in results], [0, 7])
+        self.assertEqual((outcomes[0]["count"], outcomes[0]["error"]), (0, "down"))
+        self.assertEqual((outcomes[1]["count"], outcomes[1]["error"]), (2, None))
+
+    def test_concurrency_is_capped(self):
+        queries = [f"q{index}" for index in range(6)]
+        _, _, peak = self._run(queries, {query: [] for query in queries}, max_concurrency=2)
+        self.assertEqual(peak, 2)
+
+
+class TestWikimediaSearch(unittest.TestCase):
+    def _search(self, handler):
+        pool = http.HttpClientPool()
+
+        async def scenario():
+            try:
+                return await wikimedia.search("river", limit=3)
+            finally:
+                await pool.aclose()
+
+        with mock.patch.object(wikimedia, "http_pool", pool), \
+                mock.patch.object(wikimedia, "search_cache", _cache()), \
+                mock.patch.object(http, "_new_client", _mock_client(handler)):
+            return asyncio.run(scenario())
+
+    def test_results_are_parsed(self):
+        seen = []
+
+        def handler(request):
+            seen.append(request.url.params)
+            return httpx.Response(200, json=_WIKIMEDIA_RESPONSE)
+
+        results = self._search(handler)
+        self.assertEqual([item["id"] for item in results], [11])
+        self.assertEqual((seen[0]["gsrsearch"], seen[0]["gsrlimit"]), ("river", "3"))
+
+    def test_upstream_failure_yields_no_results(self):
+        self.assertEqual(self._search(lambda request: httpx.Response(503)), [])
+        self.assertEqual(self._search(lambda request: httpx.Response(200, text="<html>")), [])
+
+    def test_malformed_payload_yields_no_results(self):
+        for payload in (
+            {"query": {"pages": [{"pageid": 1, "imageinfo": []}]}},
+            {"query": {"pages": [{"pageid": 1, "imageinfo": [None]}]}},
+            {"query": {"pages": None}},
+            [],
+        ):
+            handler = lambda request, payload=payload: httpx.Response(200, json=payload)  # noqa: E731
+            self.assertEqual(self._search(handler), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+"""Tests for the cached export image preparation."""
+
+import os
+import sys
+import unittest
+from unittest import mock
+
+# Ensure the backend package is importable when tests run from the repo root.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+import highlight as hlt  # noqa: E402
+from app.image_prep import (  # noqa: E402
+    PreparedImageCache,
+    emu_to_pixels,
+    mm_to_pixels,
+)
+from test_utils import _encoded_image  # noqa: E402
+
+
+class TestPreparedImageCache(unittest.TestCase):
+    def _cache(self, max_bytes=10**7):
+        return PreparedImageCache(max_bytes=max_bytes, dpi=150, jpeg_quality=85)
+
+    def test_physical_sizes_convert_at_the_dpi(self):
+        self.assertEqual(mm_to_pixels(120, 150), 709)
+        self.assertEqual(emu_to_pixels(5943600, 150), 975)
+
+    def test_variants_are_cached_per_source_and_box(self):
+        cache = self._cache()
+        source = _encoded_image("RGB", (300, 200), "PNG")
+        with mock.patch("highlight.prepare_image", wraps=hlt.prepare_image) as prepare:
+            first = cache.prepare(source, 150).getvalue()
+            self.assertEqual(cache.prepare(source, 150).getvalue(), first)
+            cache.prepare(source, 100)
+            cache.prepare(source, 150, 150, fit="cover")
+        self.assertEqual(prepare.call_count, 3)
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (1, 3, 3))
+        self.assertLess(stats["prepared_bytes"], stats["source_bytes"])
+
+    def test_byte_budget_evicts_oldest_variants(self):
+        source = _encoded_image("RGB", (300, 200), "PNG")
+        sizes = [len(self._cache().prepare(source, width).getvalue()) for width in (150, 149)]
+        cache = self._cache(max_bytes=max(sizes))
+        cache.prepare(source, 150)
+        cache.prepare(source, 149)
+        stats = cache.stats()
+        self.assertEqual((stats["entries"], stats["bytes"]), (1, sizes[1]))
+
+    def test_undecodable_images_pass_through(self):
+        cache = self._cache()
+        self.assertEqual(cache.prepare(b"<svg/>", 300).getvalue(), b"<svg/>")
+        self.assertEqual(cache.stats()["failures"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+"""Tests for the PDF image listings and their binary thumbnail endpoint."""
+
+import json
+import os
+import sys
+import unittest
+from unittest import mock
+
+# Ensure the backend package is importable when tests run from the repo root.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+import highlight as hlt  # noqa: E402
+
+from app.config import get_settings  # noqa: E402
+from app.documents import Document, digest_bytes  # noqa: E402
+from app.ingest import PDF  # noqa: E402
+from app.routers import images  # noqa: E402
+from app.session import store  # noqa: E402
+from app.workers import WorkerPool  # noqa: E402
+from app_client import create_session, start_client  # noqa: E402
+from test_utils import _pdf_with_figures  # noqa: E402
+
+
+class TestPdfImageListing(unittest.TestCase):
+    def setUp(self):
+        # One worker and no spare backlog: every shard beyond the first
+        # must wait for a slot rather than being refused.
+        self.pool = WorkerPool("test", max_workers=1, max_pending=1)
+        self.addCleanup(self.pool.shutdown)
+        self.client = start_client(
+            self,
+            mock.patch.object(images, "image_pool", self.pool),
+            mock.patch.object(get_settings(), "pdf_image_pages_per_shard", 1),
+        )
+        self.session_id = create_session()
+        session = store.get(self.session_id)
+        data = _pdf_with_figures()
+        session.document = Document.from_parsed(
+            digest_bytes(data), PDF, {"content": "", "n_pages": 3}, data
+        )
+        store.update(session)
+
+    def _events(self):
+        response = self.client.post(
+            "/api/images/pdf-extract/stream",
+            params={"session_id": self.session_id, "include_all": True},
+        )
+        self.assertEqual(response.status_code, 200)
+        return [json.loads(line) for line in response.text.splitlines()]
+
+    def test_shards_wait_for_pool_capacity(self):
+        events = self._events()
+        pages = sorted(event["page"] for event in events if event["type"] == "page")
+        self.assertEqual(pages, [1, 2, 3])
+        self.assertEqual(events[-1]["type"], "done")
+        self.assertEqual(events[-1]["failed_pages"], [])
+        stats = self.pool.stats()
+        self.assertEqual((stats["rejected"], stats["peak_in_flight"]), (0, 1))
+
+    def test_failed_shard_is_reported_with_its_pages(self):
+        extract = hlt.extract_page_range
+
+        def flaky(source, start, stop, **options):
+            if start == 1:
+                raise RuntimeError("corrupt page")
+            return extract(source, start, stop, **options)
+
+        with mock.patch.object(hlt, "extract_page_range", flaky):
+            events = self._events()
+        errors = [event for event in events if event["type"] == "error"]
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(errors[0]["pages"], [2])
+        self.assertIn("corrupt page", errors[0]["detail"])
+        pages = sorted(event["page"] for event in events if event["type"] == "page")
+        self.assertEqual(pages, [1, 3])
+        self.assertEqual(events[-1]["failed_pages"], [2])
+
+    def test_thumbnails_are_served_as_cacheable_binaries(self):
+        response = self.client.post(
+            "/api/images/pdf-extract",
+            params={"session_id": self.session_id, "include_all": True},
+        )
+        image = response.json()["images"][0]
+        self.assertTrue(image["thumbnail_url"].startswith("/api/images/pdf/"))
+
+        thumb = self.client.get(image["thumbnail_url"])
+        self.assertEqual(thumb.status_code, 200)
+        self.assertEqual(thumb.headers["content-type"], "image/jpeg")
+        self.assertTrue(thumb.content.startswith(b"\xff\xd8"))
+        self.assertIn("immutable", thumb.headers["cache-control"])
+        full = self.client.get(image["url"])
+        self.assertNotEqual(full.headers["etag"], thumb.headers["etag"])
+        revalidated = self.client.get(
+            image["thumbnail_url"], headers={"If-None-Match": thumb.headers["etag"]}
+        )
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_streamed_thumbnails_are_not_rendered_again(self):
+        listed = [
+            image
+            for event in self._events()
+            if event["type"] == "page"
+            for image in event["images"]
+        ]
+        with mock.patch("highlight.utils._render_thumbnail") as render:
+            thumb = self.client.get(listed[0]["thumbnail_url"])
+        self.assertEqual(thumb.status_code, 200)
+        render.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+"""Tests for the persistent LLM response cache."""
+
+import asyncio
+import contextlib
+import os
+import sys
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+# Ensure the backend package is importable when tests run from the repo root.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+import highlight as hlt  # noqa: E402
+from app import agent  # noqa: E402
+from app.llm_cache import ResponseCache, cache_key  # noqa: E402
+
+
+class _FakeAgent:
+    def __init__(self, output):
+        self.output = output
+        self.calls = 0
+
+    async def run(self, _user_prompt):
+        self.calls += 1
+        return SimpleNamespace(output=self.output, usage=None)
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+
+    def _cache(self, ttl=3600, max_entries=100):
+        return ResponseCache(
+            os.path.join(self._tmp.name, "llm.sqlite3"),
+            ttl_seconds=ttl,
+            max_entries=max_entries,
+        )
+
+    def test_key_depends_on_every_part(self):
+        base = ("gpt-x", "https://example.test", "system", "prompt", "text")
+        keys = {cache_key(*base)}
+        for index, value in enumerate(("gpt-y", "https://other.test", "sys2", "p2", "Points")):
+            parts = list(base)
+            parts[index] = value
+            keys.add(cache_key(*parts))
+        self.assertEqual(len(keys), 6)
+
+    def test_round_trip_and_counters(self):
+        cache = self._cache()
+        self.assertIsNone(cache.get("k"))
+        cache.put("k", "text", "hello")
+        self.assertEqual(cache.get("k"), "hello")
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (1, 1, 1))
+
+    def test_expired_entries_miss(self):
+        cache = self._cache(ttl=-1)
+        cache.put("k", "text", "hello")
+        self.assertIsNone(cache.get("k"))
+
+    def test_max_entries_drops_least_recently_used(self):
+        cache = self._cache(max_entries=2)
+        cache.put("a", "text", "A")
+        cache.put("b", "text", "B")
+        cache.get("a")
+        cache.put("c", "text", "C")
+        self.assertEqual(cache.get("a"), "A")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.stats()["entries"], 2)
+
+    def test_structured_hits_are_revalidated(self):
+        cache = self._cache()
+        fake = _FakeAgent(hlt.ImpactPoints(points=["one", "two", "three"]))
+        config = agent.resolve_config(api_key="k", base_url="https://example.test")
+
+        async def run(use_cache=True):
+            return await agent._run_agent(
+                config, hlt.ImpactPoints, "system", "prompt", use_cache=use_cache
+            )
+
+        with mock.patch.object(agent, "get_response_cache", return_value=cache), \
+                mock.patch.object(
+                    agent, "_leased_agent", return_value=contextlib.nullcontext(fake)
+                ):
+            first = asyncio.run(run())
+            second = asyncio.run(run())
+            self.assertEqual(fake.calls, 1)
+            self.assertIsInstance(second, hlt.ImpactPoints)
+            self.assertEqual(second.points, first.points)
+
+            asyncio.run(run(use_cache=False))
+            self.assertEqual(fake.calls, 2)
+
+            key = cache_key(
+                config.model, config.base_url, "system", "prompt",
+                agent._type_name(hlt.ImpactPoints),
+            )
+            cache.put(key, "stale", '{"unexpected": true}')
+            asyncio.run(run())
+            self.assertEqual(fake.calls, 3)
+            self.assertEqual(cache.stats()["invalid"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
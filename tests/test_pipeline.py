@@ -0,0 +1,69 @@
+"""Tests for the dependency-aware task runner."""
+
+import asyncio
+import os
+import sys
+import unittest
+
+# Ensure the backend package is importable when tests run from the repo root.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from app.pipeline import DagTask, DependencyFailed, run_dag  # noqa: E402
+
+
+def _collect(tasks):
+    async def gather():
+        return [outcome async for outcome in run_dag(tasks)]
+
+    return asyncio.run(gather())
+
+
+def _task(value, delay=0.0, deps=()):
+    async def run(inputs):
+        await asyncio.sleep(delay)
+        return value + "".join(inputs[dep] for dep in deps)
+
+    return DagTask(run, deps=deps)
+
+
+class TestRunDag(unittest.TestCase):
+    def test_dependencies_receive_upstream_results(self):
+        outcomes = {o.name: o for o in _collect({
+            "title": _task("T"),
+            "subtitle": _task("S", deps=("title",)),
+        })}
+        self.assertEqual(outcomes["subtitle"].result, "ST")
+
+    def test_independent_tasks_run_concurrently(self):
+        tasks = {name: _task(name, delay=0.1) for name in "abcde"}
+        outcomes = _collect(tasks)
+        self.assertEqual(len(outcomes), 5)
+        # Five 100 ms tasks in parallel finish well before 500 ms.
+        self.assertLess(max(o.elapsed for o in outcomes), 0.3)
+
+    def test_outcomes_stream_in_completion_order(self):
+        outcomes = _collect({"slow": _task("s", delay=0.1), "fast": _task("f")})
+        self.assertEqual([o.name for o in outcomes], ["fast", "slow"])
+
+    def test_failure_skips_dependents_only(self):
+        async def boom(_inputs):
+            raise RuntimeError("upstream down")
+
+        outcomes = {o.name: o for o in _collect({
+            "objective": DagTask(boom),
+            "approach": _task("A", deps=("objective",)),
+            "title": _task("T"),
+        })}
+        self.assertIsInstance(outcomes["objective"].error, RuntimeError)
+        self.assertIsInstance(outcomes["approach"].error, DependencyFailed)
+        self.assertTrue(outcomes["title"].ok)
+
+    def test_invalid_graphs_are_rejected(self):
+        with self.assertRaises(ValueError):
+            _collect({"a": _task("a", deps=("missing",))})
+        with self.assertRaises(ValueError):
+            _collect({"a": _task("a", deps=("b",)), "b": _task("b", deps=("a",))})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,180 @@
+"""Tests for the image proxy's disk cache and streamed write-through."""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import unittest
+from contextlib import AsyncExitStack
+from unittest import mock
+
+import httpx
+
+# Ensure the backend package is importable when tests run from the repo root.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from app import http  # noqa: E402
+from app.proxy_cache import ProxyCache  # noqa: E402
+from app.routers import images  # noqa: E402
+from app_client import start_client  # noqa: E402
+
+_IMAGE = bytes(range(256)) * 40
+
+
+class TestProxyCache(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+
+    def _cache(self, max_bytes=10**6, max_object_bytes=10**5):
+        return ProxyCache(
+            self._tmp.name, max_bytes=max_bytes, max_object_bytes=max_object_bytes
+        )
+
+    def _store(self, cache, url, body, headers=None):
+        staged = cache.stage(url)
+        staged.write(body)
+        cache.commit(url, staged, headers or {"content-type": "image/png"})
+
+    def test_round_trip_keeps_upstream_validators(self):
+        cache = self._cache()
+        self.assertIsNone(cache.lookup("https://a.test/x.png"))
+        self._store(
+            cache,
+            "https://a.test/x.png",
+            b"png-bytes",
+            {"content-type": "image/png", "etag": '"up-1"', "last-modified": "Tue, 01 Oct 2024 00:00:00 GMT"},
+        )
+        cached = cache.lookup("https://a.test/x.png")
+        self.assertEqual(cached.path.read_bytes(), b"png-bytes")
+        self.assertEqual((cached.content_type, cached.etag, cached.size), ("image/png", '"up-1"', 9))
+        self.assertEqual(cached.last_modified, "Tue, 01 Oct 2024 00:00:00 GMT")
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["stored"]), (1, 1, 1))
+
+    def test_uncommitted_writes_are_invisible(self):
+        cache = self._cache()
+        staged = cache.stage("https://a.test/x.png")
+        staged.write(b"partial")
+        self.assertIsNone(cache.lookup("https://a.test/x.png"))
+        staged.discard()
+        self.assertEqual(list(cache.blobs.root.glob("*/*")), [])
+
+    def test_cacheable_responses(self):
+        cache = self._cache(max_object_bytes=100)
+        self.assertTrue(cache.cacheable(200, {}))
+        self.assertFalse(cache.cacheable(206, {}))
+        self.assertFalse(cache.cacheable(200, {"cache-control": "private, no-store"}))
+        self.assertFalse(cache.cacheable(200, {"content-length": "101"}))
+
+    def test_least_recently_served_entries_are_pruned(self):
+        cache = self._cache(max_bytes=2500)
+        for name in ("a", "b"):
+            self._store(cache, f"https://a.test/{name}", b"x" * 1000)
+        # Age "b" so it is the least recently served entry.
+        past = time.time() - 60
+        os.utime(cache.lookup("https://a.test/b").path, (past, past))
+        self._store(cache, "https://a.test/c", b"x" * 1000)
+        self.assertIsNotNone(cache.lookup("https://a.test/a"))
+        self.assertIsNone(cache.lookup("https://a.test/b"))
+        self.assertIsNotNone(cache.lookup("https://a.test/c"))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_directory_is_scanned_only_when_over_budget(self):
+        cache = self._cache(max_bytes=2500)
+        with mock.patch.object(cache, "prune", wraps=cache.prune) as prune:
+            self._store(cache, "https://a.test/a", b"x" * 1000)
+            self.assertEqual(prune.call_count, 1)  # establishes the running total
+            self._store(cache, "https://a.test/b", b"x" * 1000)
+            self.assertEqual(prune.call_count, 1)
+            self._store(cache, "https://a.test/c", b"x" * 1000)
+            self.assertEqual(prune.call_count, 2)
+        self.assertLessEqual(cache.stats()["bytes"], 2500)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+
+class TestProxyEndpoint(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.upstream_calls = 0
+
+        def handler(request):
+            self.upstream_calls += 1
+            if request.url.path == "/missing.png":
+                return httpx.Response(404)
+            return httpx.Response(
+                200, content=_IMAGE, headers={"Content-Type": "image/png", "ETag": '"v1"'}
+            )
+
+        cache = ProxyCache(tmp.name, max_bytes=10**6, max_object_bytes=10**6)
+        client = lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler))  # noqa: E731
+        self.client = start_client(
+            self,
+            mock.patch.object(images, "proxy_cache", cache),
+            mock.patch.object(http, "_new_client", client),
+        )
+
+    def _get(self, url, **headers):
+        return self.client.get("/api/images/proxy", params={"url": url}, headers=headers)
+
+    def test_repeat_requests_are_served_from_disk(self):
+        url = "https://upload.test/River.png"
+        first = self._get(url)
+        self.assertEqual((first.status_code, first.content), (200, _IMAGE))
+        second = self._get(url)
+        self.assertEqual((second.status_code, second.content), (200, _IMAGE))
+        self.assertEqual(second.headers["etag"], '"v1"')
+        self.assertEqual(self.upstream_calls, 1)
+
+        self.assertEqual(self._get(url, **{"If-None-Match": '"v1"'}).status_code, 304)
+        ranged = self._get(url, Range="bytes=10-19")
+        self.assertEqual(ranged.status_code, 206)
+        self.assertEqual(ranged.content, _IMAGE[10:20])
+        self.assertEqual(self.upstream_calls, 1)
+
+    def test_upstream_errors_are_not_cached(self):
+        url = "https://upload.test/missing.png"
+        self.assertEqual(self._get(url).status_code, 502)
+        self.assertEqual(self._get(url).status_code, 502)
+        self.assertEqual(self.upstream_calls, 2)
+
+
+class TestProxyRelay(unittest.TestCase):
+    def test_host_slot_is_released_before_the_client_has_read_the_body(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        body = _IMAGE * 20
+        pool = http.HttpClientPool()
+        cache = ProxyCache(tmp.name, max_bytes=10**7, max_object_bytes=10**7)
+        url = "https://upload.test/Big.png"
+
+        async def scenario():
+            context = AsyncExitStack()
+            upstream = await context.enter_async_context(pool.stream(url))
+            relay = images._relay_image(url, upstream, context)
+            received = [await relay.__anext__()]
+            # The browser has taken one chunk; the rest is read ahead.
+            for _ in range(100):
+                if pool.stats()["in_flight"] == 0:
+                    break
+                await asyncio.sleep(0.01)
+            in_flight = pool.stats()["in_flight"]
+            received.extend([chunk async for chunk in relay])
+            await pool.aclose()
+            return in_flight, b"".join(received)
+
+        handler = lambda request: httpx.Response(200, content=body)  # noqa: E731
+        client = lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler))  # noqa: E731
+        with mock.patch.object(images, "proxy_cache", cache), \
+                mock.patch.object(http, "_new_client", client):
+            in_flight, received = asyncio.run(scenario())
+        self.assertGreater(len(body), images._RELAY_CHUNK_BYTES)
+        self.assertEqual(in_flight, 0)
+        self.assertEqual(received, body)
+        self.assertIsNotNone(cache.lookup(url))
+
+
+if __name__ == "__main__":
+    unittest.main()
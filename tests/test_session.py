@@ -0,0 +1,147 @@
+"""Tests for session expiry and memory-bounded eviction."""
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+# Ensure the backend package is importable when tests run from the repo root.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from app.documents import Document, digest_bytes, document_cache  # noqa: E402
+from app.ingest import PDF, TEXT  # noqa: E402
+from app.session import InMemorySessionStore  # noqa: E402
+from app.session_sqlite import SQLiteSessionStore  # noqa: E402
+
+
+def _create(store):
+    return store.create(
+        api_key="key", base_url="https://example.test", model="gpt-x", active_project="IM3"
+    )
+
+
+def _attach(store, session, text):
+    parsed = {"content": text, "n_pages": 1}
+    session.document = Document.from_parsed(
+        digest_bytes(text.encode()), TEXT, parsed, None
+    )
+    store.update(session)
+
+
+class TestInMemorySessionStore(unittest.TestCase):
+    def test_idle_sessions_expire(self):
+        store = InMemorySessionStore(idle_ttl_seconds=60, max_bytes=10**9)
+        session = _create(store)
+        self.assertIs(store.get(session.session_id), session)
+
+        session.last_access = time.time() - 120
+        self.assertIsNone(store.get(session.session_id))
+        self.assertEqual(store.stats()["expired"], 1)
+        self.assertEqual(store.stats()["live_sessions"], 0)
+
+    def test_sweep_removes_expired_sessions(self):
+        store = InMemorySessionStore(idle_ttl_seconds=60, max_bytes=10**9)
+        stale, fresh = _create(store), _create(store)
+        stale.last_access = time.time() - 120
+        self.assertEqual(store.sweep(), 1)
+        self.assertIsNone(store.get(stale.session_id))
+        self.assertIsNotNone(store.get(fresh.session_id))
+
+    def test_byte_budget_evicts_least_recently_used(self):
+        first, second = "a" * 4000, "b" * 4000
+        store = InMemorySessionStore(idle_ttl_seconds=3600, max_bytes=6000)
+        old, new = _create(store), _create(store)
+        _attach(store, old, first)
+        _attach(store, new, second)
+
+        self.assertIsNone(store.get(old.session_id))
+        self.assertIs(store.get(new.session_id), new)
+        stats = store.stats()
+        self.assertEqual(stats["evicted"], 1)
+        self.assertEqual(stats["bytes_held"], new.nbytes)
+
+    def test_delete_releases_bytes(self):
+        store = InMemorySessionStore(idle_ttl_seconds=3600, max_bytes=10**9)
+        session = _create(store)
+        _attach(store, session, "content")
+        store.delete(session.session_id)
+        self.assertEqual(store.stats()["bytes_held"], 0)
+
+
+class TestSQLiteSessionStore(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+
+    def _store(self, ttl=3600):
+        return SQLiteSessionStore(
+            os.path.join(self._tmp.name, "sessions.sqlite3"),
+            blob_dir=os.path.join(self._tmp.name, "blobs"),
+            idle_ttl_seconds=ttl,
+        )
+
+    def test_sessions_are_shared_between_store_instances(self):
+        # Two instances over the same files stand in for two worker processes.
+        writer, reader = self._store(), self._store()
+        session = _create(writer)
+        pdf_bytes = b"%PDF-1.4 not really a pdf"
+        parsed = {"content": "shared body", "n_pages": 3}
+        session.document = Document.from_parsed(
+            digest_bytes(pdf_bytes), PDF, parsed, pdf_bytes
+        )
+        session.filename = "paper.pdf"
+        writer.update(session)
+
+        loaded = reader.get(session.session_id)
+        self.assertIsNotNone(loaded)
+        self.assertEqual(loaded.api_key, "key")
+        self.assertEqual(loaded.filename, "paper.pdf")
+        self.assertEqual(loaded.content, "shared body")
+        self.assertEqual(loaded.pdf_bytes, pdf_bytes)
+        self.assertEqual(loaded.stats["n_pages"], 3)
+
+    def test_document_is_rehydrated_from_blobs(self):
+        store = self._store()
+        session = _create(store)
+        _attach(store, session, "persisted text")
+        document_cache._documents.clear()
+
+        loaded = store.get(session.session_id)
+        self.assertEqual(loaded.content, "persisted text")
+
+    def test_idle_sessions_expire(self):
+        store = self._store(ttl=60)
+        session = _create(store)
+        store._conn().execute(
+            "UPDATE sessions SET last_access = ?", (time.time() - 120,)
+        )
+        self.assertEqual(store.sweep(), 1)
+        self.assertIsNone(store.get(session.session_id))
+        self.assertEqual(store.stats()["live_sessions"], 0)
+
+    def test_reused_blobs_survive_a_concurrent_sweep(self):
+        store = self._store(ttl=60)
+        stale = _create(store)
+        _attach(store, stale, "shared text")
+        blob = store.blobs.path(stale.document.digest, "text.txt")
+        os.utime(blob, (time.time() - 120, time.time() - 120))
+
+        # A new session stores the same document just before a sweep prunes
+        # the blobs it has not seen referenced.
+        fresh = _create(store)
+        _attach(store, fresh, "shared text")
+        store.blobs.prune([], older_than_seconds=60)
+        self.assertTrue(blob.exists())
+
+    def test_database_files_are_owner_only(self):
+        store = self._store()
+        _create(store)
+        for suffix in ("", "-wal", "-shm"):
+            path = store.db_path + suffix
+            self.assertTrue(os.path.exists(path), path)
+            self.assertEqual(os.stat(path).st_mode & 0o777, 0o600, path)
+
+
+if __name__ == "__main__":
+    unittest.main()
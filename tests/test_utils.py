@@ -60,6 +60,340 @@ class TestReadPdf(unittest.TestCase):
             self.assertGreater(result["n_tokens"], 0)
 
 
+_WIKIMEDIA_RESPONSE = {
+    "query": {
+        "pages": [
+            {
+                "pageid": 11,
+                "title": "File:River.jpg",
+                "imageinfo": [
+                    {
+                        "thumburl": "https://upload.example/thumb/River.jpg",
+                        "url": "https://upload.example/River.jpg",
+                        "descriptionurl": "https://commons.example/File:River.jpg",
+                        "mime": "image/jpeg",
+                        "extmetadata": {
+                            "Artist": {"value": "<a href='#'>A &amp; B</a>"},
+                            "LicenseShortName": {"value": "CC BY 4.0"},
+                        },
+                    }
+                ],
+            },
+            {"pageid": 12, "title": "File:Missing.jpg", "missing": True},
+            {"pageid": 13, "title": "File:NoThumb.jpg", "imageinfo": [{"url": "u"}]},
+        ]
+    }
+}
+
+
+class TestWikimediaParsing(unittest.TestCase):
+    def test_params_carry_query_and_limit(self):
+        params = hlt.wikimedia_search_params("river delta", 5)
+        self.assertEqual((params["gsrsearch"], params["gsrlimit"]), ("river delta", 5))
+
+    def test_parse_keeps_pages_with_thumbnails(self):
+        results = hlt.parse_wikimedia_response(_WIKIMEDIA_RESPONSE)
+        self.assertEqual([item["id"] for item in results], [11])
+        self.assertEqual(results[0]["artist_plain"], "A & B")
+        self.assertEqual(results[0]["license"], "CC BY 4.0")
+        self.assertEqual(hlt.parse_wikimedia_response({}), [])
+
+
+def _encoded_image(mode, size, fmt, photo=True):
+    """A noisy (photo-like) or flat (chart-like) test image, encoded."""
+    import io
+    import random
+
+    from PIL import Image, ImageDraw
+
+    image = Image.new(mode, size, "white")
+    if photo:
+        rng = random.Random(3)
+        image.putdata(
+            [tuple(rng.randrange(256) for _ in mode) for _ in range(size[0] * size[1])]
+        )
+    else:
+        ImageDraw.Draw(image).rectangle((10, 10, size[0] // 2, size[1] // 2), fill="navy")
+    out = io.BytesIO()
+    image.save(out, format=fmt)
+    return out.getvalue()
+
+
+class TestPrepareImage(unittest.TestCase):
+    def _size(self, data):
+        import io
+
+        from PIL import Image
+
+        return Image.open(io.BytesIO(data)).size
+
+    def test_photos_are_downscaled_to_jpeg(self):
+        source = _encoded_image("RGB", (600, 400), "PNG")
+        prepared, mime = hlt.prepare_image(source, 150)
+        self.assertEqual((mime, self._size(prepared)), ("image/jpeg", (150, 100)))
+        self.assertLess(len(prepared), len(source) / 10)
+
+    def test_cover_fills_both_dimensions(self):
+        source = _encoded_image("RGB", (600, 400), "JPEG")
+        prepared, _ = hlt.prepare_image(source, 150, 150, fit="cover")
+        self.assertEqual(self._size(prepared), (225, 150))
+        prepared, _ = hlt.prepare_image(source, 150, 150)
+        self.assertEqual(self._size(prepared), (150, 100))
+
+    def test_charts_and_transparency_stay_png(self):
+        chart = _encoded_image("RGB", (800, 600), "PNG", photo=False)
+        self.assertEqual(hlt.prepare_image(chart, 400)[1], "image/png")
+        logo = _encoded_image("RGBA", (200, 200), "PNG")
+        self.assertEqual(hlt.prepare_image(logo, 100)[1], "image/png")
+
+    def test_small_images_are_left_alone(self):
+        source = _encoded_image("RGB", (120, 80), "JPEG")
+        self.assertEqual(hlt.prepare_image(source, 300), (source, "image/jpeg"))
+        # A photograph stored as PNG is still worth converting.
+        png = _encoded_image("RGB", (120, 80), "PNG")
+        self.assertEqual(hlt.prepare_image(png, 300)[1], "image/jpeg")
+
+    def test_undecodable_input_raises(self):
+        with self.assertRaises(ValueError):
+            hlt.prepare_image(b"<svg/>", 300)
+        with self.assertRaises(ValueError):
+            hlt.prepare_image(_encoded_image("RGB", (10, 10), "PNG"), 300, fit="cover")
+
+
+class TestCommonsThumbnailUrl(unittest.TestCase):
+    BASE = "https://upload.wikimedia.org/wikipedia/commons"
+
+    def test_rounds_up_to_a_standard_width(self):
+        self.assertEqual(
+            hlt.commons_thumbnail_url(f"{self.BASE}/a/ab/River.jpg", 709),
+            f"{self.BASE}/thumb/a/ab/River.jpg/960px-River.jpg",
+        )
+
+    def test_vector_and_tiff_renditions(self):
+        self.assertTrue(
+            hlt.commons_thumbnail_url(f"{self.BASE}/a/ab/Map.svg", 100).endswith(
+                "/120px-Map.svg.png"
+            )
+        )
+        self.assertTrue(
+            hlt.commons_thumbnail_url(f"{self.BASE}/a/ab/Scan.tif", 500).endswith(
+                "/lossy-page1-500px-Scan.tif.jpg"
+            )
+        )
+
+    def test_other_urls_are_not_rewritten(self):
+        for url, width in (
+            ("https://example.org/a/ab/River.jpg", 500),
+            (f"{self.BASE}/thumb/a/ab/River.jpg/250px-River.jpg", 500),
+            (f"{self.BASE}/a/ab/Talk.ogg", 500),
+            (f"{self.BASE}/a/ab/River.jpg", 5000),
+        ):
+            self.assertIsNone(hlt.commons_thumbnail_url(url, width))
+
+
+def _pdf_with_images():
+    """Three pages: one shared logo on every page plus a figure on page 2."""
+    import fitz
+
+    def png(width, height, value):
+        pixmap = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, width, height), 0)
+        pixmap.set_rect(pixmap.irect, (value, value, value))
+        return pixmap.tobytes("png")
+
+    doc = fitz.open()
+    logo_xref = 0
+    for page_num in range(3):
+        page = doc.new_page()
+        if logo_xref:
+            page.insert_image(fitz.Rect(0, 0, 40, 40), xref=logo_xref)
+        else:
+            logo_xref = page.insert_image(fitz.Rect(0, 0, 40, 40), stream=png(8, 8, 10))
+        if page_num == 1:
+            page.insert_image(fitz.Rect(50, 50, 250, 250), stream=png(32, 16, 200))
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def _pdf_with_figures():
+    """A figure, a JPEG re-encoding of it, a distinct figure and a small logo."""
+    import random
+
+    import fitz
+
+    rng = random.Random(7)
+
+    def gradient(width, height, reverse=False):
+        samples = bytearray()
+        for _row in range(height):
+            for col in range(width):
+                level = int(255 * col / (width - 1))
+                level = 255 - level if reverse else level
+                level = max(0, min(255, level + rng.randint(-12, 12)))
+                samples += bytes((level, level, level))
+        return fitz.Pixmap(fitz.csRGB, width, height, bytes(samples), 0)
+
+    figure = gradient(240, 160)
+    doc = fitz.open()
+    for stream in (
+        figure.tobytes("png"),
+        figure.tobytes("jpeg"),
+        gradient(240, 160, reverse=True).tobytes("png"),
+    ):
+        page = doc.new_page()
+        page.insert_image(fitz.Rect(0, 0, 20, 20), stream=gradient(16, 16).tobytes("png"))
+        page.insert_image(fitz.Rect(50, 50, 290, 210), stream=stream)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def _pdf_with_vector_figure():
+    """A captioned bar chart drawn with vector graphics, plus a text-only page."""
+    import fitz
+
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_textbox(fitz.Rect(72, 60, 540, 140), "Body text. " * 20, fontsize=10)
+    page.draw_line((100, 350), (100, 180))
+    page.draw_line((100, 350), (500, 350))
+    for bar in range(5):
+        page.draw_rect(
+            fitz.Rect(130 + bar * 70, 320 - 30 * bar, 170 + bar * 70, 350),
+            fill=(0.2, 0.4, 0.8),
+        )
+    page.insert_text((300, 375), "Year", fontsize=8)
+    page.insert_textbox(
+        fitz.Rect(72, 385, 540, 420), "Figure 2. Annual growth by region.", fontsize=10
+    )
+    page.insert_textbox(fitz.Rect(72, 430, 540, 520), "More text. " * 20, fontsize=10)
+    page = doc.new_page()
+    page.insert_textbox(
+        fitz.Rect(72, 72, 540, 200), "Figure 5 is discussed but not drawn here.", fontsize=10
+    )
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+class TestFigureRegions(unittest.TestCase):
+    def test_finds_captioned_vector_figure(self):
+        regions = hlt.find_figure_regions(_pdf_with_vector_figure())
+        self.assertEqual(len(regions), 1)
+        region = regions[0]
+        self.assertEqual((region.page, region.label), (1, "Figure 2"))
+        self.assertTrue(region.caption.startswith("Figure 2."))
+        x0, y0, x1, y1 = region.bbox
+        # Bars, axes and axis label; not the body text above or the caption.
+        self.assertLessEqual(x0, 100)
+        self.assertTrue(140 < y0 <= 180)
+        self.assertGreaterEqual(x1, 500)
+        self.assertTrue(375 <= y1 < 390)
+
+    def test_render_region_returns_png_at_requested_dpi(self):
+        png = hlt.render_region(_pdf_with_vector_figure(), 1, (72, 72, 144, 108), dpi=144)
+        self.assertTrue(png.startswith(b"\x89PNG"))
+        import fitz
+
+        pixmap = fitz.Pixmap(png)
+        self.assertEqual((pixmap.width, pixmap.height), (144, 72))
+
+
+class TestPdfImageIndex(unittest.TestCase):
+    def test_entries_follow_page_order(self):
+        index = hlt.PdfImageIndex(_pdf_with_images())
+        self.assertEqual([entry.page for entry in index], [1, 2, 2, 3])
+        self.assertEqual(len({entry.xref for entry in index}), 2)
+        figure = [entry for entry in index if entry.width == 32][0]
+        self.assertEqual(index.by_index(figure.index), figure)
+        self.assertEqual(index.by_xref(figure.xref), figure)
+        self.assertIsNone(index.by_index(99))
+
+    def test_shared_xrefs_are_extracted_once(self):
+        index = hlt.PdfImageIndex(_pdf_with_images())
+        logo = index.by_index(0)
+        with patch.object(index._doc, "extract_image", wraps=index._doc.extract_image) as spy:
+            for entry in index:
+                if entry.xref == logo.xref:
+                    self.assertTrue(index.image_bytes(entry.xref))
+        self.assertEqual(spy.call_count, 1)
+        self.assertEqual(index.extract(logo.xref)["ext"], "png")
+
+    def test_matches_eager_extraction(self):
+        data = _pdf_with_images()
+        index = hlt.PdfImageIndex(data)
+        eager = hlt.extract_images_from_pdf(data)
+        self.assertEqual(
+            [(item["index"], item["xref"], item["bytes"]) for item in eager],
+            [(entry.index, entry.xref, index.image_bytes(entry.xref)) for entry in index],
+        )
+
+    def test_thumbnails_are_bounded_jpegs(self):
+        import fitz
+
+        index = hlt.PdfImageIndex(_pdf_with_images())
+        figure = [entry for entry in index if entry.width == 32][0]
+        thumbnail = fitz.Pixmap(index.thumbnail(figure.xref, max_size=8))
+        self.assertEqual((thumbnail.width, thumbnail.height), (8, 4))
+        self.assertEqual(index.mime_type(figure.xref), "image/png")
+        self.assertIs(index.thumbnail(figure.xref, max_size=8), index.thumbnail(figure.xref, 8))
+
+    def test_candidates_skip_small_and_duplicate_images(self):
+        index = hlt.PdfImageIndex(_pdf_with_figures())
+        kept, skipped = index.candidates(min_dimension=32, min_bytes=512, dedupe_distance=4)
+        self.assertEqual([entry.page for entry in kept], [1, 3])
+        self.assertEqual(skipped["small"], 3)
+        self.assertEqual(skipped["duplicate"], 1)
+
+    def test_thresholds_default_to_every_image(self):
+        data = _pdf_with_figures()
+        self.assertEqual(len(hlt.extract_images_from_pdf(data)), 6)
+        filtered = hlt.extract_images_from_pdf(data, min_dimension=32, dedupe_distance=4)
+        self.assertEqual([item["page"] for item in filtered], [1, 3])
+
+    def test_entry_at_maps_page_slots_to_entries(self):
+        index = hlt.PdfImageIndex(_pdf_with_images())
+        self.assertEqual(index.page_count, 3)
+        self.assertEqual(index.entry_at(2, 1).index, 2)
+        self.assertIsNone(index.entry_at(2, 2))
+        self.assertIsNone(index.entry_at(9, 0))
+
+    def test_invalid_pdf_yields_empty_index(self):
+        self.assertEqual(len(hlt.PdfImageIndex(b"not a pdf")), 0)
+
+
+class TestShardedExtraction(unittest.TestCase):
+    def test_page_shards_cover_every_page(self):
+        self.assertEqual(hlt.page_shards(10, 4), [(0, 4), (4, 8), (8, 10)])
+        self.assertEqual(hlt.page_shards(0, 4), [])
+
+    def test_sharded_scan_matches_serial_scan(self):
+        data = _pdf_with_figures()
+        options = {"min_dimension": 32, "thumbnail_size": 16}
+        serial = list(hlt.iter_pdf_images(data, pages_per_shard=1, **options))
+        self.assertEqual([record["page"] for record in serial], [1, 2, 3])
+        self.assertEqual(
+            [record["skipped"]["small"] for record in serial], [1, 1, 1]
+        )
+        first = serial[0]["images"][0]
+        self.assertEqual((first["slot"], first["width"]), (1, 240))
+        self.assertTrue(first["thumbnail"].startswith(b"\xff\xd8"))
+
+        sharded = [
+            record
+            for start, stop in reversed(hlt.page_shards(3, 2))
+            for record in hlt.extract_page_range(data, start, stop, **options)
+        ]
+
+        def summary(records):
+            return sorted(
+                (record["page"], [image["hash"] for image in record["images"]])
+                for record in records
+            )
+
+        self.assertEqual(summary(sharded), summary(serial))
+
+
 class TestReadText(unittest.TestCase):
     def test_read_text(self):
         # Simulate a text file using BytesIO
@@ -0,0 +1,92 @@
+"""Tests for the bounded worker pools and the ingestion helpers."""
+
+import asyncio
+import os
+import sys
+import threading
+import unittest
+
+# Ensure the backend package is importable when tests run from the repo root.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from app.ingest import PDF, TEXT, detect_kind  # noqa: E402
+from app.workers import PoolBusyError, PoolTimeoutError, WorkerPool  # noqa: E402
+
+
+class TestWorkerPool(unittest.TestCase):
+    def test_run_returns_result_and_counts(self):
+        pool = WorkerPool("test", max_workers=2)
+        try:
+            result = asyncio.run(pool.run(sum, [1, 2, 3]))
+        finally:
+            pool.shutdown()
+        self.assertEqual(result, 6)
+        stats = pool.stats()
+        self.assertEqual(stats["completed"], 1)
+        self.assertEqual(stats["in_flight"], 0)
+
+    def test_failures_are_counted_and_propagated(self):
+        pool = WorkerPool("test", max_workers=1)
+        try:
+            with self.assertRaises(ZeroDivisionError):
+                asyncio.run(pool.run(divmod, 1, 0))
+        finally:
+            pool.shutdown()
+        self.assertEqual(pool.stats()["failed"], 1)
+
+    def test_backlog_limit_rejects_excess_jobs(self):
+        pool = WorkerPool("test", max_workers=1, max_pending=1)
+        gate = threading.Event()
+
+        async def scenario():
+            first = asyncio.ensure_future(pool.run(gate.wait, 5))
+            await asyncio.sleep(0.05)
+            with self.assertRaises(PoolBusyError):
+                await pool.run(gate.wait, 5)
+            self.assertEqual(pool.stats()["in_flight"], 1)
+            gate.set()
+            await first
+
+        try:
+            asyncio.run(scenario())
+        finally:
+            pool.shutdown()
+        self.assertEqual(pool.stats()["rejected"], 1)
+
+    def test_timeout_keeps_the_slot_until_the_job_finishes(self):
+        pool = WorkerPool("test", max_workers=1, max_pending=2, timeout=0.1)
+        gate = threading.Event()
+
+        async def scenario():
+            running = asyncio.ensure_future(pool.run(gate.wait, 5))
+            with self.assertRaises(PoolTimeoutError):
+                await pool.run(gate.wait, 5)
+            with self.assertRaises(PoolTimeoutError):
+                await running
+            # The queued job was dropped; the running one still holds its slot.
+            self.assertEqual(pool.stats()["in_flight"], 1)
+            gate.set()
+            await asyncio.sleep(0.05)
+
+        try:
+            asyncio.run(scenario())
+        finally:
+            pool.shutdown()
+        stats = pool.stats()
+        self.assertEqual((stats["in_flight"], stats["timed_out"]), (0, 2))
+        self.assertEqual((stats["completed"], stats["failed"]), (1, 1))
+
+    def test_unknown_kind_raises(self):
+        with self.assertRaises(ValueError):
+            WorkerPool("test", kind="fiber")
+
+
+class TestDetectKind(unittest.TestCase):
+    def test_detects_pdf_and_text(self):
+        self.assertEqual(detect_kind("paper.PDF", ""), PDF)
+        self.assertEqual(detect_kind("upload", "text/plain"), TEXT)
+        self.assertIsNone(detect_kind("slides.pptx", "application/zip"))
+
+
+if __name__ == "__main__":
+    unittest.main()